@@ -55,7 +55,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     from .const import CONF_AUDIO_QUALITY, DEFAULT_AUDIO_QUALITY
     audio_quality = entry.options.get(CONF_AUDIO_QUALITY, DEFAULT_AUDIO_QUALITY)
     
-    cloud_music = CloudMusic(hass, api_url, vip_url, audio_quality)
+    # 读取对冲解析配置
+    from .const import CONF_HEDGED_URL_RESOLVE, DEFAULT_HEDGED_URL_RESOLVE
+    hedged_url_resolve = entry.options.get(CONF_HEDGED_URL_RESOLVE, DEFAULT_HEDGED_URL_RESOLVE)
+    
+    # 读取无法播放歌曲的记录时长
+    from .const import CONF_DEAD_SONG_PERIOD, DEFAULT_DEAD_SONG_PERIOD
+    dead_song_period = entry.options.get(CONF_DEAD_SONG_PERIOD, DEFAULT_DEAD_SONG_PERIOD)
+    
+    cloud_music = CloudMusic(hass, api_url, vip_url, audio_quality, hedged_url_resolve, dead_song_period)
     # 立即加载用户信息（避免第一次访问时延迟）
     await cloud_music._ensure_userinfo_loaded()
     hass.data['cloud_music'] = cloud_music
@@ -336,4 +344,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.services.async_remove(DOMAIN, 'play_fm')
     hass.services.async_remove(DOMAIN, 'fm_trash')
     
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
\ No newline at end of file
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+    # 关闭共享的 HTTP 连接池
+    cloud_music = hass.data.get('cloud_music')
+    if cloud_music is not None:
+        await cloud_music.async_close()
+
+    return unload_ok
\ No newline at end of file
@@ -5,6 +5,7 @@ from urllib.parse import urlparse, parse_qs, parse_qsl, quote
 from homeassistant.helpers.json import save_json
 from custom_components.ha_ncloud_music.http_api import http_get
 from .utils import parse_query
+from .models.play_order import PlayOrder
 
 from homeassistant.components import media_source
 from homeassistant.components.media_player import (
@@ -902,7 +903,7 @@ async def async_browse_media(media_player, media_content_type, media_content_id)
             children=[],
         )
 
-        result = await http_get('https://rapi.qingting.fm/categories?type=channel')
+        result = await http_get('https://rapi.qingting.fm/categories?type=channel', session=cloud_music.session)
         data = result['Data']
         for item in data:
             title = item['title']
@@ -968,6 +969,8 @@ async def async_play_media(media_player, cloud_music, media_content_id):
     query = parse_query(url.query)
 
     playlist = None
+    # 歌单剩余分页（后台加载）
+    playlist_pages = None
     # 通用索引
     playindex = int(query.get('index', 0))
     # 通用ID
@@ -1066,7 +1069,13 @@ async def async_play_media(media_player, cloud_music, media_content_id):
         await media_player.async_play_fm(mode_name)
         return 'fm'  # 特殊返回值，不设置 playlist
     elif media_content_id.startswith(CloudMusicRouter.playlist):
-        playlist = await cloud_music.async_get_playlist(id)
+        # 分页加载：拿到第一页（或点击歌曲所在页）即开始播放，其余分页在后台追加
+        playlist_pages = cloud_music.async_iter_playlist(id)
+        playlist = []
+        async for page in playlist_pages:
+            playlist.extend(page)
+            if playindex < len(playlist):
+                break
     elif media_content_id.startswith(CloudMusicRouter.my_daily):
         playlist = await cloud_music.async_get_dailySongs()
     elif media_content_id.startswith(CloudMusicRouter.my_ilike):
@@ -1132,13 +1141,13 @@ async def async_play_media(media_player, cloud_music, media_content_id):
 
     if playlist is not None:
         media_player.playlist = playlist
-        media_player._playlist_origin = list(playlist)
+        media_player._playlist_origin = PlayOrder(playlist)
         
         # 初始化随机播放列表（如果需要）
         if media_player._attr_shuffle:  # 如果当前是随机模式
             import random
-            media_player._playlist_active = list(playlist)
-            random.shuffle(media_player._playlist_active)
+            media_player._playlist_active = PlayOrder(playlist)
+            media_player._playlist_active.shuffle()
             
             # UX优化：如果用户点击了特定歌曲，把它移到第一位
             if playindex > 0 and playindex < len(playlist):
@@ -1147,8 +1156,7 @@ async def async_play_media(media_player, cloud_music, media_content_id):
                     # 找到点击的歌在随机列表中的位置
                     clicked_index = media_player._playlist_active.index(clicked_song)
                     # 移到第一位
-                    media_player._playlist_active.pop(clicked_index)
-                    media_player._playlist_active.insert(0, clicked_song)
+                    media_player._playlist_active.move_to_front(clicked_index)
                     _LOGGER.debug(f"新歌单，随机模式：打乱 {len(media_player._playlist_active)} 首歌，用户点击第{playindex+1}首，移到第1位")
                 except (ValueError, IndexError):
                     _LOGGER.debug(f"新歌单，随机模式：打乱 {len(media_player._playlist_active)} 首歌")
@@ -1157,13 +1165,43 @@ async def async_play_media(media_player, cloud_music, media_content_id):
             
             media_player._play_index = 0  # 从第一首开始
         else:
-            media_player._playlist_active = list(playlist)
+            media_player._playlist_active = PlayOrder(playlist)
             media_player._play_index = playindex
             _LOGGER.debug(f"新歌单，顺序模式：_play_index={playindex}")
         
+        # 停止上一个歌单的后台加载
+        loader = getattr(media_player, '_playlist_loader', None)
+        if loader is not None and not loader.done():
+            loader.cancel()
+        media_player._playlist_loader = None
+        if playlist_pages is not None:
+            media_player._playlist_loader = hass.async_create_task(
+                async_load_playlist_pages(media_player, playlist_pages, playlist)
+            )
+        
         return 'playlist'
 
 
+async def async_load_playlist_pages(media_player, pages, playlist):
+    """后台加载歌单剩余分页，逐页追加到播放列表"""
+    try:
+        async for page in pages:
+            # 已切换到其他歌单
+            if media_player.playlist is not playlist:
+                break
+            playlist.extend(page)
+            media_player._playlist_origin.sync()
+            media_player._playlist_active.sync()
+            if media_player._attr_shuffle:
+                # 随机模式：新歌混入尚未播放的部分
+                media_player._playlist_active.shuffle(media_player._play_index + 1)
+        _LOGGER.debug(f"歌单加载完成，共 {len(playlist)} 首")
+    except Exception as e:
+        _LOGGER.warning(f"加载歌单剩余歌曲失败: {e}")
+    finally:
+        await pages.aclose()
+
+
 # 上一曲
 async def async_media_previous_track(media_player, shuffle=False):
 
@@ -1221,32 +1259,44 @@ async def async_media_next_track(media_player, shuffle=False):
     if hasattr(media_player, 'playlist') == False:
         return
     
-    # 使用新的双列表机制
-    if shuffle and hasattr(media_player, '_playlist_active') and len(media_player._playlist_active) > 0:
-        # 切歌，索引+1
-        media_player._play_index += 1
-        
-        # 播完一轮，重新洗牌（使用智能打乱）
-        if media_player._play_index >= len(media_player._playlist_active):
-            media_player._smart_shuffle()  # 使用智能打乱方法
-            media_player._play_index = 0
-            _LOGGER.debug("播完一轮，使用智能打乱重新洗牌")
+    async def advance():
+        # 使用新的双列表机制
+        if shuffle and hasattr(media_player, '_playlist_active') and len(media_player._playlist_active) > 0:
+            # 切歌，索引+1
+            media_player._play_index += 1
+            
+            # 播完一轮，重新洗牌（使用智能打乱）
+            if media_player._play_index >= len(media_player._playlist_active):
+                media_player._smart_shuffle()  # 使用智能打乱方法
+                media_player._play_index = 0
+                _LOGGER.debug("播完一轮，使用智能打乱重新洗牌")
 
-    else:
-        # 非随机模式，使用 _play_index
-        media_player._play_index += 1
-        if media_player._play_index >= len(media_player.playlist):
-            # FM 模式：不循环，触发预加载
-            if hasattr(media_player, '_is_fm_playing') and media_player._is_fm_playing:
-                _LOGGER.info("FM 模式播放到列表末尾，触发预加载")
-                await media_player._async_preload_fm_tracks()
-                # 预加载后检查是否有新歌
-                if media_player._play_index < len(media_player.playlist):
-                    pass  # 有新歌，继续播放
+        else:
+            # 非随机模式，使用 _play_index
+            media_player._play_index += 1
+            if media_player._play_index >= len(media_player.playlist):
+                # FM 模式：不循环，触发预加载
+                if hasattr(media_player, '_is_fm_playing') and media_player._is_fm_playing:
+                    _LOGGER.info("FM 模式播放到列表末尾，触发预加载")
+                    await media_player._async_preload_fm_tracks()
+                    # 预加载后检查是否有新歌
+                    if media_player._play_index < len(media_player.playlist):
+                        pass  # 有新歌，继续播放
+                    else:
+                        media_player._play_index = 0  # 还是没有新歌，循环
                 else:
-                    media_player._play_index = 0  # 还是没有新歌，循环
-            else:
-                media_player._play_index = 0
+                    media_player._play_index = 0
+    
+    await advance()
+    
+    # 跳过已知无法播放的歌曲（最多跳过一整轮，避免全部无法播放时死循环）
+    cloud_music = media_player.cloud_music
+    for _ in range(len(media_player.playlist) - 1):
+        current_song = media_player.playlist[media_player.playindex]
+        if not cloud_music.is_music_dead(current_song):
+            break
+        _LOGGER.info(f"⏭️ 跳过无法播放的歌曲: {current_song.song} - {current_song.singer}")
+        await advance()
     
     # 记录播放日志
     current_song = media_player.playlist[media_player.playindex]
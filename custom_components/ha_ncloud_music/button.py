@@ -124,7 +124,6 @@ class CloudMusicSearchButton(CloudMusicButton):
         
         # 获取 API 参数
         search_config = SEARCH_TYPE_MAP.get(search_type_name, SEARCH_TYPE_MAP["歌曲"])
-        api_type = search_config["type"]
         search_key = search_config["key"]
 
         # 3. 获取 CloudMusic API 实例
@@ -136,41 +135,23 @@ class CloudMusicSearchButton(CloudMusicButton):
         # 3. 调用搜索 API
         _LOGGER.info(f"开始搜索: 类型={search_type_name}, 关键词={keyword}")
         try:
-            # 使用 /cloudsearch API（文档说明它比 /search 更全）
-            # 支持 type 参数：1=单曲, 10=专辑, 100=歌手, 1000=歌单, 1009=电台
-            res = await cloud_music.netease_cloud_music(f'/cloudsearch?keywords={keyword}&type={api_type}&limit=50')
+            # 通过共享搜索服务调用 /cloudsearch（文档说明它比 /search 更全），带截止时间
+            results = await cloud_music.search.async_search_many(keyword, {search_key: 50})
             
-            if res.get('code') != 200:
-                _LOGGER.warning(f"搜索 API 返回异常: {res}")
+            if search_key not in results:
                 await self.hass.services.async_call(
                     "persistent_notification",
                     "create",
                     {
-                        "message": f"搜索失败: {res.get('message', '未知错误')}",
+                        "message": "搜索失败: 接口异常或请求超时",
                         "title": "云音乐搜索失败"
                     }
                 )
                 return
 
-            # 4. 根据搜索类型获取对应的结果字段
-            result_data = res.get('result', {})
-            
-            # 不同类型的API返回字段不同
-            if search_key == SEARCH_TYPE_SONG:
-                items = result_data.get('songs', [])
-                item_type_name = "歌曲"
-            elif search_key == SEARCH_TYPE_ALBUM:
-                items = result_data.get('albums', [])
-                item_type_name = "专辑"
-            elif search_key == SEARCH_TYPE_ARTIST:
-                items = result_data.get('artists', [])
-                item_type_name = "歌手"
-            elif search_key == SEARCH_TYPE_PLAYLIST:
-                items = result_data.get('playlists', [])
-                item_type_name = "歌单"
-            else:  # SEARCH_TYPE_RADIO
-                items = result_data.get('djRadios', [])
-                item_type_name = "电台"
+            # 4. 搜索服务已按类型取出对应的结果字段
+            items = results[search_key]
+            item_type_name = search_type_name if search_type_name in SEARCH_TYPE_MAP else "歌曲"
             
             _LOGGER.debug(f"API返回了 {len(items)} 个{item_type_name}结果")
             
@@ -213,7 +194,7 @@ class CloudMusicSearchButton(CloudMusicButton):
                     album_name = item['al']['name'] if item.get('al') else ''
                     duration = item.get('dt', 0)
                     pic_url = item['al']['picUrl'] if item.get('al') else ''
-                    url = cloud_music.get_play_url(song_id, song_name, singer_name, MusicSource.PLAYLIST.value)
+                    url = cloud_music.lazy_play_url(song_id, song_name, singer_name, MusicSource.PLAYLIST.value)
                     music_info = MusicInfo(song_id, song_name, singer_name, album_name, duration, url, pic_url, MusicSource.PLAYLIST.value)
                     music_list.append(music_info)
             else:
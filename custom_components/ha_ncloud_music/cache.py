@@ -0,0 +1,120 @@
+"""
+缓存与请求合并工具
+
+- SingleFlight: 相同 key 的并发请求只执行一次，结果共享
+- TTLCache: 带过期时间的 LRU 缓存
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class SingleFlight:
+    """
+    请求合并（single-flight）
+
+    同一个 key 正在执行时，后续调用直接等待同一个任务，
+    不再重复发起上游请求。factory() 在独立的任务中执行，
+    任何一个调用方（包括第一个）被取消都不会影响其他调用方。
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        # 统计：实际执行次数 / 被合并的次数
+        self.executed = 0
+        self.merged = 0
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有调用方都已取消时避免 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, factory):
+        """执行 factory()，相同 key 的并发调用共享结果（包括异常）"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.merged += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda t: self._done(key, t))
+        # shield: 某个等待者被取消时不影响任务本身和其他等待者
+        return await asyncio.shield(task)
+
+    @property
+    def inflight(self):
+        return len(self._inflight)
+
+    def stats(self):
+        return {
+            'executed': self.executed,
+            'merged': self.merged,
+            'inflight': self.inflight
+        }
+
+
+class TTLCache:
+    """
+    带过期时间的 LRU 缓存
+
+    每个条目有独立的 TTL 和标签（tag），可按标签批量清除，
+    超出容量时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expire_at, tag, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expire_at, tag, value = item
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl, tag=None):
+        self._data[key] = (time.monotonic() + ttl, tag, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[2]
+
+    def clear(self, tag=None):
+        """清除缓存；指定 tag 时只清除该标签的条目"""
+        if tag is None:
+            self._data.clear()
+            return
+        for key in [k for k, v in self._data.items() if v[1] == tag]:
+            del self._data[key]
+
+    def __contains__(self, key):
+        """只判断是否存在且未过期（不影响 LRU 顺序和命中统计）"""
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses
+        }
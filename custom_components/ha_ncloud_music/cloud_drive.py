@@ -0,0 +1,134 @@
+"""
+云盘索引
+
+/user/cloud 按上传时间倒序分页返回，这里把全部分页缓存在内存中，
+建立 simpleSong id / songId 到云盘条目的索引。
+刷新时先只请求第一页：没有变化或只是新增了歌曲时增量更新，否则完整重建。
+"""
+
+import asyncio
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# 每页条数
+CLOUD_PAGE_SIZE = 500
+# 并发请求的分页数
+CLOUD_PAGE_CONCURRENCY = 4
+# 索引有效期（秒），过期后下次访问时刷新
+CLOUD_INDEX_TTL = 300
+
+
+class CloudDriveIndex:
+    """云盘索引（songId -> 云盘条目，simpleSong id -> songId）"""
+
+    def __init__(self, cloud_music):
+        self.cloud_music = cloud_music
+        self._lock = asyncio.Lock()
+        self.clear()
+        # 统计
+        self.full_refreshes = 0
+        self.incremental_refreshes = 0
+
+    def clear(self):
+        """清空索引（登录/退出时调用）"""
+        self._order = []        # songId 列表（与接口顺序一致）
+        self._entries = {}      # songId -> 云盘条目
+        self._by_simple_id = {} # simpleSong id -> songId
+        self._refreshed_at = None
+
+    async def _async_fetch_page(self, offset):
+        res = await self.cloud_music.netease_cloud_music(
+            f'/user/cloud?limit={CLOUD_PAGE_SIZE}&offset={offset}'
+        )
+        if res.get('code') != 200:
+            raise ValueError(f"code={res.get('code')}")
+        return res
+
+    def _add(self, items, prepend=False):
+        song_ids = []
+        for item in items:
+            song_id = str(item['songId'])
+            song_ids.append(song_id)
+            self._entries[song_id] = item
+            simple_song = item.get('simpleSong') or {}
+            if simple_song.get('id') is not None:
+                self._by_simple_id[str(simple_song['id'])] = song_id
+        if prepend:
+            self._order[:0] = song_ids
+        else:
+            self._order.extend(song_ids)
+
+    async def async_refresh(self, force=False):
+        """按需刷新索引（有效期内不请求上游）"""
+        async with self._lock:
+            if not force and self._refreshed_at is not None \
+                    and time.monotonic() - self._refreshed_at < CLOUD_INDEX_TTL:
+                return
+            if self.cloud_music.userinfo.get('uid') is None:
+                self.clear()
+                return
+
+            try:
+                first_page = await self._async_fetch_page(0)
+                count = first_page.get('count', 0)
+                items = first_page.get('data') or []
+
+                # 增量：第一页中已知的最新歌曲之前的都是新上传的
+                new_items = None
+                if self._order:
+                    for i, item in enumerate(items):
+                        if str(item['songId']) == self._order[0]:
+                            new_items = items[:i]
+                            break
+                if new_items is not None and len(self._order) + len(new_items) == count:
+                    self._add(new_items, prepend=True)
+                    self.incremental_refreshes += 1
+                    if new_items:
+                        _LOGGER.debug(f"云盘索引增量更新：新增 {len(new_items)} 首，共 {count} 首")
+                else:
+                    await self._async_rebuild(first_page)
+            except Exception as e:
+                _LOGGER.warning(f"刷新云盘索引失败: {e}")
+                return
+
+            self._refreshed_at = time.monotonic()
+
+    async def _async_rebuild(self, first_page):
+        """完整重建：第一页之后的分页并发获取"""
+        count = first_page.get('count', 0)
+        offsets = range(CLOUD_PAGE_SIZE, count, CLOUD_PAGE_SIZE)
+        semaphore = asyncio.Semaphore(CLOUD_PAGE_CONCURRENCY)
+
+        async def fetch(offset):
+            async with semaphore:
+                return await self._async_fetch_page(offset)
+
+        pages = await asyncio.gather(*(fetch(offset) for offset in offsets))
+        self.clear()
+        self._add(first_page.get('data') or [])
+        for page in pages:
+            self._add(page.get('data') or [])
+        self.full_refreshes += 1
+        _LOGGER.debug(f"云盘索引重建完成：共 {len(self._order)} 首")
+
+    async def async_get_items(self) -> list:
+        """全部云盘条目（上传时间倒序）"""
+        await self.async_refresh()
+        return [self._entries[song_id] for song_id in self._order]
+
+    async def async_get_song_id(self, id):
+        """simpleSong id 或 songId 对应的云盘 songId，不在云盘中返回 None"""
+        await self.async_refresh()
+        id = str(id)
+        if id in self._entries:
+            return id
+        return self._by_simple_id.get(id)
+
+    def stats(self):
+        return {
+            'size': len(self._order),
+            'full_refreshes': self.full_refreshes,
+            'incremental_refreshes': self.incremental_refreshes
+        }
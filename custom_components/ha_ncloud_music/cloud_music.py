@@ -1,11 +1,24 @@
-import uuid, time, logging, os, hashlib, aiohttp, requests, base64
+import uuid, time, logging, os, hashlib, aiohttp, requests, base64, asyncio, itertools
 from urllib.parse import quote
+from functools import partial
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE
+from homeassistant.core import callback
 from homeassistant.helpers.network import get_url
-from .http_api import http_get, http_cookie
+from .http_api import http_get, http_cookie, create_session
 from .models.music_info import MusicInfo, MusicSource
+from .cache import SingleFlight, TTLCache
+from .metadata_store import MetadataStore
+from .stream_cache import StreamUrlCache
+from .cloud_drive import CloudDriveIndex
+from .lyric import LyricTimeline
+from .persistence import create_store, async_load_store
+from .search import SearchService
+from .image_cache import CoverImageCache
+from .cover_registry import CoverRegistry
+from .quality import QualityResolver
+from .library import LibraryIndex
+from .const import DEFAULT_DEAD_SONG_PERIOD
 from homeassistant.helpers.storage import STORAGE_DIR
-from homeassistant.util.json import load_json
-from homeassistant.helpers.json import save_json
 from http.cookies import SimpleCookie
 
 from .browse_media import (
@@ -15,18 +28,133 @@ from .browse_media import (
     async_media_next_track
 )
 
+# 接口缓存策略：path -> (缓存秒数, 是否与登录用户相关)
+# 未列出的接口（登录、二维码、播放链接、私人 FM 等）一律不缓存
+API_CACHE_RULES = {
+    '/song/detail': (6 * 3600, False),
+    '/album': (6 * 3600, False),
+    '/artists': (6 * 3600, False),
+    '/artist/album': (6 * 3600, False),
+    '/artist/detail': (6 * 3600, False),
+    '/artist/top/song': (6 * 3600, False),
+    '/lyric/new': (24 * 3600, False),
+    '/dj/program': (1800, False),
+    '/toplist': (600, False),
+    '/playlist/detail': (600, True),
+    '/playlist/track/all': (600, True),
+    '/recommend/resource': (3600, True),
+    '/recommend/songs': (3600, True),
+    '/user/playlist': (300, True),
+    '/artist/sublist': (300, True),
+    '/dj/sublist': (300, True),
+}
+API_CACHE_SIZE = 512
+API_CACHE_TAG_USER = 'user'
+# 播放链接缓存来源：song_url 的解析结果
+STREAM_SOURCE_NETEASE = 'netease'
+# 批量获取播放链接：每批歌曲数 / 同时请求的批数（所有调用方共用） / 解灰并发数
+SONG_URL_BATCH_SIZE = 100
+SONG_URL_CONCURRENCY = 4
+UNBLOCK_CONCURRENCY = 4
+# 对冲模式：普通歌曲等待官方源的时间 / 官方源优先的总预算（秒）
+HEDGE_DELAY = 1.0
+HEDGE_OFFICIAL_BUDGET = 2.5
+# 解析方式记忆
+URL_PATH_OFFICIAL = 'official'
+URL_PATH_UNBLOCK = 'unblock'
+URL_PATH_MEMORY_SIZE = 2048
+URL_PATH_MEMORY_TTL = 7 * 24 * 3600
+# 解析后的歌词时间轴：缓存数量 / 有效期（秒）
+LYRIC_CACHE_SIZE = 128
+LYRIC_CACHE_TTL = 24 * 3600
+# 歌单分页大小
+PLAYLIST_PAGE_SIZE = 500
+# 用户信息：Store 键 / 合并写入的延迟（秒）
+USERINFO_STORAGE_KEY = 'ha_ncloud_music.userinfo'
+USERINFO_SAVE_DELAY = 2
+# 歌曲详情：每批ID数（约5.5KB，防止URL过长）/ 并发批数
+SONG_DETAIL_BATCH_SIZE = 500
+SONG_DETAIL_CONCURRENCY = 4
+# 无法播放歌曲记录的容量
+DEAD_SONG_CACHE_SIZE = 4096
+# 通过 song_url 解析的歌曲来源
+DEAD_SONG_SOURCES = (
+    MusicSource.PLAYLIST.value,
+    MusicSource.ARTISTS.value,
+    MusicSource.DJRADIO.value,
+    MusicSource.CLOUD.value,
+)
+
 def md5(data):
     return hashlib.md5(data.encode('utf-8')).hexdigest()
 
+
+def _is_full_official(data):
+    """官方接口返回了完整链接（不是试听片段）"""
+    return data.get('url') is not None and data.get('freeTrialInfo') is None
+
+
+def _is_unplayable(data, unblock_url):
+    """
+    无法播放：官方接口正常返回但没有完整链接（无链接或只能试听），且解灰失败
+
+    单曲、对冲、批量三种解析方式共用，官方接口异常（data 无 id）时不判定
+    """
+    return not unblock_url and data.get('id') is not None and not _is_full_official(data)
+
 _LOGGER = logging.getLogger(__name__)
 
 class CloudMusic():
 
-    def __init__(self, hass, url, vip_url, audio_quality='exhigh') -> None:
+    def __init__(self, hass, url, vip_url, audio_quality='exhigh', hedged_url_resolve=False,
+                 dead_song_period=DEFAULT_DEAD_SONG_PERIOD) -> None:
         self.hass = hass
         self.api_url = url.strip('/')
         self.vip_url = vip_url.strip('/')
         self.audio_quality = audio_quality
+        # HA 访问地址缓存（core 配置变更时失效）
+        self._base_url = None
+        self._unsub_core_config = hass.bus.async_listen(EVENT_CORE_CONFIG_UPDATE, self._on_core_config_update)
+        # 对冲模式：官方源与解灰并行竞速（可选）
+        self.hedged_url_resolve = hedged_url_resolve
+        # 长连接会话（所有上游请求共享，卸载时关闭）
+        self.session = create_session()
+        # 相同 URL 的并发请求合并
+        self._single_flight = SingleFlight()
+        # 接口响应缓存（按接口设置过期时间）
+        self._api_cache = TTLCache(API_CACHE_SIZE)
+        # 账号代次：登录 / 退出时加一，切换前发出的请求结果不再写入缓存、不与之后的请求合并
+        self._user_generation = 0
+        # 播放链接缓存（按签名链接的过期时间淘汰）
+        self.stream_cache = StreamUrlCache()
+        # 官方接口批量获取播放链接（批量播放链接、音质信息共用）：并发批数 / 请求批数
+        self._song_url_semaphore = asyncio.Semaphore(SONG_URL_CONCURRENCY)
+        self._song_url_batches = 0
+        # 每首歌上次成功的解析方式（official / unblock）
+        self._url_path_memory = TTLCache(URL_PATH_MEMORY_SIZE)
+        # 无法播放的歌曲（官方无完整链接且解灰失败），记录 dead_song_period 小时
+        self.dead_song_period = dead_song_period
+        self.dead_songs = TTLCache(DEAD_SONG_CACHE_SIZE)
+        # 无法播放的歌曲有增减时加一（播放器据此判断是否需要重新统计列表中的无法播放歌曲）
+        self.dead_songs_version = 0
+        # 云盘索引（全部分页，增量刷新）
+        self.cloud_index = CloudDriveIndex(self)
+        # 解析后的歌词时间轴
+        self._lyric_cache = TTLCache(LYRIC_CACHE_SIZE)
+        # 私人 FM 请求序号（并发请求的 URL 互不相同）
+        self._fm_request_seq = itertools.count()
+        # 多类型并发搜索
+        self.search = SearchService(self)
+        # 封面图片代理缓存（内存 + 磁盘）
+        self.cover_cache = CoverImageCache(self, self.get_storage_dir('cloud_music_covers'))
+        # 封面 ID -> picUrl（生成列表时登记，取封面时免去接口查询）
+        self.cover_registry = CoverRegistry(hass, self.get_storage_dir('cloud_music.cover_ids'))
+        # 歌曲实际音质（Subsonic / Jellyfin 列表使用）
+        self.quality = QualityResolver(self)
+        # 音乐库索引（喜欢的歌曲、关注的歌手、云盘，Subsonic 使用）
+        self.library = LibraryIndex(self)
+        # 封面/详情获取统计：总曲目、列表自带封面、元数据库命中、上游获取、上游请求次数
+        self._detail_stats = {'tracks': 0, 'from_response': 0, 'from_metadata': 0, 'fetched': 0, 'requests': 0}
 
         # 媒体资源
         self.async_browse_media = async_browse_media
@@ -35,9 +163,14 @@ class CloudMusic():
         self.async_media_next_track = async_media_next_track
 
         self.userinfo = {}
-        # 读取用户信息（延迟到第一次访问时加载，避免阻塞事件循环）
+        # 读取用户信息（延迟到第一次访问时加载，避免阻塞事件循环）；旧版本的文件首次加载时迁移
         self.userinfo_filepath = self.get_storage_dir('cloud_music.userinfo')
         self._userinfo_loaded = False
+        # 用户信息（Store 延迟合并写入）
+        self._userinfo_store = create_store(hass, USERINFO_STORAGE_KEY, private=True)
+        self._userinfo_save_pending = False
+        # 歌曲/专辑/歌手元数据（本地 SQLite，重启后仍可用）
+        self.metadata = MetadataStore(hass, self.get_storage_dir('cloud_music.metadata.db'))
         # 登录二维码
         self.login_qrcode = {
             'key': None,
@@ -45,6 +178,17 @@ class CloudMusic():
             'url': None
         }
 
+    async def async_close(self):
+        """释放资源（配置项卸载时调用）"""
+        self._unsub_core_config()
+        if self._userinfo_save_pending:
+            # 立即写入，避免重新加载配置项时读到旧的用户信息
+            await self._userinfo_store.async_save(self._userinfo_data())
+        await self.cover_registry.async_flush()
+        if not self.session.closed:
+            await self.session.close()
+        await self.metadata.async_close()
+
     def get_storage_dir(self, file_name):
         return os.path.abspath(f'{STORAGE_DIR}/{file_name}')
 
@@ -53,11 +197,35 @@ class CloudMusic():
         if self._userinfo_loaded:
             return
         self._userinfo_loaded = True
-        if os.path.exists(self.userinfo_filepath):
-            # 在后台线程执行文件读取
-            self.userinfo = await self.hass.async_add_executor_job(
-                load_json, self.userinfo_filepath
-            )
+        self.userinfo = await async_load_store(self.hass, self._userinfo_store, self.userinfo_filepath, {})
+
+    def save_userinfo(self):
+        """保存用户信息（延迟合并写入，不阻塞事件循环）"""
+        self._userinfo_save_pending = True
+        self._userinfo_store.async_delay_save(self._userinfo_data, USERINFO_SAVE_DELAY)
+
+    def _userinfo_data(self):
+        """Store 写入时取最新的用户信息"""
+        self._userinfo_save_pending = False
+        return dict(self.userinfo)
+
+    def _update_cookie(self, cookie, max_age=None):
+        """更新 Cookie 并记录刷新时间（max_age 为凭据有效秒数）"""
+        now = int(time.time())
+        self.userinfo['cookie'] = cookie
+        self.userinfo['cookie_updated_at'] = now
+        if max_age:
+            self.userinfo['cookie_expires_at'] = now + max_age
+        else:
+            self.userinfo.pop('cookie_expires_at', None)
+
+    def get_credential_info(self):
+        """凭据刷新时间与预计过期时间（Unix 时间戳）"""
+        return {
+            'logged_in': self.userinfo.get('uid') is not None,
+            'cookie_updated_at': self.userinfo.get('cookie_updated_at'),
+            'cookie_expires_at': self.userinfo.get('cookie_expires_at')
+        }
 
     def netease_image_url(self, url, size=200):
         return f'{url}?param={size}y{size}'
@@ -70,7 +238,7 @@ class CloudMusic():
         else:
             login_url = login_url + '/cellphone?phone='
 
-        data = await http_cookie(login_url + f'{quote(username)}&md5_password={md5(password)}')
+        data = await http_cookie(login_url + f'{quote(username)}&md5_password={md5(password)}', session=self.session)
         _LOGGER.debug(data)
         res_data = data.get('data', {})
         # 登录成功
@@ -79,10 +247,11 @@ class CloudMusic():
             uid = res_data['account']['id']
             cookie = data.get('cookie')
             self.userinfo = {
-                'uid': uid,
-                'cookie': cookie
+                'uid': uid
             }
-            save_json(self.userinfo_filepath, self.userinfo)
+            self._update_cookie(cookie)
+            self._reset_user_state()
+            self.save_userinfo()
             return res_data
 
     # 二维码登录
@@ -93,24 +262,44 @@ class CloudMusic():
         '''
         arr = cookie_str.split(';')
         cookie = {}
+        key = None
+        max_age = None
         for item in arr:
             x = item.strip()
+            # 登录凭据 MUSIC_U 的有效期
+            if x.startswith('Max-Age=') and key == 'MUSIC_U':
+                try:
+                    max_age = int(x[8:])
+                except ValueError:
+                    pass
             if x == '' or x.startswith('Max-Age=') or x.startswith('Expires=') \
                 or x.startswith('Path=') or x.startswith('HTTPOnly'):
                 continue
             kv = x.split('=')
+            key = kv[0]
             if kv[1] != '':
                 cookie[kv[0]] = kv[1]
 
         # 设置cookie
-        self.userinfo['cookie'] = cookie
+        self._update_cookie(cookie, max_age)
+        self._reset_user_state()
         res = await self.netease_cloud_music('/user/account')
         self.userinfo['uid'] = res['account']['id']
-        save_json(self.userinfo_filepath, self.userinfo)
+        self.save_userinfo()
+
+    def _reset_user_state(self):
+        """清除与登录账号相关的缓存和索引（登录 / 退出时调用）"""
+        self._user_generation += 1
+        self._api_cache.clear(API_CACHE_TAG_USER)
+        self.stream_cache.clear()
+        self.quality.clear()
+        self.cloud_index.clear()
+        self.library.clear()
 
     # 退出
     def logout(self):
         self.userinfo = {}
+        self._reset_user_state()
         self.login_qrcode = {
             'key': None,
             'time': None,
@@ -118,6 +307,26 @@ class CloudMusic():
         }
         self.notification('用户凭据失效，请重新登录。如果多次失败，请联系插件作者')
 
+    def get_stats(self):
+        """运行统计（请求合并等），通过诊断信息提供，不对外公开"""
+        return {
+            'single_flight': self._single_flight.stats(),
+            'api_cache': self._api_cache.stats(),
+            'metadata_store': self.metadata.stats(),
+            'stream_cache': self.stream_cache.stats(),
+            'dead_songs': self.dead_songs.stats(),
+            'song_detail': dict(self._detail_stats),
+            'song_url_batches': self._song_url_batches,
+            'cloud_index': self.cloud_index.stats(),
+            'lyric_cache': self._lyric_cache.stats(),
+            'search': self.search.stats(),
+            'cover_cache': self.cover_cache.stats(),
+            'cover_registry': self.cover_registry.stats(),
+            'quality': self.quality.stats(),
+            'library': self.library.stats(),
+            'credential': self.get_credential_info()
+        }
+
     def notification(self, message, notification_id='ha_ncloud_music'):
         self.hass.create_task(self.hass.services.async_call('persistent_notification', 'create', {
             'title': '云音乐',
@@ -125,21 +334,59 @@ class CloudMusic():
             'notification_id': notification_id
         }))
 
+    # HA 访问地址（缓存，网络配置变更时刷新）
+    def get_base_url(self):
+        if self._base_url is None:
+            self._base_url = get_url(self.hass, prefer_external=True)
+        return self._base_url
+
+    @callback
+    def _on_core_config_update(self, event):
+        self._base_url = None
+
     # 获取播放链接
     def get_play_url(self, id, song, singer, source):
-        base_url = get_url(self.hass, prefer_external=True)
+        base_url = self.get_base_url()
         if singer is None:
             singer = ''
         encoded_data = base64.b64encode(f'id={id}&song={quote(song)}&singer={quote(singer)}&source={source}'.encode('utf-8'))
         url_encoded_data = quote(encoded_data.decode('utf-8'), safe='-_')
         return f'{base_url}/cloud_music/url?data={url_encoded_data}'
 
+    # 延迟生成播放链接（首次访问 MusicInfo.url 时才计算）
+    def lazy_play_url(self, id, song, singer, source):
+        return partial(self.get_play_url, id, song, singer, source)
+
     # 云音乐接口
     async def netease_cloud_music(self, url):
+        """
+        请求网易云音乐接口（按 API_CACHE_RULES 缓存，相同 URL 的并发请求合并）
+
+        返回的字典是缓存中的同一个对象，会被合并请求的其他调用方和之后的缓存命中共享，
+        调用方必须只读使用；需要修改（排序、删除、改字段）时先复制，
+        例如 sorted(res['songs'], ...) 或 dict(item)
+        """
         # 确保 userinfo 已加载
         await self._ensure_userinfo_loaded()
-        res = await http_get(self.api_url + url, self.userinfo.get('cookie', {}))
+        rule = API_CACHE_RULES.get(url.split('?', 1)[0])
+        if rule is not None:
+            res = self._api_cache.get(url)
+            if res is not None:
+                return res
+        # 相同 URL 的并发 GET 只请求一次上游，共享解码后的结果（不同账号代次的请求不合并）
+        generation = self._user_generation
+        return await self._single_flight.do(
+            (generation, url), lambda: self._netease_request(url, rule, generation)
+        )
+
+    async def _netease_request(self, url, rule=None, generation=None):
+        res = await http_get(self.api_url + url, self.userinfo.get('cookie', {}), session=self.session)
         code = res.get('code')
+        if code == 200 and rule is not None:
+            ttl, user_scoped = rule
+            # 请求期间登录 / 退出过：旧账号的数据不写回缓存
+            if not (user_scoped and generation is not None and generation != self._user_generation):
+                self._api_cache.set(url, res, ttl, API_CACHE_TAG_USER if user_scoped else None)
         if code != 200 and code != 801:
             msg = res.get('msg')
             if msg is not None:
@@ -196,6 +443,27 @@ class CloudMusic():
         
         return {'yrc': '', 'lrc': '', 'tlyric': '', 'type': 'none'}
 
+    async def async_get_lyric_timeline(self, song_id) -> LyricTimeline:
+        """
+        获取解析后的歌词时间轴（LRC/YRC/翻译合并）
+
+        每首歌只解析一次，多个前端卡片同时请求时共享同一次获取和解析
+        """
+        song_id = str(song_id)
+        timeline = self._lyric_cache.get(song_id)
+        if timeline is not None:
+            return timeline
+
+        async def load():
+            lyric = await self.async_get_lyric(song_id)
+            timeline = LyricTimeline(lyric['lrc'], lyric['yrc'], lyric['tlyric'])
+            # 获取失败（type 为 none）时不缓存，下次重试
+            if lyric['type'] != 'none':
+                self._lyric_cache.set(song_id, timeline, LYRIC_CACHE_TTL)
+            return timeline
+
+        return await self._single_flight.do(('lyric_timeline', song_id), load)
+
     # 获取音乐链接（智能兜底模式）
     async def song_url(self, id, level=None):
         """
@@ -210,7 +478,30 @@ class CloudMusic():
         """
         # 使用传入的 level 或实例配置的 audio_quality
         _level = level or self.audio_quality
-        
+
+        # 0. 命中播放链接缓存（链接过期前有效）
+        cached = self.stream_cache.get(id, _level, STREAM_SOURCE_NETEASE)
+        if cached is not None:
+            return cached
+
+        # 已知无法播放的歌曲，不再重复请求官方源和解灰
+        if self.is_song_dead(id):
+            return None, 0
+
+        url, fee, expires_in = await self._resolve_song_url(id, _level)
+        self.stream_cache.set(id, _level, STREAM_SOURCE_NETEASE, url, (url, fee), expires_in)
+        return url, fee
+
+    async def _resolve_song_url(self, id, _level):
+        """
+        请求上游获取播放链接
+
+        Returns:
+            (url, fee, expires_in): expires_in 为官方接口返回的有效秒数，解灰链接为 None
+        """
+        if self.hedged_url_resolve:
+            return await self._resolve_song_url_hedged(id, _level)
+
         # 1. 先尝试官方源
         res = await self.netease_cloud_music(f'/song/url/v1?id={id}&level={_level}')
         data = res.get('data', [{}])[0]
@@ -219,12 +510,86 @@ class CloudMusic():
         fee = 0 if trial_info is None else 1
         
         # 2. 检测是否可用（有URL且不是试听片段）
-        if url is not None and trial_info is None:
-            return url, fee
+        if _is_full_official(data):
+            self._url_path_memory.set(str(id), URL_PATH_OFFICIAL, URL_PATH_MEMORY_TTL)
+            return url, fee, data.get('expi')
         
         # 3. 官方源不可用（无URL或试听片段），尝试解灰
-        # 音源锁定：pyncmd,bodian,kuwo（黄金三角，PoC测试最优解）
         _LOGGER.info(f"歌曲 {id} 需要解灰（试听限制或无URL），尝试解灰源")
+        unblock_url = await self._async_unblock_url(id)
+        if unblock_url:
+            self._url_path_memory.set(str(id), URL_PATH_UNBLOCK, URL_PATH_MEMORY_TTL)
+            return unblock_url, 0, None
+        
+        # 4. 解灰也失败，返回原始URL（可能是试听片段或None）
+        _LOGGER.warning(f"歌曲 {id} 解灰失败，使用原始URL")
+        # 官方接口正常返回时才记录，避免网络异常时误判
+        if _is_unplayable(data, unblock_url):
+            self.mark_song_dead(id)
+        return url, fee, data.get('expi')
+
+    async def _resolve_song_url_hedged(self, id, _level):
+        """
+        对冲模式：官方源与解灰并行竞速
+
+        - 上次走解灰的歌曲立即发起解灰，其他歌曲等待 HEDGE_DELAY 秒仍无可用官方链接时再发起
+        - 在 HEDGE_OFFICIAL_BUDGET 秒内拿到可用的官方链接时，优先使用官方链接
+        - 落后的请求不取消（可能与其他调用方合并），让其自然结束
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def official():
+            try:
+                res = await self.netease_cloud_music(f'/song/url/v1?id={id}&level={_level}')
+                return res.get('data', [{}])[0]
+            except Exception as e:
+                _LOGGER.warning(f"获取官方播放链接失败 (ID: {id}): {e}")
+                return {}
+
+        def official_result(data):
+            self._url_path_memory.set(str(id), URL_PATH_OFFICIAL, URL_PATH_MEMORY_TTL)
+            return data['url'], 0, data.get('expi')
+
+        official_task = asyncio.create_task(official())
+        if self._url_path_memory.get(str(id)) != URL_PATH_UNBLOCK:
+            await asyncio.wait({official_task}, timeout=HEDGE_DELAY)
+            if official_task.done() and _is_full_official(official_task.result()):
+                return official_result(official_task.result())
+
+        unblock_task = asyncio.create_task(self._async_unblock_url(id))
+        unblock_url = None
+        pending = {official_task, unblock_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if official_task in done and _is_full_official(official_task.result()):
+                return official_result(official_task.result())
+            if unblock_task in done:
+                unblock_url = unblock_task.result()
+                if unblock_url and official_task in pending:
+                    # 解灰先返回：预算内继续等待官方结果
+                    remaining = HEDGE_OFFICIAL_BUDGET - (loop.time() - start)
+                    if remaining > 0:
+                        await asyncio.wait({official_task}, timeout=remaining)
+                        if official_task.done() and _is_full_official(official_task.result()):
+                            return official_result(official_task.result())
+                    break
+
+        if unblock_url:
+            self._url_path_memory.set(str(id), URL_PATH_UNBLOCK, URL_PATH_MEMORY_TTL)
+            return unblock_url, 0, None
+
+        # 都不可用，返回官方原始结果（可能是试听片段或None）
+        data = official_task.result()
+        _LOGGER.warning(f"歌曲 {id} 解灰失败，使用原始URL")
+        if _is_unplayable(data, unblock_url):
+            self.mark_song_dead(id)
+        trial_info = data.get('freeTrialInfo')
+        return data.get('url'), 0 if trial_info is None else 1, data.get('expi')
+
+    async def _async_unblock_url(self, id):
+        """解灰：从第三方音源匹配播放链接，失败返回 None"""
+        # 音源锁定：pyncmd,bodian,kuwo（黄金三角，PoC测试最优解）
         try:
             res_unblock = await self.netease_cloud_music(
                 f'/song/url/match?id={id}&source=pyncmd,bodian,kuwo'
@@ -239,66 +604,274 @@ class CloudMusic():
                     source = unblock_data.get('source', 'unblock')
                     br = unblock_data.get('br', 0)
                     _LOGGER.info(f"歌曲 {id} 解灰成功，来源: {source}, 码率: {br//1000}k")
-                    return unblock_url, 0
+                    return unblock_url
         except Exception as e:
             _LOGGER.warning(f"解灰失败 (ID: {id}): {e}")
-        
-        # 4. 解灰也失败，返回原始URL（可能是试听片段或None）
-        _LOGGER.warning(f"歌曲 {id} 解灰失败，使用原始URL")
-        return url, fee
+
+    async def async_fetch_official_urls(self, ids, level) -> dict:
+        """
+        官方接口批量获取播放链接（/song/url/v1 按 SONG_URL_BATCH_SIZE 分批）
+
+        async_song_urls 与音质信息共用，同时请求的批数全局限制为 SONG_URL_CONCURRENCY，
+        返回的数据同时写入音质缓存。
+
+        Returns:
+            {str(id): 官方接口原始数据}，接口未返回的歌曲为空字典，请求失败的批次不在结果中
+        """
+        all_ids = list(dict.fromkeys(str(i) for i in ids if i is not None))
+        generation = self._user_generation
+        results = {}
+
+        async def fetch_batch(batch_ids):
+            try:
+                async with self._song_url_semaphore:
+                    self._song_url_batches += 1
+                    res = await self.netease_cloud_music(f'/song/url/v1?id={",".join(batch_ids)}&level={level}')
+            except Exception as e:
+                _LOGGER.warning(f"批量获取播放链接失败: {e}")
+                return
+            if not res or res.get('code') != 200:
+                return
+            for song_id in batch_ids:
+                results[song_id] = {}
+            for data in res.get('data') or []:
+                results[str(data.get('id'))] = data
+
+        await asyncio.gather(*(
+            fetch_batch(all_ids[i:i + SONG_URL_BATCH_SIZE])
+            for i in range(0, len(all_ids), SONG_URL_BATCH_SIZE)
+        ))
+        if generation == self._user_generation:
+            # 请求期间切换了账号时不写入（音质权限随账号变化）
+            self.quality.record(results, level)
+        return results
+
+    # 批量获取音乐链接
+    async def async_song_urls(self, ids, level=None) -> dict:
+        """
+        批量获取歌曲URL（官方接口按 SONG_URL_BATCH_SIZE 分批，需要解灰的再限并发逐首解灰）
+
+        结果同时写入播放链接缓存，之后 song_url 可直接命中
+
+        Returns:
+            {str(id): {
+                'url': str,          # 播放链接（可能为 None）
+                'fee': int,          # 0免费/1收费（试听）
+                'trial_info': dict,  # 官方接口的 freeTrialInfo
+                'source': str,       # 'official' | 'unblock' | None
+                'data': dict         # 官方接口原始数据（含 br/sr/type 等音质信息）
+            }}
+        """
+        _level = level or self.audio_quality
+        all_ids = list(dict.fromkeys(str(i) for i in ids))
+        results = {}
+
+        # 1. 官方源分批请求
+        for song_id, data in (await self.async_fetch_official_urls(all_ids, _level)).items():
+            trial_info = data.get('freeTrialInfo')
+            url = data.get('url')
+            results[song_id] = {
+                'url': url,
+                'fee': 0 if trial_info is None else 1,
+                'trial_info': trial_info,
+                'source': 'official' if url else None,
+                'data': data
+            }
+
+        # 2. 无URL或只能试听的歌曲，限并发解灰
+        semaphore = asyncio.Semaphore(UNBLOCK_CONCURRENCY)
+
+        async def unblock(song_id):
+            async with semaphore:
+                unblock_url = await self._async_unblock_url(song_id)
+            if unblock_url:
+                item = results.setdefault(song_id, {'trial_info': None, 'data': {}})
+                item.update({'url': unblock_url, 'fee': 0, 'source': 'unblock'})
+
+        pending = [song_id for song_id in all_ids
+                   if results.get(song_id, {}).get('url') is None or results[song_id]['trial_info'] is not None]
+        if pending:
+            _LOGGER.info(f"批量获取播放链接：{len(pending)}/{len(all_ids)} 首需要解灰")
+            await asyncio.gather(*(unblock(song_id) for song_id in pending))
+
+        # 3. 写入播放链接缓存（与 song_url 的结果一致）
+        for song_id in all_ids:
+            item = results.setdefault(song_id, {
+                'url': None, 'fee': 0, 'trial_info': None, 'source': None, 'data': {}
+            })
+            expires_in = item['data'].get('expi') if item['source'] == 'official' else None
+            self.stream_cache.set(song_id, _level, STREAM_SOURCE_NETEASE, item['url'], (item['url'], item['fee']), expires_in)
+            # 与 song_url 的判定一致：只能试听且解灰失败的歌曲同样记为无法播放
+            if _is_unplayable(item['data'], item['url'] if item['source'] == 'unblock' else None):
+                self.mark_song_dead(song_id)
+
+        return results
+
+    # ==================== 无法播放的歌曲 ====================
+
+    def mark_song_dead(self, id):
+        """记录无法播放的歌曲（dead_song_period 为 0 时不记录）"""
+        if self.dead_song_period > 0:
+            if str(id) not in self.dead_songs:
+                self.dead_songs_version += 1
+            self.dead_songs.set(str(id), int(time.time()), self.dead_song_period * 3600)
+
+    def mark_song_alive(self, id):
+        """通过其他途径（VIP接口、云盘、第三方音源）找到了播放链接"""
+        if self.dead_songs.pop(str(id)) is not None:
+            self.dead_songs_version += 1
+
+    def is_song_dead(self, id) -> bool:
+        return str(id) in self.dead_songs
+
+    def is_music_dead(self, music_info) -> bool:
+        """播放列表中的歌曲是否已知无法播放（仅网易云来源）"""
+        return music_info.source in DEAD_SONG_SOURCES and str(music_info.id) in self.dead_songs
 
     # 获取云盘音乐链接
     async def cloud_song_url(self, id):
         if self.userinfo.get('uid') is not None:
-            res = await self.netease_cloud_music(f'/user/cloud')
-            filter_list = list(filter(lambda x:x['simpleSong']['id'] == id, res['data']))
-            if len(filter_list) > 0:
-                songId = filter_list[0]['songId']
+            songId = await self.cloud_index.async_get_song_id(id)
+            if songId is not None:
                 url, fee = await self.song_url(songId)
                 return url
 
     # 获取歌单列表
     async def async_get_playlist(self, playlist_id):
-        res = await self.netease_cloud_music(f'/playlist/track/all?id={playlist_id}&limit=1000')
+        playlist = []
+        async for page in self.async_iter_playlist(playlist_id):
+            playlist.extend(page)
+        return playlist
 
+    # 分页获取歌单（异步生成器，每次产出一页）
+    async def async_iter_playlist(self, playlist_id, page_size=PLAYLIST_PAGE_SIZE):
+        """
+        按 offset 分页请求 /playlist/track/all，不受单次 1000 首的限制
+
+        调用方拿到第一页即可开始播放，剩余分页在后台继续迭代
+        """
         def format_playlist(item):
             id = item['id']
             song = item['name']
             singer = item['ar'][0].get('name', '')
             album = item['al']['name']
             duration = item['dt']
-            url = self.get_play_url(id, song, singer, MusicSource.PLAYLIST.value)
+            url = self.lazy_play_url(id, song, singer, MusicSource.PLAYLIST.value)
             picUrl = item['al'].get('picUrl', 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
             music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.PLAYLIST.value)
             return music_info
 
-        return list(map(format_playlist, res['songs']))
+        offset = 0
+        while True:
+            res = await self.netease_cloud_music(f'/playlist/track/all?id={playlist_id}&limit={page_size}&offset={offset}')
+            songs = res.get('songs') or []
+            if songs:
+                music_list = list(map(format_playlist, songs))
+                self.cover_registry.record_songs(music_list)
+                yield music_list
+            if len(songs) < page_size:
+                break
+            offset += page_size
+
+    # 批量获取歌曲详情（优先读取本地元数据库）
+    async def async_get_song_details(self, ids) -> dict:
+        """
+        批量获取歌曲详情
+
+        先查本地元数据库，未命中的再分批请求 /song/detail 并写回数据库
+
+        Returns:
+            {str(id): song}
+        """
+        all_song_ids = [str(i) for i in ids]
+        song_details = await self.metadata.async_get_songs(all_song_ids)
+        missing_ids = [i for i in all_song_ids if i not in song_details]
+        self._detail_stats['from_metadata'] += len(song_details)
+
+        # 使用分批策略防止URL过长（414错误），各批并发请求
+        semaphore = asyncio.Semaphore(SONG_DETAIL_CONCURRENCY)
+
+        async def fetch_batch(i):
+            batch_ids = missing_ids[i:i + SONG_DETAIL_BATCH_SIZE]
+            ids_str = ','.join(batch_ids)
+
+            try:
+                async with semaphore:
+                    detail_res = await self.netease_cloud_music(f'/song/detail?ids={ids_str}')
+                self._detail_stats['requests'] += 1
+                if detail_res and 'songs' in detail_res:
+                    await self.metadata.async_put_songs(detail_res['songs'])
+                    self._detail_stats['fetched'] += len(detail_res['songs'])
+                    for song in detail_res['songs']:
+                        song_details[str(song['id'])] = song
+            except Exception as e:
+                _LOGGER.warning(f"Failed to fetch song details for batch {i}: {e}")
+
+        await asyncio.gather(*(fetch_batch(i) for i in range(0, len(missing_ids), SONG_DETAIL_BATCH_SIZE)))
+
+        return song_details
+
+    async def async_get_cover_urls(self, songs) -> dict:
+        """
+        获取歌曲列表的专辑封面
+
+        列表数据中已有 al.picUrl 的直接使用，其余再查歌曲详情（本地元数据库 / 上游）
+
+        Returns:
+            {str(id): picUrl}
+        """
+        covers = {}
+        missing_ids = []
+        for item in songs:
+            pic_url = (item.get('al') or {}).get('picUrl')
+            if pic_url:
+                covers[str(item['id'])] = pic_url
+            else:
+                missing_ids.append(item['id'])
+        self._detail_stats['tracks'] += len(songs)
+        self._detail_stats['from_response'] += len(covers)
+
+        if missing_ids:
+            song_details = await self.async_get_song_details(missing_ids)
+            for song_id, detail in song_details.items():
+                pic_url = (detail.get('al') or {}).get('picUrl')
+                if pic_url:
+                    covers[song_id] = pic_url
+        _LOGGER.debug(f"获取封面：{len(songs)} 首，列表自带 {len(songs) - len(missing_ids)} 首，查询详情 {len(missing_ids)} 首")
+        return covers
+
+    # 获取专辑数据（优先读取本地元数据库）
+    async def async_get_album_data(self, album_id) -> dict:
+        """
+        获取 /album 接口数据（album + songs）
+
+        专辑曲目基本不变，命中本地元数据库时不请求上游
+        """
+        data = await self.metadata.async_get_album(album_id)
+        if data is not None:
+            return data
+
+        res = await self.netease_cloud_music(f'/album?id={album_id}')
+        if res.get('code') == 200 and res.get('album'):
+            data = {
+                'code': 200,
+                'album': res['album'],
+                'songs': res.get('songs', [])
+            }
+            await self.metadata.async_put_album(album_id, data)
+            return data
+        return res
 
     # 获取专辑列表
     async def async_get_album(self, album_id):
-        res = await self.netease_cloud_music(f'/album?id={album_id}')
+        res = await self.async_get_album_data(album_id)
         songs = res.get('songs', [])
         
         if not songs:
             return []
         
-        # 批量获取歌曲详情以获取准确的封面
-        # 使用分批策略防止URL过长（414错误）
-        BATCH_SIZE = 500  # 每批500个ID，约5.5KB，安全范围内
-        song_details = {}
-        all_song_ids = [str(song['id']) for song in songs]
-        
-        for i in range(0, len(all_song_ids), BATCH_SIZE):
-            batch_ids = all_song_ids[i:i + BATCH_SIZE]
-            ids_str = ','.join(batch_ids)
-            
-            try:
-                detail_res = await self.netease_cloud_music(f'/song/detail?ids={ids_str}')
-                if detail_res and 'songs' in detail_res:
-                    for song in detail_res['songs']:
-                        song_details[song['id']] = song
-            except Exception as e:
-                _LOGGER.warning(f"Failed to fetch album cover details for batch {i}: {e}")
+        # 获取准确的封面（列表自带封面的不再查询详情）
+        covers = await self.async_get_cover_urls(songs)
         
         def format_album(item):
             id = item['id']
@@ -306,11 +879,9 @@ class CloudMusic():
             singer = item['ar'][0].get('name', '') if item.get('ar') else '未知歌手'
             album = item['al']['name'] if item.get('al') else ''
             duration = item['dt']
-            url = self.get_play_url(id, song, singer, MusicSource.PLAYLIST.value)
+            url = self.lazy_play_url(id, song, singer, MusicSource.PLAYLIST.value)
             
-            # 从详情中获取准确的封面
-            detail = song_details.get(id, {})
-            picUrl = detail.get('al', {}).get('picUrl', 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
+            picUrl = covers.get(str(id), 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
             
             music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.PLAYLIST.value)
             return music_info
@@ -328,7 +899,7 @@ class CloudMusic():
             singer = mainSong['artists'][0]['name']
             album = item['dj']['brand']
             duration = mainSong['duration']
-            url = self.get_play_url(id, song, singer, MusicSource.DJRADIO.value)
+            url = self.lazy_play_url(id, song, singer, MusicSource.DJRADIO.value)
             picUrl = item['coverUrl']
             music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.DJRADIO.value)
             return music_info
@@ -343,23 +914,8 @@ class CloudMusic():
         if not hot_songs:
             return []
         
-        # 批量获取歌曲详情以获取准确的封面
-        # 使用分批策略防止URL过长（414错误）
-        BATCH_SIZE = 500
-        song_details = {}
-        all_song_ids = [str(song['id']) for song in hot_songs]
-        
-        for i in range(0, len(all_song_ids), BATCH_SIZE):
-            batch_ids = all_song_ids[i:i + BATCH_SIZE]
-            ids_str = ','.join(batch_ids)
-            
-            try:
-                detail_res = await self.netease_cloud_music(f'/song/detail?ids={ids_str}')
-                if detail_res and 'songs' in detail_res:
-                    for song in detail_res['songs']:
-                        song_details[song['id']] = song
-            except Exception as e:
-                _LOGGER.warning(f"Failed to fetch artist cover details for batch {i}: {e}")
+        # 获取准确的封面（列表自带封面的不再查询详情）
+        covers = await self.async_get_cover_urls(hot_songs)
 
         def format_playlist(item):
             id = item['id']
@@ -367,11 +923,9 @@ class CloudMusic():
             singer = item['ar'][0]['name']
             album = item['al']['name']
             duration = item['dt']
-            url = self.get_play_url(id, song, singer, MusicSource.ARTISTS.value)
+            url = self.lazy_play_url(id, song, singer, MusicSource.ARTISTS.value)
             
-            # 从详情中获取准确的封面
-            detail = song_details.get(id, {})
-            picUrl = detail.get('al', {}).get('picUrl', 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
+            picUrl = covers.get(str(id), 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
             
             music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.ARTISTS.value)
             return music_info
@@ -380,7 +934,7 @@ class CloudMusic():
 
     # 获取云盘音乐
     async def async_get_cloud(self):
-        res = await self.netease_cloud_music('/user/cloud')
+        items = await self.cloud_index.async_get_items()
         def format_playlist(item):
             id = item['songId']
             song = ''
@@ -404,11 +958,11 @@ class CloudMusic():
             if singer is None:
                 singer = ''
 
-            url = self.get_play_url(id, song, singer, MusicSource.CLOUD.value)
+            url = self.lazy_play_url(id, song, singer, MusicSource.CLOUD.value)
             music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.CLOUD.value)
             return music_info
 
-        return list(map(format_playlist, res['data']))
+        return list(map(format_playlist, items))
 
     # 获取每日推荐歌曲
     async def async_get_dailySongs(self):
@@ -419,12 +973,14 @@ class CloudMusic():
             singer = item['ar'][0]['name']
             album = item['al']['name'] 
             duration = item['dt']
-            url = self.get_play_url(id, song, singer, MusicSource.PLAYLIST.value)
+            url = self.lazy_play_url(id, song, singer, MusicSource.PLAYLIST.value)
             picUrl = item['al'].get('picUrl', 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
             music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.PLAYLIST.value)
             return music_info
 
-        return list(map(format_playlist, res['data']['dailySongs']))
+        music_list = list(map(format_playlist, res['data']['dailySongs']))
+        self.cover_registry.record_songs(music_list)
+        return music_list
 
     # 获取我喜欢的音乐
     async def async_get_ilinkSongs(self):
@@ -445,36 +1001,35 @@ class CloudMusic():
             }
 
         headers = self.letingtoutiao['headers']
-        async with aiohttp.ClientSession() as session:
-            # 获取token
-            if headers['token'] == '' or now > self.letingtoutiao['time']:
-                async with session.get('https://app.leting.io/app/auth?uid=' + 
-                    uid + '&appid=a435325b8662a4098f615a7d067fe7b8&ts=1628297581496&sign=4149682cf40c2bf2efcec8155c48b627&v=v9&channel=huawei', 
-                    headers=headers) as res:
-                    r = await res.json()
-                    token = r['data']['token']
-                    headers['token'] = token
-                    # 保存时间（10分钟重新获取token）
-                    self.letingtoutiao['time'] = now + 60 * 10
-                    self.letingtoutiao['headers']['token'] = token
-
-            # 获取播放列表
-            async with session.get('https://app.leting.io/app/url/channel?catalog_id=' + 
-                catalog_id + '&size=100&distinct=1&v=v8&channel=xiaomi', headers=headers) as res:
+        # 获取token
+        if headers['token'] == '' or now > self.letingtoutiao['time']:
+            async with self.session.get('https://app.leting.io/app/auth?uid=' + 
+                uid + '&appid=a435325b8662a4098f615a7d067fe7b8&ts=1628297581496&sign=4149682cf40c2bf2efcec8155c48b627&v=v9&channel=huawei', 
+                headers=headers) as res:
                 r = await res.json()
+                token = r['data']['token']
+                headers['token'] = token
+                # 保存时间（10分钟重新获取token）
+                self.letingtoutiao['time'] = now + 60 * 10
+                self.letingtoutiao['headers']['token'] = token
 
-                def format_playlist(item):
-                    id = item['sid']
-                    song = item['title']
-                    singer = item['source']
-                    album = item['catalog_name']
-                    duration = item['duration']
-                    url = item['audio']
-                    picUrl = item['source_icon']
-                    music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.URL.value)
-                    return music_info
+        # 获取播放列表
+        async with self.session.get('https://app.leting.io/app/url/channel?catalog_id=' + 
+            catalog_id + '&size=100&distinct=1&v=v8&channel=xiaomi', headers=headers) as res:
+            r = await res.json()
+
+            def format_playlist(item):
+                id = item['sid']
+                song = item['title']
+                singer = item['source']
+                album = item['catalog_name']
+                duration = item['duration']
+                url = item['audio']
+                picUrl = item['source_icon']
+                music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.URL.value)
+                return music_info
 
-                return list(map(format_playlist, r['data']['data']))
+            return list(map(format_playlist, r['data']['data']))
 
     # 喜马拉雅
     async def async_xmly_playlist(self, id, page=1, size=50, asc=1):
@@ -482,7 +1037,7 @@ class CloudMusic():
             page = 1
         isAsc = 'true' if asc != 1 else 'false'
         url = f'https://mobile.ximalaya.com/mobile/v1/album/track?albumId={id}&isAsc={isAsc}&pageId={page}&pageSize={size}'
-        result = await http_get(url)
+        result = await http_get(url, session=self.session)
         if result['ret'] == 0:
             _list = result['data']['list']
             _totalCount = result['data']['totalCount']
@@ -490,7 +1045,7 @@ class CloudMusic():
                 # 获取专辑名称
                 trackId = _list[0]['trackId']
                 url = f'http://mobile.ximalaya.com/v1/track/baseInfo?trackId={trackId}'
-                album_result = await http_get(url)
+                album_result = await http_get(url, session=self.session)
                 # 格式化列表
                 def format_playlist(item):
                     id = item['trackId']
@@ -507,7 +1062,7 @@ class CloudMusic():
 
     # FM
     async def async_fm_playlist(self, id, page=1, size=100):
-        result = await http_get(f'https://rapi.qingting.fm/categories/{id}/channels?with_total=true&page={page}&pagesize={size}')
+        result = await http_get(f'https://rapi.qingting.fm/categories/{id}/channels?with_total=true&page={page}&pagesize={size}', session=self.session)
         data = result['Data']
         # 格式化列表
         def format_playlist(item):
@@ -553,7 +1108,7 @@ class CloudMusic():
                 picUrl = self.netease_image_url(al.get('picUrl'))
                 duration = item.get('dt')
 
-                url = self.get_play_url(id, song, singer, MusicSource.PLAYLIST.value)
+                url = self.lazy_play_url(id, song, singer, MusicSource.PLAYLIST.value)
                 
                 music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.URL.value)
                 return [ music_info ]
@@ -627,7 +1182,7 @@ class CloudMusic():
     async def async_search_xmly(self, name):
         _list = []
         url = f'https://m.ximalaya.com/m-revision/page/search?kw={name}&core=all&page=1&rows=5'
-        res = await http_get(url)
+        res = await http_get(url, session=self.session)
         if res['ret'] == 0:
             result = res['data']['albumViews']
             if result['total'] > 0:
@@ -660,7 +1215,7 @@ class CloudMusic():
         keyword = f'{singer} {song}'.strip()
         _LOGGER.debug(keyword)
         try:
-            res = await http_get(f'{self.vip_url}?k={keyword}')
+            res = await http_get(f'{self.vip_url}?k={keyword}', session=self.session)
             album = res.get('album', '')
             songId = res['id']
             song = res['song']
@@ -682,6 +1237,36 @@ class CloudMusic():
         """
         return await self.async_get_personal_fm_mode("DEFAULT")
 
+    def _format_fm_song(self, item):
+        """私人 FM 接口返回的歌曲格式化为 MusicInfo"""
+        id = item['id']
+        song = item['name']
+        artists = item.get('artists', [])
+        singer = artists[0].get('name', '未知歌手') if artists else '未知歌手'
+        album_info = item.get('album', {})
+        album = album_info.get('name', '')
+        picUrl = album_info.get('picUrl', 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
+        duration = item.get('duration', 0)
+        url = self.lazy_play_url(id, song, singer, MusicSource.PLAYLIST.value)
+        return MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.PLAYLIST.value)
+
+    async def async_fetch_personal_fm(self, mode: str, submode: str = None) -> list:
+        """
+        请求一次私人 FM（约3首，可能与之前返回的重复）
+
+        Returns:
+            MusicInfo 列表，失败时为空列表
+        """
+        # 时间戳 + 序号绕过缓存，保证并发请求不会被合并为同一个
+        url = f'/personal/fm/mode?mode={mode}&timestamp={int(time.time() * 1000)}&seq={next(self._fm_request_seq)}'
+        if submode:
+            url += f'&submode={submode}'
+        res = await self.netease_cloud_music(url)
+        if res.get('code') != 200:
+            _LOGGER.warning(f"获取私人 FM 失败: {res}")
+            return []
+        return [self._format_fm_song(item) for item in res.get('data') or []]
+
     async def async_get_personal_fm_mode(self, mode: str, submode: str = None, count: int = 3) -> list:
         """
         按模式获取私人 FM 歌曲
@@ -689,62 +1274,31 @@ class CloudMusic():
         Args:
             mode: FM 模式 (DEFAULT, aidj, FAMILIAR, EXPLORE, SCENE_RCMD)
             submode: 场景子模式 (EXERCISE, FOCUS, NIGHT_EMO)，仅当 mode=SCENE_RCMD 时有效
-            count: 期望获取的歌曲数量（默认3首，如需更多会多次调用API）
+            count: 期望获取的歌曲数量（默认3首，如需更多会并发调用API）
         
         Returns:
             MusicInfo 列表
         """
         try:
-            import time
-            # 构建 API URL（添加时间戳绕过缓存）
-            timestamp = int(time.time() * 1000)  # 毫秒级时间戳
-            url = f'/personal/fm/mode?mode={mode}&timestamp={timestamp}'
-            if submode:
-                url += f'&submode={submode}'
-            
-            # 格式化为 MusicInfo
-            def format_fm_song(item):
-                id = item['id']
-                song = item['name']
-                artists = item.get('artists', [])
-                singer = artists[0].get('name', '未知歌手') if artists else '未知歌手'
-                album_info = item.get('album', {})
-                album = album_info.get('name', '')
-                picUrl = album_info.get('picUrl', 'https://p2.music.126.net/fL9ORyu0e777lppGU3D89A==/109951167206009876.jpg')
-                duration = item.get('duration', 0)
-                url = self.get_play_url(id, song, singer, MusicSource.PLAYLIST.value)
-                music_info = MusicInfo(id, song, singer, album, duration, url, picUrl, MusicSource.PLAYLIST.value)
-                return music_info
-            
+            # API 每次返回约3首，需要的次数一次并发请求
+            attempts = max(-(-count // 3), 1)
+            results = await asyncio.gather(
+                *(self.async_fetch_personal_fm(mode, submode) for _ in range(attempts)),
+                return_exceptions=True
+            )
+
             # 收集歌曲（去重）
             result = []
             seen_ids = set()
-            max_attempts = max(count // 3 + 1, 2)  # API 每次返回约3首
-            
-            for attempt in range(max_attempts):
-                if len(result) >= count:
-                    break
-                    
-                res = await self.netease_cloud_music(url)
-                
-                if res.get('code') != 200:
-                    _LOGGER.warning(f"获取私人 FM 失败: {res}")
-                    break
-                
-                songs = res.get('data', [])
-                new_count = 0
-                for song in songs:
-                    song_id = song['id']
-                    if song_id not in seen_ids:
-                        seen_ids.add(song_id)
-                        result.append(format_fm_song(song))
-                        new_count += 1
-                
-                # 如果没有获取到新歌，停止尝试（API 返回了相同的歌曲）
-                if new_count == 0:
-                    _LOGGER.debug(f"FM API 第 {attempt+1} 次调用没有返回新歌，停止")
-                    break
-            
+            for songs in results:
+                if isinstance(songs, Exception):
+                    _LOGGER.warning(f"获取私人 FM 失败: {songs}")
+                    continue
+                for music_info in songs:
+                    if music_info.id not in seen_ids:
+                        seen_ids.add(music_info.id)
+                        result.append(music_info)
+
             _LOGGER.info(f"私人 FM ({mode}/{submode}) 获取到 {len(result)} 首歌曲")
             return result
             
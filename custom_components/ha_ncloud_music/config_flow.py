@@ -99,6 +99,14 @@ class OptionsFlowHandler(OptionsFlow):
         from .const import CONF_NEXT_TRACK_TIMING, DEFAULT_NEXT_TRACK_TIMING
         current_timing = options.get(CONF_NEXT_TRACK_TIMING, DEFAULT_NEXT_TRACK_TIMING)
         
+        # 对冲解析播放链接
+        from .const import CONF_HEDGED_URL_RESOLVE, DEFAULT_HEDGED_URL_RESOLVE
+        current_hedged = options.get(CONF_HEDGED_URL_RESOLVE, DEFAULT_HEDGED_URL_RESOLVE)
+        
+        # 无法播放歌曲的记录时长
+        from .const import CONF_DEAD_SONG_PERIOD, DEFAULT_DEAD_SONG_PERIOD
+        current_dead_period = options.get(CONF_DEAD_SONG_PERIOD, DEFAULT_DEAD_SONG_PERIOD)
+        
         # 默认播放器选项（从已配置的云音乐播放器中选择）
         from .const import CONF_DEFAULT_PLAYER
         current_default_player = options.get(CONF_DEFAULT_PLAYER, "")
@@ -147,6 +155,18 @@ class OptionsFlowHandler(OptionsFlow):
                     "mode": "box"
                 }
             }),
+            vol.Optional(CONF_HEDGED_URL_RESOLVE, default=current_hedged): selector({
+                "boolean": {}
+            }),
+            vol.Optional(CONF_DEAD_SONG_PERIOD, default=current_dead_period): selector({
+                "number": {
+                    "min": 0,
+                    "max": 168,
+                    "step": 1,
+                    "unit_of_measurement": "h",
+                    "mode": "box"
+                }
+            }),
             vol.Optional(CONF_URL, default=options.get(CONF_URL, '')): str
         })
         
@@ -80,6 +80,14 @@ AUDIO_QUALITY_OPTIONS = {
 CONF_NEXT_TRACK_TIMING = "next_track_timing"
 DEFAULT_NEXT_TRACK_TIMING = 0.0
 
+# 对冲解析播放链接：官方源与解灰并行竞速（默认关闭）
+CONF_HEDGED_URL_RESOLVE = "hedged_url_resolve"
+DEFAULT_HEDGED_URL_RESOLVE = False
+
+# 无法播放歌曲的记录时长（小时），期间切歌直接跳过；0 表示不记录
+CONF_DEAD_SONG_PERIOD = "dead_song_period"
+DEFAULT_DEAD_SONG_PERIOD = 6
+
 # ==================== 私人 FM 相关 ====================
 # FM 模式映射：显示名称 -> (mode, submode)
 FM_MODES = {
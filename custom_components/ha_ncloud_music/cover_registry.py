@@ -0,0 +1,172 @@
+"""
+封面 ID 登记表
+
+Subsonic / Jellyfin 列表里的封面 ID（s_歌曲、al_专辑、p_歌单）在生成列表时
+就已经知道对应的 picUrl，这里把 封面 ID -> picUrl 记下来，getCoverArt /
+GET_IMAGE 直接查表，未命中时才回退到接口查询。
+
+容量有上限（LRU），并通过 Store 延迟写入 .storage/，重启后仍可用。
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+
+from homeassistant.core import callback
+
+from .persistence import create_store, async_load_store
+
+_LOGGER = logging.getLogger(__name__)
+
+# 最多登记的封面数
+COVER_REGISTRY_SIZE = 10000
+# Store 键
+COVER_REGISTRY_STORAGE_KEY = 'ha_ncloud_music.cover_ids'
+# 合并写入的延迟（秒），浏览列表时会连续登记大量封面：从第一次变化开始计时，之后的变化一并写入
+COVER_REGISTRY_SAVE_DELAY = 30
+
+
+class CoverRegistry:
+    """封面 ID -> picUrl"""
+
+    def __init__(self, hass, legacy_filepath, maxsize=COVER_REGISTRY_SIZE):
+        self.hass = hass
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._store = create_store(hass, COVER_REGISTRY_STORAGE_KEY)
+        # 旧版本直接写入的 JSON 文件，首次加载时迁移
+        self._legacy_filepath = legacy_filepath
+        self._save_pending = False
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._load_task = None
+        # 统计
+        self.hits = 0
+        self.misses = 0
+
+    def _record(self, cover_id, pic_url) -> bool:
+        """登记一条（不保存），返回是否有变化"""
+        if not cover_id or not pic_url:
+            return False
+        if self._items.get(cover_id) == pic_url:
+            self._items.move_to_end(cover_id)
+            return False
+        self._items[cover_id] = pic_url
+        self._items.move_to_end(cover_id)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return True
+
+    @callback
+    def _async_changed(self):
+        """一批登记完成后安排一次保存"""
+        if self._loaded:
+            self._async_schedule_save()
+        elif self._load_task is None:
+            # 先加载文件中的旧数据再保存，避免覆盖
+            self._load_task = self.hass.async_create_task(self._async_ensure_loaded())
+
+    @callback
+    def record(self, cover_id, pic_url):
+        """登记封面（在事件循环中调用）"""
+        if self._record(cover_id, pic_url):
+            self._async_changed()
+
+    @callback
+    def _async_schedule_save(self):
+        # 已安排的保存会写入之后的变化，不再推迟（持续登记时也能按时写入）
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data, COVER_REGISTRY_SAVE_DELAY)
+
+    def _data(self):
+        """Store 写入时取最新的登记表"""
+        self._save_pending = False
+        return list(self._items.items())
+
+    @callback
+    def record_songs(self, music_list):
+        """登记 MusicInfo 列表的歌曲封面"""
+        changed = False
+        for music_info in music_list:
+            changed |= self._record(f's_{music_info.id}', music_info.picUrl)
+        if changed:
+            self._async_changed()
+
+    @callback
+    def record_api_songs(self, songs):
+        """登记接口返回的歌曲（/song/detail、/album、/cloudsearch 等，专辑封面即歌曲封面）"""
+        changed = False
+        for item in songs:
+            album = item.get('al') or item.get('album') or {}
+            pic_url = album.get('picUrl')
+            changed |= self._record(f"s_{item.get('id')}", pic_url)
+            if album.get('id'):
+                changed |= self._record(f"al_{album['id']}", pic_url)
+        if changed:
+            self._async_changed()
+
+    @callback
+    def record_api_albums(self, albums):
+        changed = False
+        for item in albums:
+            changed |= self._record(f"al_{item.get('id')}", item.get('picUrl'))
+        if changed:
+            self._async_changed()
+
+    @callback
+    def record_api_playlists(self, playlists):
+        changed = False
+        for item in playlists:
+            changed |= self._record(f"p_{item.get('id')}", item.get('coverImgUrl'))
+        if changed:
+            self._async_changed()
+
+    async def _async_ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await async_load_store(self.hass, self._store, self._legacy_filepath, [])
+            # 文件中是旧数据，加载前已登记的更新，保留在后面
+            items = OrderedDict()
+            for item in data if isinstance(data, list) else []:
+                if isinstance(item, list) and len(item) == 2:
+                    items[item[0]] = item[1]
+            recorded = len(self._items)
+            for cover_id, pic_url in self._items.items():
+                items.pop(cover_id, None)
+                items[cover_id] = pic_url
+            while len(items) > self.maxsize:
+                items.popitem(last=False)
+            self._items = items
+            self._loaded = True
+            if recorded:
+                self._async_schedule_save()
+            _LOGGER.debug(f"封面登记表已加载 {len(items)} 条")
+
+    async def async_get(self, cover_id):
+        """查询封面 URL，未登记返回 None"""
+        await self._async_ensure_loaded()
+        pic_url = self._items.get(cover_id)
+        if pic_url is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(cover_id)
+        return pic_url
+
+    async def async_flush(self):
+        """立即写入等待中的变化（卸载时调用）"""
+        if self._save_pending:
+            await self._store.async_save(self._data())
+
+    def stats(self):
+        return {
+            'size': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'save_pending': self._save_pending
+        }
@@ -0,0 +1,12 @@
+"""诊断信息（设置 → 设备与服务 → 云音乐 → 下载诊断）"""
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """运行统计：缓存、请求合并、索引等，以及登录凭据的状态（不含 Cookie）"""
+    cloud_music = hass.data.get('cloud_music')
+    if cloud_music is None:
+        return {}
+    return cloud_music.get_stats()
@@ -0,0 +1,115 @@
+"""
+私人 FM 缓冲区
+
+/personal/fm/mode 每次只返回约 3 首歌，这里为每个播放器维护一个去重后的
+待播缓冲区：低于目标深度时在后台并发请求补充，切歌时直接从缓冲区取歌，
+不必在歌曲交界处等待接口返回。
+"""
+
+import asyncio
+import logging
+import math
+from collections import deque
+
+_LOGGER = logging.getLogger(__name__)
+
+# 缓冲区目标深度（首）
+FM_BUFFER_DEPTH = 9
+# 单轮补充的最大并发请求数
+FM_FILL_CONCURRENCY = 3
+# 单次补充最多进行的轮数（接口持续返回重复歌曲时停止）
+FM_FILL_MAX_ROUNDS = 3
+# 接口每次返回的歌曲数（估算并发请求数用）
+FM_SONGS_PER_REQUEST = 3
+
+
+class FmBuffer:
+    """单个播放器、单个 FM 模式的待播缓冲区"""
+
+    def __init__(self, cloud_music, mode, submode=None, depth=FM_BUFFER_DEPTH):
+        self.cloud_music = cloud_music
+        self.mode = mode
+        self.submode = submode
+        self.depth = depth
+        self._tracks = deque()
+        # 出现过的歌曲 ID（缓冲中 + 已取出），用于去重
+        self._seen = set()
+        self._fill_task = None
+        # 统计
+        self.requests = 0
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self._tracks)
+
+    @property
+    def filling(self):
+        return self._fill_task is not None and not self._fill_task.done()
+
+    def schedule_fill(self):
+        """缓冲不足目标深度时启动后台补充（已在补充中则忽略）"""
+        if self.filling or len(self._tracks) >= self.depth:
+            return
+        self._fill_task = self.cloud_music.hass.async_create_task(self._async_fill())
+
+    async def _async_fill(self):
+        for _ in range(FM_FILL_MAX_ROUNDS):
+            missing = self.depth - len(self._tracks)
+            if missing <= 0:
+                break
+            concurrency = min(FM_FILL_CONCURRENCY, math.ceil(missing / FM_SONGS_PER_REQUEST))
+            self.requests += concurrency
+            results = await asyncio.gather(
+                *(self.cloud_music.async_fetch_personal_fm(self.mode, self.submode) for _ in range(concurrency)),
+                return_exceptions=True
+            )
+            added = 0
+            for result in results:
+                if isinstance(result, Exception):
+                    _LOGGER.debug(f"FM 缓冲补充失败: {result}")
+                    continue
+                for music_info in result:
+                    song_id = str(music_info.id)
+                    if song_id in self._seen:
+                        self.duplicates += 1
+                        continue
+                    self._seen.add(song_id)
+                    self._tracks.append(music_info)
+                    added += 1
+            # 本轮全部重复或失败，不再继续请求
+            if added == 0:
+                break
+        _LOGGER.debug(f"FM 缓冲 ({self.mode}/{self.submode}) 当前 {len(self._tracks)} 首")
+
+    async def async_take(self, count):
+        """
+        取出最多 count 首歌曲
+
+        缓冲不足时等待正在进行的补充完成；取出后在后台补满缓冲区
+        """
+        if len(self._tracks) < count:
+            self.schedule_fill()
+            if self._fill_task is not None:
+                # asyncio.wait 不会把补充任务的异常或取消传递给调用方
+                await asyncio.wait([self._fill_task])
+        tracks = [self._tracks.popleft() for _ in range(min(count, len(self._tracks)))]
+        self.schedule_fill()
+        return tracks
+
+    def cancel(self):
+        """停止后台补充（退出 FM 模式时调用）"""
+        if self.filling:
+            self._fill_task.cancel()
+        self._fill_task = None
+        self._tracks.clear()
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'submode': self.submode,
+            'size': len(self._tracks),
+            'seen': len(self._seen),
+            'requests': self.requests,
+            'duplicates': self.duplicates,
+            'filling': self.filling
+        }
@@ -1,26 +1,22 @@
 import base64
-import time
 import requests
 from urllib.parse import parse_qsl, quote
 from homeassistant.components.http import HomeAssistantView
 from aiohttp import web
 from .models.music_info import MusicSource
+from .cache import SingleFlight
 from .manifest import manifest
 
 DOMAIN = manifest.domain
 
-# 缓存过期时间（秒）
-CACHE_EXPIRE_SECONDS = 300  # 5 分钟
-
 class HttpView(HomeAssistantView):
 
     url = "/cloud_music/url"
     name = f"cloud_music:url"
     requires_auth = False
 
-    play_key = None
-    play_url = None
-    play_time = None  # 缓存时间戳
+    # 同一首歌的并发请求（多次探测 / 多个播放器）只解析一次
+    _single_flight = SingleFlight()
 
     async def get(self, request):
 
@@ -40,20 +36,27 @@ class HttpView(HomeAssistantView):
         song = query.get('song')
         singer = query.get('singer')
 
+        # 共享播放链接缓存（按歌曲分别缓存，多个播放器互不挤占）
+        level = cloud_music.audio_quality
+        play_url = cloud_music.stream_cache.get(id, level, source)
+        if play_url is None:
+            play_url = await self._single_flight.do(
+                (id, level, source),
+                lambda: self.async_resolve_url(hass, cloud_music, id, song, singer, source, level)
+            )
+        # 重定向到可播放链接
+        return web.HTTPFound(play_url)
+
+    async def head(self, request):
+        # 部分 DLNA 播放器会先发 HEAD 探测
+        return await self.get(request)
+
+    async def async_resolve_url(self, hass, cloud_music, id, song, singer, source, level):
         not_found_tips = quote(f'当前没有找到编号是{id}，歌名为{song}，作者是{singer}的播放链接')
-        play_url = f'http://fanyi.baidu.com/gettts?lan=zh&text={not_found_tips}&spd=5&source=web'
-
-        # 缓存KEY + 过期检查
-        play_key = f'{id}{song}{singer}{source}'
-        current_time = time.time()
-        cache_valid = (
-            self.play_key == play_key 
-            and self.play_time is not None 
-            and (current_time - self.play_time) < CACHE_EXPIRE_SECONDS
-        )
-        if cache_valid:
-            return web.HTTPFound(self.play_url)
+        not_found_url = f'http://fanyi.baidu.com/gettts?lan=zh&text={not_found_tips}&spd=5&source=web'
+        play_url = not_found_url
 
+        stream_source = source
         source = int(source)
         if source == MusicSource.PLAYLIST.value \
                 or source == MusicSource.ARTISTS.value \
@@ -70,7 +73,8 @@ class HttpView(HomeAssistantView):
                         if result is not None:
                             url = result.url
 
-                play_url = url
+                if url:
+                    play_url = url
             else:
                 # 从云盘里获取
                 url = await cloud_music.cloud_song_url(id)
@@ -81,11 +85,14 @@ class HttpView(HomeAssistantView):
                     if result is not None:
                         play_url = result.url
 
-        self.play_key = play_key
-        self.play_url = play_url
-        self.play_time = time.time()  # 记录缓存时间
-        # 重定向到可播放链接
-        return web.HTTPFound(play_url)
+            # 通过 VIP 接口、云盘或第三方音源找到了链接，不再视为无法播放
+            if play_url != not_found_url:
+                cloud_music.mark_song_alive(id)
+
+        # 找不到链接时不缓存提示语音，音源恢复后下次请求即可重新解析
+        if play_url != not_found_url:
+            cloud_music.stream_cache.set(id, level, stream_source, play_url)
+        return play_url
 
     # VIP音乐资源
     def getVipMusic(self, id):
@@ -112,7 +119,12 @@ class CloudMusicApiView(HomeAssistantView):
     
     用法：
         /cloud_music/api?action=lyric&id=123456
+        /cloud_music/api?action=lyric_timeline&id=123456
+        /cloud_music/api?action=lyric_position&id=123456&position=12.5
         /cloud_music/api?action=song_detail&id=123456
+        /cloud_music/api?action=search_suggest&keywords=周杰
+
+    运行统计需要认证，见 diagnostics.py
     """
     
     url = "/cloud_music/api"
@@ -140,6 +152,26 @@ class CloudMusicApiView(HomeAssistantView):
             # 总是返回结构化数据，前端根据 type 判断可用性
             return web.json_response(result)
         
+        # 解析后的歌词时间轴（紧凑格式）
+        elif action == 'lyric_timeline':
+            if not song_id:
+                return web.json_response({'error': 'Missing id parameter'}, status=400)
+            timeline = await cloud_music.async_get_lyric_timeline(song_id)
+            return web.json_response(timeline.to_compact())
+        
+        # 指定进度（秒）的当前行和当前字
+        elif action == 'lyric_position':
+            if not song_id:
+                return web.json_response({'error': 'Missing id parameter'}, status=400)
+            try:
+                position = float(request.query.get('position', 0))
+            except ValueError:
+                return web.json_response({'error': 'Invalid position parameter'}, status=400)
+            timeline = await cloud_music.async_get_lyric_timeline(song_id)
+            result = timeline.lookup(int(position * 1000))
+            result['type'] = timeline.type
+            return web.json_response(result)
+        
         # 歌曲详情（预留）
         elif action == 'song_detail':
             if not song_id:
@@ -147,9 +179,23 @@ class CloudMusicApiView(HomeAssistantView):
             result = await cloud_music.netease_cloud_music(f'/song/detail?ids={song_id}')
             return web.json_response(result)
         
+        # 搜索输入联想（服务端缓存 + 按客户端防抖）
+        elif action == 'search_suggest':
+            keywords = request.query.get('keywords', '')
+            try:
+                suggestions = await cloud_music.search.async_suggest(keywords, request.remote)
+            except Exception:
+                suggestions = []
+            return web.json_response({
+                'keywords': keywords,
+                'suggestions': suggestions or [],
+                # 被同一客户端更新的输入取代，前端可忽略本次结果
+                'superseded': suggestions is None
+            })
+        
         # 未知 action
         else:
             return web.json_response({
                 'error': f'Unknown action: {action}',
-                'available_actions': ['lyric', 'song_detail']
+                'available_actions': ['lyric', 'lyric_timeline', 'lyric_position', 'song_detail', 'search_suggest']
             }, status=400)
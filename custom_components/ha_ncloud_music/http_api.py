@@ -1,47 +1,82 @@
 import json, aiohttp
-from urllib.parse import urlparse
 
 # 全局请求头
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36 Edg/105.0.1343.50'
 }
 
-# 获取cookie
-async def http_cookie(url):
+# 连接池配置
+POOL_LIMIT = 100            # 总连接数上限
+POOL_LIMIT_PER_HOST = 16    # 单个主机连接数上限
+DNS_CACHE_TTL = 300         # DNS 缓存时间（秒）
+KEEPALIVE_TIMEOUT = 60      # 空闲连接保持时间（秒）
+REQUEST_TIMEOUT = 30        # 单次请求超时（秒）
+
+def create_session():
+    '''
+    创建长连接会话（每个配置项一个，卸载时需调用 close）
+
+    - 复用 TCP/TLS 连接，避免每次请求重新握手
+    - 使用 DummyCookieJar，Cookie 按请求传入，不在会话间串号
+    '''
+    connector = aiohttp.TCPConnector(
+        limit=POOL_LIMIT,
+        limit_per_host=POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_TIMEOUT
+    )
+    return aiohttp.ClientSession(
+        headers=HEADERS,
+        connector=connector,
+        cookie_jar=aiohttp.DummyCookieJar(),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    )
+
+# 获取cookie（共享会话使用 DummyCookieJar，不保存 Cookie，直接从响应头读取）
+async def http_cookie(url, session):
     COOKIES = {'os': 'osx'}
-    jar = aiohttp.CookieJar(unsafe=True)
-    location = urlparse(url)
-    location_orgin = f'{location.scheme}://{location.netloc}'
-    async with aiohttp.ClientSession(headers=HEADERS, cookies=COOKIES, cookie_jar=jar) as session:
-            async with session.get(url) as resp:
-                cookies = session.cookie_jar.filter_cookies(location_orgin)
-                for key, cookie in cookies.items():
-                    COOKIES[key] = cookie.value
-                result = await resp.json()
-                return {
-                    'cookie': COOKIES,
-                    'data': result
-                }
-
-async def http_get(url, COOKIES={}):
+    async with session.get(url, cookies=COOKIES) as resp:
+        for key, cookie in resp.cookies.items():
+            COOKIES[key] = cookie.value
+        result = await resp.json()
+        return {
+            'cookie': COOKIES,
+            'data': result
+        }
+
+async def _read_result(url, resp):
+    # 喜马拉雅返回的是文本内容
+    if 'https://mobile.ximalaya.com/mobile/' in url:
+        return json.loads(await resp.text())
+    return await resp.json()
+
+async def http_get(url, COOKIES={}, session=None):
     headers = {'Referer': url, **HEADERS}
+    if session is not None:
+        async with session.get(url, headers=headers, cookies=COOKIES) as resp:
+            return await _read_result(url, resp)
+
     jar = aiohttp.CookieJar(unsafe=True)
     async with aiohttp.ClientSession(headers=headers, cookies=COOKIES, cookie_jar=jar) as session:
         async with session.get(url) as resp:
-            # 喜马拉雅返回的是文本内容
-            if 'https://mobile.ximalaya.com/mobile/' in url:
-                result = json.loads(await resp.text())
-            else:
-                result = await resp.json()
-            return result
-
-async def http_code(url):
+            return await _read_result(url, resp)
+
+async def http_code(url, session=None):
+    if session is not None:
+        async with session.get(url) as response:
+            return response.status
+
     async with aiohttp.ClientSession() as session:
         async with session.get(url) as response:
             return response.status
 
-async def fetch_data(url):
+async def fetch_data(url, session=None):
     timeout = aiohttp.ClientTimeout(total=5)
+    if session is not None:
+        async with session.get(url, timeout=timeout) as response:
+            return await response.json()
+
     async with aiohttp.ClientSession(timeout=timeout) as session:
         async with session.get(url) as response:
-            return await response.json()
\ No newline at end of file
+            return await response.json()
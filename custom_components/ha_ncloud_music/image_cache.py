@@ -0,0 +1,286 @@
+"""
+封面图片缓存
+
+Subsonic getCoverArt 的图片代理使用两级缓存，key 为 (封面 ID, 尺寸)：
+- 内存：最近使用的较小图片（LRU，按总字节数淘汰）
+- 磁盘：.storage/cloud_music_covers，总大小超过上限时按写入时间淘汰最旧的文件；
+  放不进内存的大图直接以文件形式返回，不读入内存
+
+同一张图片的并发请求只解析、下载一次。
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+from .cache import SingleFlight
+
+_LOGGER = logging.getLogger(__name__)
+
+# 内存缓存：总字节数 / 单张图片上限（字节）/ 有效期（秒）
+COVER_MEMORY_BYTES = 32 * 1024 * 1024
+COVER_MEMORY_ITEM_LIMIT = 1024 * 1024
+COVER_MEMORY_TTL = 24 * 3600
+# 磁盘缓存：总大小上限（字节）/ 有效期（秒）
+COVER_DISK_LIMIT = 200 * 1024 * 1024
+COVER_DISK_TTL = 30 * 24 * 3600
+# 下载超时（秒）
+COVER_DOWNLOAD_TIMEOUT = 10
+
+_MAGIC_TYPES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG', 'image/png'),
+    (b'GIF8', 'image/gif'),
+)
+
+
+def _sniff_content_type(data):
+    for magic, content_type in _MAGIC_TYPES:
+        if data.startswith(magic):
+            return content_type
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/jpeg'
+
+
+class CoverImage:
+    """
+    缓存的图片
+
+    内存中的图片 data 为内容、ETag 为内容摘要；
+    磁盘上的大图 data 为 None，path 为文件路径，ETag 由文件名、大小和写入时间组成
+    """
+
+    __slots__ = ('data', 'path', 'size', 'content_type', 'etag')
+
+    def __init__(self, data, content_type=None, path=None, size=None, etag=None):
+        self.data = data
+        self.path = path
+        self.size = len(data) if data is not None else size
+        if not content_type or not content_type.startswith('image/'):
+            content_type = _sniff_content_type(data)
+        self.content_type = content_type
+        self.etag = etag or f'"{hashlib.md5(data).hexdigest()}"'
+
+
+class CoverImageCache:
+    """封面图片两级缓存"""
+
+    def __init__(self, cloud_music, directory, disk_limit=COVER_DISK_LIMIT):
+        self.cloud_music = cloud_music
+        self.hass = cloud_music.hass
+        self.directory = directory
+        self.disk_limit = disk_limit
+        # (封面 ID, 尺寸) -> (过期时间, CoverImage)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._single_flight = SingleFlight()
+        # 磁盘索引：文件名 -> (大小, 写入时间)，首次使用时扫描目录
+        self._disk_index = None
+        self._disk_size = 0
+        self._index_lock = asyncio.Lock()
+        # 统计
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.downloads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _filename(cover_id, size):
+        return hashlib.sha1(f'{cover_id}:{size or ""}'.encode()).hexdigest()
+
+    # ==================== executor 线程内执行 ====================
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        index = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                index[entry.name] = (stat.st_size, stat.st_mtime)
+        return index
+
+    def _read(self, filename, limit=-1):
+        path = os.path.join(self.directory, filename)
+        try:
+            with open(path, 'rb') as f:
+                return f.read(limit)
+        except OSError:
+            return None
+
+    def _write(self, filename, data, evict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, filename)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        for name in evict:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    # ==================== 异步接口 ====================
+
+    async def _async_ensure_index(self):
+        if self._disk_index is not None:
+            return
+        async with self._index_lock:
+            if self._disk_index is not None:
+                return
+            try:
+                index = await self.hass.async_add_executor_job(self._scan)
+            except OSError as e:
+                _LOGGER.warning(f"扫描封面缓存目录失败: {e}")
+                index = {}
+            self._disk_size = sum(size for size, _ in index.values())
+            self._disk_index = index
+
+    # ==================== 内存缓存 ====================
+
+    def _memory_get(self, key):
+        item = self._memory.get(key)
+        if item is None:
+            return None
+        expire_at, image = item
+        if expire_at <= time.monotonic():
+            self._memory_pop(key)
+            return None
+        self._memory.move_to_end(key)
+        self.memory_hits += 1
+        return image
+
+    def _memory_pop(self, key):
+        item = self._memory.pop(key, None)
+        if item is not None:
+            self._memory_bytes -= item[1].size
+
+    def _memory_set(self, key, image, ttl):
+        """放入内存缓存，超过总字节数时淘汰最久未使用的图片（大图不放入）"""
+        if image.data is None or image.size > COVER_MEMORY_ITEM_LIMIT:
+            return
+        self._memory_pop(key)
+        self._memory[key] = (time.monotonic() + ttl, image)
+        self._memory_bytes += image.size
+        while self._memory_bytes > COVER_MEMORY_BYTES:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    # ==================== 磁盘缓存 ====================
+
+    async def _async_load_disk(self, filename):
+        await self._async_ensure_index()
+        item = self._disk_index.get(filename)
+        if item is None:
+            return None
+        size, mtime = item
+        if time.time() - mtime > COVER_DISK_TTL:
+            return None
+        # 大图只读文件头判断类型，之后直接以文件返回
+        large = size > COVER_MEMORY_ITEM_LIMIT
+        data = await self.hass.async_add_executor_job(self._read, filename, 16 if large else -1)
+        if not data:
+            self._disk_size -= self._disk_index.pop(filename)[0]
+            return None
+        self.disk_hits += 1
+        if large:
+            return CoverImage(
+                None, _sniff_content_type(data),
+                path=os.path.join(self.directory, filename), size=size,
+                etag=f'"{filename}-{size}-{int(mtime)}"'
+            )
+        return CoverImage(data)
+
+    async def _async_save_disk(self, filename, data):
+        await self._async_ensure_index()
+        old = self._disk_index.pop(filename, None)
+        if old is not None:
+            self._disk_size -= old[0]
+
+        # 超出上限时从最旧的文件开始淘汰
+        evict = []
+        if self._disk_size + len(data) > self.disk_limit:
+            for name, (size, _) in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+                if self._disk_size + len(data) <= self.disk_limit:
+                    break
+                evict.append(name)
+                self._disk_size -= size
+            for name in evict:
+                del self._disk_index[name]
+            self.evictions += len(evict)
+
+        self._disk_index[filename] = (len(data), time.time())
+        self._disk_size += len(data)
+        try:
+            await self.hass.async_add_executor_job(self._write, filename, data, evict)
+        except OSError as e:
+            _LOGGER.warning(f"写入封面缓存失败: {e}")
+            self._disk_size -= self._disk_index.pop(filename)[0]
+
+    async def _async_download(self, url, size):
+        # 只有明确请求尺寸时才添加 ?param= 参数，否则返回原图（最大清晰度）
+        if size:
+            url = f"{url}?param={size}y{size}"
+        headers = {'Referer': 'https://music.163.com/'}
+        async with self.cloud_music.session.get(
+            url, headers=headers, timeout=aiohttp.ClientTimeout(total=COVER_DOWNLOAD_TIMEOUT)
+        ) as resp:
+            if resp.status != 200:
+                _LOGGER.warning(f"获取封面图片失败 HTTP {resp.status}: {url}")
+                return None
+            data = await resp.read()
+            self.downloads += 1
+            return CoverImage(data, resp.headers.get('Content-Type'))
+
+    async def async_get(self, cover_id, size, resolve_url, persist=True, ttl=COVER_MEMORY_TTL):
+        """
+        获取封面图片
+
+        Args:
+            resolve_url: 缓存未命中时调用的协程函数，返回图片原始 URL（找不到返回 None）
+            persist: 是否写入磁盘缓存（每日推荐等经常变化的封面只放内存）
+            ttl: 内存缓存有效期（秒）
+
+        Returns:
+            CoverImage，找不到或下载失败返回 None
+        """
+        key = (cover_id, size)
+        image = self._memory_get(key)
+        if image is not None:
+            return image
+        return await self._single_flight.do(key, lambda: self._async_fetch(key, resolve_url, persist, ttl))
+
+    async def _async_fetch(self, key, resolve_url, persist, ttl):
+        cover_id, size = key
+        filename = self._filename(cover_id, size)
+        image = await self._async_load_disk(filename) if persist else None
+        if image is None:
+            url = await resolve_url()
+            if not url:
+                return None
+            image = await self._async_download(url, size)
+            if image is None:
+                return None
+            if persist:
+                await self._async_save_disk(filename, image.data)
+        self._memory_set(key, image, ttl)
+        return image
+
+    def stats(self):
+        return {
+            'memory_items': len(self._memory),
+            'memory_bytes': self._memory_bytes,
+            'memory_hits': self.memory_hits,
+            'disk_files': len(self._disk_index or {}),
+            'disk_bytes': self._disk_size,
+            'disk_hits': self.disk_hits,
+            'downloads': self.downloads,
+            'evictions': self.evictions,
+            'single_flight': self._single_flight.stats()
+        }
@@ -6,6 +6,8 @@ Jellyfin API Handler for NetEase Cloud Music
 import logging
 from aiohttp import web
 
+from .const import SEARCH_TYPE_SONG, SEARCH_TYPE_ALBUM, SEARCH_TYPE_ARTIST, SEARCH_TYPE_PLAYLIST
+
 _LOGGER = logging.getLogger(__name__)
 
 # 虚拟用户配置
@@ -58,6 +60,11 @@ class JellyfinHandler:
             "ServerId": VIRTUAL_SERVER_ID
         })
     
+    async def _format_jellyfin_songs(self, songs: list) -> list:
+        """批量格式化歌曲（整个列表的音质一次批量获取）"""
+        qualities = await self.cloud_music.quality.async_get_many([song.get('id') for song in songs])
+        return [self._format_jellyfin_song(song, qualities.get(str(song.get('id')))) for song in songs]
+    
     def _format_jellyfin_song(self, item: dict, quality_info: dict = None) -> dict:
         """
         基于 MA parse_track() 要求的完整字段
@@ -83,6 +90,9 @@ class JellyfinHandler:
             album_id = song_id  # 使用歌曲ID作为虚拟专辑ID
         album_name = album_info.get('name', '未知专辑') if album_info else '未知专辑'
         
+        # 登记封面，之后 GET_IMAGE 无需再查询接口
+        self.cloud_music.cover_registry.record_api_songs([item])
+        
         result = {
             "Id": f"s_{song_id}",
             "Name": item.get('name', ''),
@@ -153,6 +163,8 @@ class JellyfinHandler:
         publish_time = item.get('publishTime', 0)
         production_year = publish_time // 31536000000 + 1970 if publish_time and publish_time > 0 else 0
         
+        self.cloud_music.cover_registry.record_api_albums([item])
+        
         return {
             "Id": f"al_{album_id}",
             "Name": item.get('name', ''),
@@ -204,6 +216,9 @@ class JellyfinHandler:
         playlist_id = item.get('id')
         creator = item.get('creator', {})
         
+        # 登记表与 Subsonic 共用 p_ 前缀
+        self.cloud_music.cover_registry.record_api_playlists([item])
+        
         return {
             "Id": f"pl_{playlist_id}",
             "Name": item.get('name', ''),
@@ -250,8 +265,7 @@ class JellyfinHandler:
                     real_id = parent_id[3:]
                     res = await self.cloud_music.netease_cloud_music(f'/album?id={real_id}')
                     if res and res.get('songs'):
-                        for song in res['songs']:
-                            items.append(self._format_jellyfin_song(song))
+                        items.extend(await self._format_jellyfin_songs(res['songs']))
                         _LOGGER.info(f"Jellyfin: 专辑 {real_id} 返回 {len(items)} 首歌曲")
                 
                 # 歌单曲目 (pl_xxx)
@@ -259,8 +273,7 @@ class JellyfinHandler:
                     real_id = parent_id[3:]
                     res = await self.cloud_music.netease_cloud_music(f'/playlist/track/all?id={real_id}')
                     if res and res.get('songs'):
-                        for song in res['songs']:
-                            items.append(self._format_jellyfin_song(song))
+                        items.extend(await self._format_jellyfin_songs(res['songs']))
                         _LOGGER.info(f"Jellyfin: 歌单 {real_id} 返回 {len(items)} 首歌曲")
                 
             except Exception as e:
@@ -365,35 +378,27 @@ class JellyfinHandler:
         
         _LOGGER.info(f"Jellyfin Items: 搜索 searchTerm={search_term}, types={include_types}")
         
-        from urllib.parse import quote as url_quote
         items = []
+        want_songs = 'Audio' in include_types or not include_types
+        want_albums = 'MusicAlbum' in include_types or not include_types
+        want_playlists = 'Playlist' in include_types or not include_types
+        
+        # 歌曲/专辑/歌单并发搜索（"我的歌单" 是特殊关键词，不搜索公开歌单）
+        results = await self.cloud_music.search.async_search_many(search_term, {
+            SEARCH_TYPE_SONG: limit if want_songs else 0,
+            SEARCH_TYPE_ALBUM: limit if want_albums else 0,
+            SEARCH_TYPE_PLAYLIST: limit if want_playlists and search_term != "我的歌单" else 0,
+        })
         
         # 搜索歌曲
-        if 'Audio' in include_types or not include_types:
-            try:
-                res = await self.cloud_music.netease_cloud_music(
-                    f'/cloudsearch?keywords={url_quote(search_term)}&type=1&limit={limit}'
-                )
-                if res and res.get('result') and res['result'].get('songs'):
-                    for song in res['result']['songs'][:limit]:
-                        items.append(self._format_jellyfin_song(song))
-            except Exception as e:
-                _LOGGER.error(f"Jellyfin: 搜索歌曲失败 - {e}")
+        items.extend(await self._format_jellyfin_songs(results.get(SEARCH_TYPE_SONG, [])[:limit]))
         
         # 搜索专辑
-        if 'MusicAlbum' in include_types or not include_types:
-            try:
-                res = await self.cloud_music.netease_cloud_music(
-                    f'/cloudsearch?keywords={url_quote(search_term)}&type=10&limit={limit}'
-                )
-                if res and res.get('result') and res['result'].get('albums'):
-                    for album in res['result']['albums'][:limit]:
-                        items.append(self._format_jellyfin_album(album))
-            except Exception as e:
-                _LOGGER.error(f"Jellyfin: 搜索专辑失败 - {e}")
+        for album in results.get(SEARCH_TYPE_ALBUM, [])[:limit]:
+            items.append(self._format_jellyfin_album(album))
         
         # 搜索歌单
-        if 'Playlist' in include_types or not include_types:
+        if want_playlists:
             try:
                 # ========== Jellyfin 曲线实现：通过搜索暴露歌单 ==========
                 # Jellyfin API 不支持专门的 getPlaylists 接口
@@ -436,14 +441,12 @@ class JellyfinHandler:
                     else:
                         _LOGGER.warning("Jellyfin: userinfo 未加载")
                 else:
-                    # 普通搜索：搜索公开歌单
-                    res = await self.cloud_music.netease_cloud_music(
-                        f'/cloudsearch?keywords={url_quote(search_term)}&type=1000&limit={limit}'
-                    )
-                    if res and res.get('result') and res['result'].get('playlists'):
-                        for playlist in res['result']['playlists'][:limit]:
-                            items.append(self._format_jellyfin_playlist(playlist))
-                        _LOGGER.info(f"Jellyfin: ✅ 歌单搜索成功，找到 {len(res['result']['playlists'])} 个")
+                    # 普通搜索：公开歌单（已在上面并发搜索）
+                    playlists = results.get(SEARCH_TYPE_PLAYLIST, [])
+                    for playlist in playlists[:limit]:
+                        items.append(self._format_jellyfin_playlist(playlist))
+                    if playlists:
+                        _LOGGER.info(f"Jellyfin: ✅ 歌单搜索成功，找到 {len(playlists)} 个")
             except Exception as e:
                 _LOGGER.error(f"Jellyfin: 搜索歌单失败 - {e}", exc_info=True)
         
@@ -463,16 +466,12 @@ class JellyfinHandler:
         if not search_term:
             return self._success_response({"Items": [], "TotalRecordCount": 0, "StartIndex": 0})
         
-        from urllib.parse import quote as url_quote
         items = []
         
         try:
-            res = await self.cloud_music.netease_cloud_music(
-                f'/cloudsearch?keywords={url_quote(search_term)}&type=100&limit={limit}'
-            )
-            if res and res.get('result') and res['result'].get('artists'):
-                for artist in res['result']['artists'][:limit]:
-                    items.append(self._format_jellyfin_artist(artist))
+            artists = await self.cloud_music.search.async_search(search_term, SEARCH_TYPE_ARTIST, limit)
+            for artist in artists[:limit]:
+                items.append(self._format_jellyfin_artist(artist))
         except Exception as e:
             _LOGGER.error(f"Jellyfin Artists: 失败 - {e}")
         
@@ -500,8 +499,7 @@ class JellyfinHandler:
             try:
                 res = await self.cloud_music.netease_cloud_music(f'/album?id={real_id}')
                 if res and res.get('songs'):
-                    for song in res['songs']:
-                        items.append(self._format_jellyfin_song(song))
+                    items.extend(await self._format_jellyfin_songs(res['songs']))
             except Exception as e:
                 _LOGGER.error(f"Jellyfin Items (Album): 失败 - {e}")
         
@@ -533,8 +531,7 @@ class JellyfinHandler:
                     _LOGGER.info(f"API响应keys: {list(res.keys()) if res else 'None'}")
                     if res and res.get('songs'):
                         _LOGGER.info(f"✅ 获取到 {len(res['songs'])} 首热门歌曲")
-                        for song in res['songs']:
-                            items.append(self._format_jellyfin_song(song))
+                        items.extend(await self._format_jellyfin_songs(res['songs']))
                     else:
                         _LOGGER.warning(f"❌ 未获取到热门歌曲，完整响应: {res}")
             except Exception as e:
@@ -550,6 +547,7 @@ class JellyfinHandler:
                     _LOGGER.info("Jellyfin Items: 获取每日推荐歌曲")
                     # 调用 HA 集成中已实现的每日推荐 API
                     songs = await self.cloud_music.async_get_dailySongs()
+                    song_dicts = []
                     for song in songs:
                         # 将 MusicInfo 对象转换为 API 格式
                         song_dict = {
@@ -559,7 +557,8 @@ class JellyfinHandler:
                             'al': {'name': getattr(song, 'album', '')},
                             'dt': song.duration
                         }
-                        items.append(self._format_jellyfin_song(song_dict))
+                        song_dicts.append(song_dict)
+                    items.extend(await self._format_jellyfin_songs(song_dicts))
                     _LOGGER.info(f"Jellyfin Items: 返回 {len(items)} 首每日推荐歌曲")
                 except Exception as e:
                     _LOGGER.error(f"Jellyfin Items (每日推荐): 失败 - {e}", exc_info=True)
@@ -570,8 +569,7 @@ class JellyfinHandler:
                 try:
                     res = await self.cloud_music.netease_cloud_music(f'/playlist/track/all?id={real_id}')
                     if res and res.get('songs'):
-                        for song in res['songs']:
-                            items.append(self._format_jellyfin_song(song))
+                        items.extend(await self._format_jellyfin_songs(res['songs']))
                 except Exception as e:
                     _LOGGER.error(f"Jellyfin Items (Playlist): 失败 - {e}")
 
@@ -602,6 +600,7 @@ class JellyfinHandler:
                 total_count = len(songs)
                 paginated_songs = songs[start_index:start_index + limit]
                 
+                song_dicts = []
                 for song in paginated_songs:
                     # 将 MusicInfo 对象转换为 API 格式
                     song_dict = {
@@ -611,7 +610,8 @@ class JellyfinHandler:
                         'al': {'name': getattr(song, 'album', '')},
                         'dt': song.duration
                     }
-                    items.append(self._format_jellyfin_song(song_dict))
+                    song_dicts.append(song_dict)
+                items.extend(await self._format_jellyfin_songs(song_dicts))
                 
                 _LOGGER.info(f"Jellyfin Playlist: pl_daily 返回 {len(items)}/{total_count} 首歌曲 (offset={start_index})")
                 
@@ -641,8 +641,7 @@ class JellyfinHandler:
                 end_index = start_index + limit
                 page_songs = all_songs[start_index:end_index]
                 
-                for song in page_songs:
-                    items.append(self._format_jellyfin_song(song))
+                items.extend(await self._format_jellyfin_songs(page_songs))
                 
                 _LOGGER.info(f"Jellyfin Playlist: {playlist_id} 返回 {len(items)}/{total_count} 首歌曲 (offset={start_index})")
         except Exception as e:
@@ -694,17 +693,8 @@ class JellyfinHandler:
                 res = await self.cloud_music.netease_cloud_music(f'/song/detail?ids={real_id}')
                 
                 if res and res.get('songs'):
-                    # 获取实际音质信息(根据用户配置和账号权限)
-                    quality_info = None
-                    try:
-                        url_res = await self.cloud_music.netease_cloud_music(
-                            f'/song/url/v1?id={real_id}&level={self.cloud_music.audio_quality}'
-                        )
-                        if url_res and url_res.get('data'):
-                            quality_info = url_res['data'][0]
-                            _LOGGER.debug(f"Jellyfin: 获取音质信息 level={quality_info.get('level')}, sr={quality_info.get('sr')}")
-                    except Exception as e:
-                        _LOGGER.warning(f"Jellyfin: 获取音质信息失败 {e}")
+                    # 获取实际音质信息(根据用户配置和账号权限，带缓存)
+                    quality_info = await self.cloud_music.quality.async_get(real_id)
                     
                     song_data = self._format_jellyfin_song(res['songs'][0], quality_info)
                     _LOGGER.info(f"✅ Jellyfin GET_ITEM: 歌曲找到 Name={song_data.get('Name')}")
@@ -850,20 +840,30 @@ class JellyfinHandler:
         
         _LOGGER.debug(f"Image type: {item_type}, real_id: {real_id}")
         
+        # 生成列表时已登记的封面（歌手使用照片，与 Subsonic 不同，不查登记表）
+        registry_id = {'s': 's_', 'al': 'al_', 'pl': 'p_'}.get(item_type)
+        if registry_id is not None and decoded_id != 'pl_daily':
+            pic_url = await self.cloud_music.cover_registry.async_get(f'{registry_id}{real_id}')
+            if pic_url:
+                _LOGGER.debug(f"✅ Jellyfin GET_IMAGE: 登记表命中 {pic_url[:50]}...")
+                raise web.HTTPFound(pic_url)
+        
         try:
             # 歌曲封面
             if item_type == 's':
-                res = await self.cloud_music.netease_cloud_music(f'/song/detail?ids={real_id}')
-                if res and res.get('songs'):
-                    pic_url = res['songs'][0].get('al', {}).get('picUrl', '')
+                song_details = await self.cloud_music.async_get_song_details([real_id])
+                if real_id in song_details:
+                    self.cloud_music.cover_registry.record_api_songs([song_details[real_id]])
+                    pic_url = song_details[real_id].get('al', {}).get('picUrl', '')
                     if pic_url:
                         _LOGGER.info(f"✅ Jellyfin GET_IMAGE: 歌曲封面 {pic_url[:50]}...")
                         raise web.HTTPFound(pic_url)
             
             # 专辑封面
             elif item_type == 'al':
-                res = await self.cloud_music.netease_cloud_music(f'/album?id={real_id}')
+                res = await self.cloud_music.async_get_album_data(real_id)
                 if res and res.get('album'):
+                    self.cloud_music.cover_registry.record_api_albums([res['album']])
                     pic_url = res['album'].get('picUrl', '')
                     if pic_url:
                         _LOGGER.info(f"✅ Jellyfin GET_IMAGE: 专辑封面 {pic_url[:50]}...")
@@ -871,12 +871,17 @@ class JellyfinHandler:
             
             # 歌手封面
             elif item_type == 'ar':
-                res = await self.cloud_music.netease_cloud_music(f'/artist/detail?id={real_id}')
-                if res and res.get('data'):
-                    pic_url = res['data'].get('artist', {}).get('cover', '')
-                    if pic_url:
-                        _LOGGER.info(f"✅ Jellyfin GET_IMAGE: 歌手封面 {pic_url[:50]}...")
-                        raise web.HTTPFound(pic_url)
+                artist = await self.cloud_music.metadata.async_get_artist(real_id)
+                pic_url = artist.get('cover', '') if artist else ''
+                if not pic_url:
+                    res = await self.cloud_music.netease_cloud_music(f'/artist/detail?id={real_id}')
+                    if res and res.get('data'):
+                        pic_url = res['data'].get('artist', {}).get('cover', '')
+                        if pic_url:
+                            await self.cloud_music.metadata.async_update_artist(real_id, {'cover': pic_url})
+                if pic_url:
+                    _LOGGER.info(f"✅ Jellyfin GET_IMAGE: 歌手封面 {pic_url[:50]}...")
+                    raise web.HTTPFound(pic_url)
             
             # 歌单封面
             elif item_type == 'pl':
@@ -898,6 +903,7 @@ class JellyfinHandler:
                     # 普通歌单封面
                     res = await self.cloud_music.netease_cloud_music(f'/playlist/detail?id={real_id}')
                     if res and res.get('playlist'):
+                        self.cloud_music.cover_registry.record_api_playlists([res['playlist']])
                         pic_url = res['playlist'].get('coverImgUrl', '')
                         if pic_url:
                             _LOGGER.info(f"✅ Jellyfin GET_IMAGE: 歌单封面 {pic_url[:50]}...")
@@ -0,0 +1,317 @@
+"""
+本地音乐库索引
+
+Subsonic 的 getAlbumList2 / getRandomSongs / getStarred2 需要整个音乐库的数据，
+这里在后台维护一份内存索引：
+- 喜欢的歌曲（/likelist + 歌曲详情，详情优先读取本地元数据库）
+- 关注的歌手（/artist/sublist）
+- 云盘歌曲（复用云盘索引）
+- 专辑：由喜欢的歌曲和云盘歌曲归纳得到
+
+各种排序在刷新时预先算好，请求时只做切片 / 二分 / 随机抽样，不访问上游。
+首次使用时等待建立索引，之后过期只在后台刷新，请求直接使用旧数据。
+各部分独立获取：某部分失败时保留该部分的旧数据，并在退避一段时间后重试。
+"""
+
+import asyncio
+import bisect
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# 索引有效期（秒），过期后在后台刷新
+LIBRARY_INDEX_TTL = 1800
+# 刷新失败后的重试间隔（秒），连续失败时加倍，最长为索引有效期
+LIBRARY_RETRY_DELAY = 60
+# 关注歌手的分页大小
+LIBRARY_PAGE_SIZE = 100
+
+# getAlbumList2 的排序类型 -> 预计算的专辑顺序
+ALBUM_LIST_NEWEST = 'newest'
+ALBUM_LIST_BY_NAME = 'alphabeticalByName'
+ALBUM_LIST_BY_ARTIST = 'alphabeticalByArtist'
+ALBUM_LIST_STARRED = 'starred'
+ALBUM_LIST_RANDOM = 'random'
+ALBUM_LIST_BY_YEAR = 'byYear'
+ALBUM_LIST_BY_GENRE = 'byGenre'
+
+
+def _year(publish_time):
+    """发行时间（毫秒）-> 年份，与其他接口的换算方式一致"""
+    if not publish_time or publish_time < 0:
+        return None
+    return publish_time // 31536000000 + 1970
+
+
+class LibraryIndex:
+    """用户音乐库索引"""
+
+    def __init__(self, cloud_music):
+        self.cloud_music = cloud_music
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+        # 每次 clear() 加一，切换账号前开始的刷新结果作废
+        self._generation = 0
+        self._reset()
+        # 统计
+        self.refreshes = 0
+        self.failures = 0
+
+    def clear(self):
+        """清空索引（登录/退出时调用）"""
+        self._generation += 1
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+        self._reset()
+
+    def _reset(self):
+        # 各部分的原始数据（部分刷新失败时沿用）
+        self._parts = {'liked': [], 'artists': [], 'cloud': []}
+        self._songs = []            # 全部歌曲（喜欢的在前，其后是云盘中的其他歌曲）
+        self._liked_count = 0       # _songs 中前多少首是喜欢的歌曲
+        self._songs_by_year = []    # 有年份的歌曲，按年份升序
+        self._song_years = []       # 与 _songs_by_year 对应的年份（二分查找用）
+        self._albums = []           # 专辑（按首次出现的顺序）
+        self._album_orders = {}     # 排序类型 -> 专辑列表
+        self._albums_by_year = []
+        self._album_years = []
+        self._artists = []          # 关注的歌手
+        self._attempted = False     # 是否已尝试建立过索引
+        self._next_refresh_at = None
+        self._retry_delay = LIBRARY_RETRY_DELAY
+
+    @property
+    def stale(self):
+        return self._next_refresh_at is None or time.monotonic() >= self._next_refresh_at
+
+    # ==================== 刷新 ====================
+
+    async def _async_fetch_liked(self, uid):
+        res = await self.cloud_music.netease_cloud_music(f'/likelist?uid={uid}')
+        if res.get('code') != 200:
+            raise ValueError(f"likelist code={res.get('code')}")
+        ids = [str(i) for i in res.get('ids') or []]
+        details = await self.cloud_music.async_get_song_details(ids)
+        return [details[i] for i in ids if i in details]
+
+    async def _async_fetch_artists(self):
+        artists = []
+        offset = 0
+        while True:
+            res = await self.cloud_music.netease_cloud_music(
+                f'/artist/sublist?limit={LIBRARY_PAGE_SIZE}&offset={offset}'
+            )
+            if res.get('code') != 200:
+                raise ValueError(f"artist/sublist code={res.get('code')}")
+            data = res.get('data') or []
+            artists.extend(data)
+            if not res.get('hasMore') or not data:
+                return artists
+            offset += len(data)
+
+    async def _async_fetch_cloud_songs(self):
+        """
+        云盘歌曲（songId 作为歌曲 ID，歌曲信息取 simpleSong）
+
+        Returns:
+            [(simpleSong id, 歌曲)]，simpleSong id 用于与喜欢的歌曲去重
+        """
+        songs = []
+        for item in await self.cloud_music.cloud_index.async_get_items():
+            simple_song = item.get('simpleSong') or {}
+            song = dict(simple_song)
+            song['id'] = item['songId']
+            if not song.get('name'):
+                song['name'] = item.get('songName', '')
+            songs.append((str(simple_song.get('id')), song))
+        return songs
+
+    async def async_refresh(self, force=False):
+        """刷新索引（有效期 / 退避时间内不请求上游）"""
+        async with self._lock:
+            if not force and not self.stale:
+                return
+            uid = self.cloud_music.userinfo.get('uid')
+            if uid is None:
+                self._reset()
+                return
+
+            generation = self._generation
+            results = await asyncio.gather(
+                self._async_fetch_liked(uid),
+                self._async_fetch_artists(),
+                self._async_fetch_cloud_songs(),
+                return_exceptions=True
+            )
+            if generation != self._generation:
+                # 刷新期间切换了账号
+                return
+
+            failed = []
+            for name, result in zip(('liked', 'artists', 'cloud'), results):
+                if isinstance(result, Exception):
+                    failed.append(name)
+                    _LOGGER.warning(f"刷新音乐库索引（{name}）失败: {result}")
+                else:
+                    self._parts[name] = result
+            self._attempted = True
+            if len(failed) < len(results):
+                self._build(self._parts['liked'], self._parts['artists'], self._parts['cloud'])
+                self.refreshes += 1
+
+            if failed:
+                self.failures += 1
+                self._next_refresh_at = time.monotonic() + self._retry_delay
+                self._retry_delay = min(self._retry_delay * 2, LIBRARY_INDEX_TTL)
+            else:
+                self._next_refresh_at = time.monotonic() + LIBRARY_INDEX_TTL
+                self._retry_delay = LIBRARY_RETRY_DELAY
+            _LOGGER.debug(
+                f"音乐库索引已刷新：歌曲 {len(self._songs)} 首（喜欢 {self._liked_count}），"
+                f"专辑 {len(self._albums)} 张，歌手 {len(self._artists)} 位"
+            )
+
+    def _build(self, liked, artists, cloud_songs):
+        liked_ids = {str(song['id']) for song in liked}
+        songs = list(liked)
+        songs.extend(
+            song for simple_id, song in cloud_songs
+            if simple_id not in liked_ids and str(song['id']) not in liked_ids
+        )
+
+        albums = {}
+        for index, song in enumerate(songs):
+            album_info = song.get('al') or {}
+            album_id = album_info.get('id')
+            if not album_id:
+                continue
+            album = albums.get(album_id)
+            if album is None:
+                song_artists = song.get('ar') or [{}]
+                album = albums[album_id] = {
+                    'id': album_id,
+                    'name': album_info.get('name') or '',
+                    'artist': song_artists[0].get('name') or '',
+                    'artistId': song_artists[0].get('id'),
+                    'picUrl': album_info.get('picUrl'),
+                    'publishTime': 0,
+                    'songCount': 0,
+                    'duration': 0,
+                    'starred': index < len(liked),
+                }
+            album['songCount'] += 1
+            album['duration'] += int((song.get('dt') or 0) / 1000)
+            album['publishTime'] = max(album['publishTime'], song.get('publishTime') or 0)
+        album_list = list(albums.values())
+        for album in album_list:
+            album['year'] = _year(album['publishTime'])
+
+        songs_by_year = sorted(
+            (song for song in songs if _year(song.get('publishTime'))),
+            key=lambda song: song['publishTime']
+        )
+        albums_by_year = sorted((album for album in album_list if album['year']), key=lambda album: album['year'])
+
+        # 列表中的封面后续由 getCoverArt 直接查表
+        self.cloud_music.cover_registry.record_api_songs(songs)
+
+        self._songs = songs
+        self._liked_count = len(liked)
+        self._songs_by_year = songs_by_year
+        self._song_years = [_year(song['publishTime']) for song in songs_by_year]
+        self._albums = album_list
+        self._album_orders = {
+            ALBUM_LIST_NEWEST: sorted(album_list, key=lambda album: album['publishTime'], reverse=True),
+            ALBUM_LIST_BY_NAME: sorted(album_list, key=lambda album: album['name'].casefold()),
+            ALBUM_LIST_BY_ARTIST: sorted(
+                album_list, key=lambda album: (album['artist'].casefold(), album['name'].casefold())
+            ),
+            ALBUM_LIST_STARRED: [album for album in album_list if album['starred']],
+        }
+        self._albums_by_year = albums_by_year
+        self._album_years = [album['year'] for album in albums_by_year]
+        self._artists = artists
+
+    @property
+    def refreshing(self):
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    async def async_ensure_ready(self):
+        """首次使用时等待建立索引；已过期则在后台刷新，直接使用当前数据"""
+        if not self._attempted:
+            await self.async_refresh()
+        elif self.stale and not self.refreshing:
+            self._refresh_task = self.cloud_music.hass.async_create_task(self.async_refresh())
+
+    # ==================== 查询 ====================
+
+    @staticmethod
+    def _year_range(items, years, from_year, to_year):
+        """按年份范围二分，返回 (起始下标, 结束下标, 是否倒序)"""
+        reverse = from_year is not None and to_year is not None and from_year > to_year
+        if reverse:
+            from_year, to_year = to_year, from_year
+        lo = bisect.bisect_left(years, from_year) if from_year is not None else 0
+        hi = bisect.bisect_right(years, to_year) if to_year is not None else len(items)
+        return lo, hi, reverse
+
+    async def async_get_albums(self, list_type, size=10, offset=0, from_year=None, to_year=None) -> list:
+        """
+        专辑列表（getAlbumList2）
+
+        Args:
+            list_type: random / newest / alphabeticalByName / alphabeticalByArtist / starred / byYear / byGenre，
+                其他类型（recent / frequent / highest）按音乐库顺序返回
+        """
+        await self.async_ensure_ready()
+        if list_type == ALBUM_LIST_RANDOM:
+            return random.sample(self._albums, min(size, len(self._albums)))
+        if list_type == ALBUM_LIST_BY_GENRE:
+            # 云音乐歌曲没有流派信息
+            return []
+        if list_type == ALBUM_LIST_BY_YEAR:
+            lo, hi, reverse = self._year_range(self._albums_by_year, self._album_years, from_year, to_year)
+            if reverse:
+                start = max(hi - offset - size, lo)
+                return self._albums_by_year[start:max(hi - offset, lo)][::-1]
+            return self._albums_by_year[lo + offset:min(lo + offset + size, hi)]
+        albums = self._album_orders.get(list_type, self._albums)
+        return albums[offset:offset + size]
+
+    async def async_get_random_songs(self, size=10, from_year=None, to_year=None) -> list:
+        """随机歌曲（getRandomSongs），指定年份范围时只从范围内抽样"""
+        await self.async_ensure_ready()
+        if from_year is None and to_year is None:
+            songs, lo, hi = self._songs, 0, len(self._songs)
+        else:
+            songs = self._songs_by_year
+            lo, hi, _ = self._year_range(songs, self._song_years, from_year, to_year)
+        return [songs[i] for i in random.sample(range(lo, hi), min(size, hi - lo))]
+
+    async def async_get_starred(self):
+        """
+        收藏内容（getStarred2）
+
+        Returns:
+            (喜欢的歌曲, 喜欢的歌曲所属专辑, 关注的歌手)
+        """
+        await self.async_ensure_ready()
+        return (
+            self._songs[:self._liked_count],
+            self._album_orders.get(ALBUM_LIST_STARRED, []),
+            self._artists
+        )
+
+    def stats(self):
+        return {
+            'songs': len(self._songs),
+            'liked': self._liked_count,
+            'albums': len(self._albums),
+            'artists': len(self._artists),
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'refreshing': self.refreshing
+        }
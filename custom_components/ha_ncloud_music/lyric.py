@@ -0,0 +1,178 @@
+"""
+歌词解析
+
+把 /lyric/new 返回的 LRC（逐行）、YRC（逐字）和 tlyric（翻译）解析成一条
+按时间排序的时间轴，之后按播放进度二分查找当前行和当前字。
+所有时间单位均为毫秒。
+"""
+
+import json
+import re
+from bisect import bisect_right
+
+# [mm:ss.xx] / [mm:ss:xx] / [mm:ss]
+_LRC_TIME = re.compile(r'\[(\d+):(\d+)(?:[.:](\d+))?\]')
+# YRC 行：[开始,时长]
+_YRC_LINE = re.compile(r'^\[(\d+),(\d+)\](.*)$')
+# YRC 字：(开始,时长,0)文字
+_YRC_WORD = re.compile(r'\((\d+),(\d+),\d+\)([^(]*)')
+
+# 翻译与原文时间的最大偏差（YRC 行时间与 LRC 时间略有差异）
+TRANSLATION_TOLERANCE = 1000
+
+
+def _parse_json_line(line):
+    """网易云歌词中的作词/作曲等信息以 JSON 行给出：{"t":0,"c":[{"tx":"作词: "},{"tx":"xxx"}]}"""
+    try:
+        data = json.loads(line)
+        return int(data.get('t', 0)), ''.join(item.get('tx', '') for item in data.get('c', []))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def parse_lrc(text):
+    """解析 LRC，返回 [(time, text)]（按时间排序）"""
+    result = []
+    for line in (text or '').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            item = _parse_json_line(line)
+            if item is not None:
+                result.append(item)
+            continue
+        times = []
+        pos = 0
+        for match in _LRC_TIME.finditer(line):
+            if match.start() != pos:
+                break
+            minute, second, fraction = match.groups()
+            ms = int(fraction.ljust(3, '0')[:3]) if fraction else 0
+            times.append((int(minute) * 60 + int(second)) * 1000 + ms)
+            pos = match.end()
+        # [ar:xxx] 等标签没有时间，直接跳过
+        content = line[pos:].strip()
+        for t in times:
+            result.append((t, content))
+    result.sort(key=lambda item: item[0])
+    return result
+
+
+def parse_yrc(text):
+    """解析 YRC，返回 [(start, duration, text, [(start, duration, word)])]（按时间排序）"""
+    result = []
+    for line in (text or '').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            item = _parse_json_line(line)
+            if item is not None:
+                result.append((item[0], 0, item[1], []))
+            continue
+        match = _YRC_LINE.match(line)
+        if match is None:
+            continue
+        start, duration, body = match.groups()
+        words = [(int(t), int(d), w) for t, d, w in _YRC_WORD.findall(body)]
+        content = ''.join(w for _, _, w in words) if words else body
+        result.append((int(start), int(duration), content, words))
+    result.sort(key=lambda item: item[0])
+    return result
+
+
+class LyricTimeline:
+    """
+    合并后的歌词时间轴
+
+    lines 中每一项为 (start, duration, text, translation, words)，
+    words 为 [(start, duration, word)]，LRC 歌词没有逐字信息时为空列表
+    """
+
+    __slots__ = ('type', 'times', 'lines')
+
+    def __init__(self, lrc='', yrc='', tlyric=''):
+        yrc_lines = parse_yrc(yrc)
+        if yrc_lines:
+            self.type = 'yrc'
+            lines = yrc_lines
+        else:
+            lrc_lines = parse_lrc(lrc)
+            self.type = 'lrc' if lrc_lines else 'none'
+            # LRC 行时长 = 下一行开始时间 - 本行开始时间（最后一行未知）
+            lines = [
+                (t, (lrc_lines[i + 1][0] - t) if i + 1 < len(lrc_lines) else 0, content, [])
+                for i, (t, content) in enumerate(lrc_lines)
+            ]
+
+        translations = [item for item in parse_lrc(tlyric) if item[1]]
+        trans_times = [t for t, _ in translations]
+
+        def find_translation(t):
+            if not trans_times:
+                return ''
+            i = bisect_right(trans_times, t)
+            # 取时间最接近的一行
+            candidates = [j for j in (i - 1, i) if 0 <= j < len(trans_times)]
+            j = min(candidates, key=lambda j: abs(trans_times[j] - t))
+            return translations[j][1] if abs(trans_times[j] - t) <= TRANSLATION_TOLERANCE else ''
+
+        self.lines = [
+            (start, duration, content, find_translation(start), words)
+            for start, duration, content, words in lines
+        ]
+        self.times = [line[0] for line in self.lines]
+
+    def lookup(self, position):
+        """
+        查找播放进度（毫秒）对应的歌词
+
+        Returns:
+            {
+                'index': int,        # 当前行索引（-1 表示第一行之前）
+                'line': dict|None,   # 当前行
+                'word': dict|None,   # 当前字（仅 YRC）
+                'next_time': int|None  # 下一行开始时间
+            }
+        """
+        index = bisect_right(self.times, position) - 1
+        result = {
+            'index': index,
+            'line': None,
+            'word': None,
+            'next_time': self.times[index + 1] if index + 1 < len(self.times) else None
+        }
+        if index < 0:
+            return result
+
+        start, duration, content, translation, words = self.lines[index]
+        result['line'] = {
+            'time': start,
+            'duration': duration,
+            'text': content,
+            'translation': translation
+        }
+        if words:
+            word_index = bisect_right([w[0] for w in words], position) - 1
+            if word_index >= 0:
+                w_start, w_duration, word = words[word_index]
+                result['word'] = {
+                    'index': word_index,
+                    'time': w_start,
+                    'duration': w_duration,
+                    'text': word,
+                    # 当前字的演唱进度 0~1
+                    'progress': min(1.0, (position - w_start) / w_duration) if w_duration > 0 else 1.0
+                }
+        return result
+
+    def to_compact(self):
+        """紧凑格式：[[开始, 时长, 原文, 翻译, [[开始, 时长, 字], ...]], ...]"""
+        return {
+            'type': self.type,
+            'lines': [
+                [start, duration, content, translation, [list(w) for w in words]]
+                for start, duration, content, translation, words in self.lines
+            ]
+        }
@@ -17,6 +17,9 @@ from homeassistant.const import (
 )
 
 from .const import CONF_NEXT_TRACK_TIMING, DEFAULT_NEXT_TRACK_TIMING, FM_MODES, DEFAULT_FM_MODE
+from .models.music_info import MusicSource
+from .models.play_order import PlayOrder
+from .fm_buffer import FmBuffer
 
 from .manifest import manifest
 
@@ -32,6 +35,23 @@ SUPPORT_FEATURES = MediaPlayerEntityFeature.VOLUME_STEP | MediaPlayerEntityFeatu
 TIME_BETWEEN_UPDATES = datetime.timedelta(seconds=1)
 UNSUB_INTERVAL = None
 
+# 状态属性中最多列出的无法播放歌曲数
+DEAD_TRACKS_ATTR_LIMIT = 50
+
+# 下一曲预取：在当前歌曲结束前若干秒，提前解析接下来几首歌的播放链接和歌词
+PREFETCH_BEFORE_END = 20   # 秒
+PREFETCH_TRACK_COUNT = 2
+# 可通过 song_url 解析的歌曲来源
+PREFETCH_SOURCES = (
+    MusicSource.PLAYLIST.value,
+    MusicSource.ARTISTS.value,
+    MusicSource.DJRADIO.value,
+    MusicSource.CLOUD.value,
+)
+
+# 私人 FM：播放列表中当前歌曲之后保持的歌曲数（其余在 FmBuffer 中后台补充）
+FM_QUEUE_AHEAD = 2
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -88,16 +108,23 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
 
         # 播放列表管理 - 方案C随机播放
 
-        self._playlist_origin = []   # 原始顺序列表
+        self._playlist_origin = PlayOrder()   # 原始顺序（playlist 上的索引排列）
 
-        self._playlist_active = []   # 实际播放队列（随机或原始）
+        self._playlist_active = PlayOrder()   # 实际播放队列（随机或原始，同样是索引排列）
 
         self._play_index = 0         # 当前播放索引
 
         # ========== 私人 FM 状态管理 ==========
         self._fm_mode = None           # 当前 FM 模式名称（None = 普通模式）
         self._is_fm_playing = False    # 是否处于 FM 播放模式
-        self._fm_preloading = False    # 是否正在预加载 FM 歌曲（防止重复请求）
+        self._fm_buffer = None         # FM 待播缓冲区（后台补充）
+
+        # 已预取下一曲的歌曲 ID（每首歌只预取一次）
+        self._prefetched_song_id = None
+
+        # 列表中已知无法播放的歌曲：(播放列表, 长度, dead_songs_version) -> 歌曲列表
+        self._dead_tracks_key = None
+        self._dead_tracks = []
 
 
     def interval(self, now):
@@ -189,6 +216,14 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
                 if self.before_state['media_duration'] > 0:
                     delta = self._attr_media_duration - self._attr_media_position
                     
+                    # 临近结束：后台预取接下来几首歌，切歌时直接命中缓存
+                    current_song_id = getattr(self, '_current_song_id', None)
+                    if delta <= PREFETCH_BEFORE_END and current_song_id and self._prefetched_song_id != current_song_id:
+                        self._prefetched_song_id = current_song_id
+                        self.hass.loop.call_soon_threadsafe(
+                            lambda: self.hass.create_task(self._async_prefetch_next_tracks())
+                        )
+                    
                     # 计算触发窗口：
                     # 如果是延迟(>0)，窗口为 1秒 (在结束前1秒触发调度)
                     # 如果是提前(<0)，窗口为 提前量 + 1秒 (例如提前5秒，窗口为6秒)
@@ -247,6 +282,47 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
         # 状态更新由切歌、播放、暂停等操作自动触发
         # 这样可以避免数据库每秒写入，大幅降低系统负载
 
+    def _next_tracks(self, count):
+        """接下来将要播放的歌曲（与 async_media_next_track 的切歌顺序一致）"""
+        if self._attr_shuffle:
+            queue = self._playlist_active
+        else:
+            queue = getattr(self, 'playlist', [])
+        if not queue:
+            return []
+        tracks = []
+        for offset in range(1, count + 1):
+            index = self._play_index + offset
+            if index >= len(queue):
+                # 随机模式播完一轮会重新洗牌，FM 模式会追加新歌，都无法预知
+                if self._attr_shuffle or self._is_fm_playing:
+                    break
+                index %= len(queue)
+            tracks.append(queue[index])
+        return tracks
+
+    async def _async_prefetch_next_tracks(self):
+        """后台解析下一曲的播放链接和歌词（结果进入 CloudMusic 的缓存）"""
+        # FM 模式先从缓冲区补足后续歌曲，切歌时无需等待接口
+        if self._is_fm_playing:
+            await self._async_preload_fm_tracks()
+
+        tracks = [music_info for music_info in self._next_tracks(PREFETCH_TRACK_COUNT)
+                  if music_info.source in PREFETCH_SOURCES and not self.cloud_music.is_music_dead(music_info)]
+
+        if not tracks:
+            return
+        _LOGGER.debug(f"预取下一曲: {', '.join(music_info.song for music_info in tracks)}")
+
+        # 播放链接一次批量解析，歌词逐首获取
+        results = await asyncio.gather(
+            self.cloud_music.async_song_urls([music_info.id for music_info in tracks]),
+            *(self.cloud_music.async_get_lyric(music_info.id) for music_info in tracks),
+            return_exceptions=True
+        )
+        if isinstance(results[0], Exception):
+            _LOGGER.debug(f"预取下一曲失败: {results[0]}")
+
     @property
     def media_player(self):
         if self.entity_id is not None and self.source_media_player is not None:
@@ -258,8 +334,7 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
         if self._attr_shuffle and hasattr(self, '_playlist_active') and hasattr(self, '_play_index'):
             try:
                 if 0 <= self._play_index < len(self._playlist_active):
-                    current_song = self._playlist_active[self._play_index]
-                    return self.playlist.index(current_song)
+                    return self._playlist_active.track_index(self._play_index)
             except (ValueError, AttributeError, IndexError):
                 pass
         return getattr(self, '_play_index', 0)
@@ -294,8 +369,28 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
         if hasattr(self, '_current_song_id') and self._current_song_id:
             attributes['song_id'] = self._current_song_id
         
+        # 当前列表中已知无法播放的歌曲（切歌时自动跳过）
+        dead_tracks = self._get_dead_tracks()
+        if dead_tracks:
+            attributes['dead_track_count'] = len(dead_tracks)
+            attributes['dead_tracks'] = [
+                f'{music_info.song} - {music_info.singer} ({music_info.id})'
+                for music_info in dead_tracks[:DEAD_TRACKS_ATTR_LIMIT]
+            ]
+        
         return attributes
 
+    def _get_dead_tracks(self):
+        """当前列表中已知无法播放的歌曲（列表或无法播放的歌曲有变化时才重新统计）"""
+        playlist = getattr(self, 'playlist', [])
+        version = self.cloud_music.dead_songs_version
+        key = self._dead_tracks_key
+        if key is None or key[0] is not playlist or key[1] != len(playlist) or key[2] != version:
+            self._dead_tracks = [music_info for music_info in playlist
+                                 if self.cloud_music.is_music_dead(music_info)]
+            self._dead_tracks_key = (playlist, len(playlist), version)
+        return self._dead_tracks
+
     async def async_browse_media(self, media_content_type=None, media_content_id=None):
         return await self.cloud_music.async_browse_media(self, media_content_type, media_content_id)
 
@@ -450,9 +545,9 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
 
         if playlist_len <= 3:
 
-            self._playlist_active = list(self._playlist_origin)
+            self._playlist_active = self._playlist_origin.copy()
 
-            random.shuffle(self._playlist_active)
+            self._playlist_active.shuffle()
 
             _LOGGER.debug(f"小歌单({playlist_len}首)完全随机打乱")
 
@@ -478,9 +573,9 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
 
         # 打乱整个列表
 
-        self._playlist_active = list(self._playlist_origin)
+        self._playlist_active = self._playlist_origin.copy()
 
-        random.shuffle(self._playlist_active)
+        self._playlist_active.shuffle()
 
         
 
@@ -514,7 +609,7 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
 
                 # 有重复，重新打乱
 
-                random.shuffle(self._playlist_active)
+                self._playlist_active.shuffle()
 
                 retry_count += 1
 
@@ -585,8 +680,7 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
                 current_index = self._playlist_active.index(current_song)
                 # 将当前歌和第一首歌交换位置
                 if current_index != 0:
-                    self._playlist_active[0], self._playlist_active[current_index] = \
-                        self._playlist_active[current_index], self._playlist_active[0]
+                    self._playlist_active.swap(0, current_index)
                 self._play_index = 0
                 _LOGGER.debug(f"开启随机播放，打乱 {len(self._playlist_active)} 首歌，当前歌已移到索引 0")
             except ValueError:
@@ -600,7 +694,7 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
 
             # 关闭随机：恢复原始顺序
 
-            self._playlist_active = list(self.playlist)
+            self._playlist_active = PlayOrder(self.playlist)
 
             # 找到当前歌在原始列表中的位置（安全处理）
 
@@ -644,20 +738,22 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
             self._attr_shuffle = False
             _LOGGER.info("进入 FM 模式，自动关闭随机播放")
         
-        # 2. 获取 FM 歌曲
-        tracks = await self.cloud_music.async_get_personal_fm_mode(mode, submode)
+        # 2. 获取 FM 歌曲（缓冲区在后台继续补充）
+        if self._fm_buffer is not None:
+            self._fm_buffer.cancel()
+        self._fm_buffer = FmBuffer(self.cloud_music, mode, submode)
+        tracks = await self._fm_buffer.async_take(FM_QUEUE_AHEAD + 1)
         
         if not tracks:
             _LOGGER.error("获取私人 FM 歌曲失败")
-            self._is_fm_playing = False
-            self._fm_mode = None
+            self.exit_fm_mode()
             self.cloud_music.notification("获取私人 FM 失败，请检查登录状态")
             return
         
         # 3. 设置播放列表
         self.playlist = tracks
-        self._playlist_origin = list(tracks)
-        self._playlist_active = list(tracks)
+        self._playlist_origin = PlayOrder(tracks)
+        self._playlist_active = PlayOrder(tracks)
         self._play_index = 0
         
         # 4. 开始播放第一首
@@ -694,47 +790,37 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
 
     async def _async_preload_fm_tracks(self):
         """
-        预加载 FM 歌曲（当剩余歌曲不足时调用）
-        
-        触发条件：播放列表剩余 ≤ 2 首歌
+        从 FM 缓冲区补充播放列表
+
+        保证当前歌曲之后至少有 FM_QUEUE_AHEAD 首；缓冲区本身在后台并发补充，
+        通常在当前歌曲结束前就已就绪
         """
-        if not self._is_fm_playing or self._fm_preloading:
-            return
-        
-        if self._fm_mode not in FM_MODES:
+        if not self._is_fm_playing or self._fm_buffer is None:
             return
         
-        # 检查剩余歌曲数
+        buffer = self._fm_buffer
         remaining = len(self.playlist) - self._play_index - 1
-        if remaining > 2:
+        if remaining >= FM_QUEUE_AHEAD:
+            buffer.schedule_fill()
             return
         
-        self._fm_preloading = True
-        _LOGGER.info(f"🔄 FM 预加载：剩余 {remaining} 首，开始获取更多歌曲")
-        
         try:
-            mode, submode = FM_MODES[self._fm_mode]
-            new_tracks = await self.cloud_music.async_get_personal_fm_mode(mode, submode)
-            
-            if new_tracks:
-                # 去重：过滤掉已存在于播放列表中的歌曲
-                existing_ids = {str(song.id) for song in self.playlist if hasattr(song, 'id')}
-                unique_tracks = [t for t in new_tracks if str(t.id) not in existing_ids]
-                
-                if unique_tracks:
-                    # 追加到播放列表
-                    self.playlist.extend(unique_tracks)
-                    self._playlist_origin.extend(unique_tracks)
-                    self._playlist_active.extend(unique_tracks)
-                    _LOGGER.info(f"FM 预加载完成：追加 {len(unique_tracks)} 首新歌曲（过滤 {len(new_tracks) - len(unique_tracks)} 首重复），总计 {len(self.playlist)} 首")
-                else:
-                    _LOGGER.warning(f"FM 预加载：API 返回 {len(new_tracks)} 首歌曲，但都是重复的")
-            else:
-                _LOGGER.warning("FM 预加载失败：API 返回空列表")
+            new_tracks = await buffer.async_take(FM_QUEUE_AHEAD - remaining)
         except Exception as e:
             _LOGGER.error(f"FM 预加载异常: {e}")
-        finally:
-            self._fm_preloading = False
+            return
+        
+        # 等待期间已退出或切换了 FM 模式
+        if buffer is not self._fm_buffer:
+            return
+        if new_tracks:
+            # 缓冲区已按歌曲 ID 去重，直接追加
+            self.playlist.extend(new_tracks)
+            self._playlist_origin.sync()
+            self._playlist_active.sync()
+            _LOGGER.info(f"FM 预加载完成：追加 {len(new_tracks)} 首新歌曲，总计 {len(self.playlist)} 首，缓冲 {len(buffer)} 首")
+        else:
+            _LOGGER.warning("FM 预加载失败：没有获取到新歌曲")
 
     async def async_fm_trash(self):
         """
@@ -770,7 +856,9 @@ class CloudMusicMediaPlayer(MediaPlayerEntity):
             _LOGGER.info("退出私人 FM 模式")
             self._is_fm_playing = False
             self._fm_mode = None
-            self._fm_preloading = False
+        if self._fm_buffer is not None:
+            self._fm_buffer.cancel()
+            self._fm_buffer = None
 
 
     async def async_media_next_track(self):
@@ -0,0 +1,151 @@
+"""
+歌曲/专辑/歌手元数据持久化（SQLite）
+
+歌曲详情、专辑曲目这类数据几乎不会变化，落盘后重启也无需重新下载。
+所有磁盘操作都在 executor 线程中执行，不阻塞事件循环。
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# 单条 SQL 最多绑定的参数个数（SQLite 默认上限 999）
+_QUERY_CHUNK = 500
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS song (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS album (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS artist (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at INTEGER NOT NULL)',
+)
+
+
+class MetadataStore:
+    """元数据存储（song / album / artist 三张表，值为接口原始 JSON）"""
+
+    def __init__(self, hass, filepath):
+        self.hass = hass
+        self.filepath = filepath
+        self._conn = None
+        self._lock = threading.Lock()
+        # 统计
+        self.hits = 0
+        self.misses = 0
+
+    # ==================== executor 线程内执行 ====================
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.filepath, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for sql in _SCHEMA:
+                conn.execute(sql)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _get_many(self, table, ids):
+        result = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(ids), _QUERY_CHUNK):
+                chunk = ids[i:i + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT id, data FROM {table} WHERE id IN ({placeholders})', chunk
+                ).fetchall()
+                for key, data in rows:
+                    result[key] = json.loads(data)
+        return result
+
+    def _put_many(self, table, items):
+        now = int(time.time())
+        rows = [(key, json.dumps(value, ensure_ascii=False), now) for key, value in items]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                f'INSERT OR REPLACE INTO {table} (id, data, updated_at) VALUES (?, ?, ?)', rows
+            )
+            conn.commit()
+
+    def _merge_one(self, table, key, fields):
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(f'SELECT data FROM {table} WHERE id = ?', (key,)).fetchone()
+            data = json.loads(row[0]) if row else {}
+            data.update(fields)
+            conn.execute(
+                f'INSERT OR REPLACE INTO {table} (id, data, updated_at) VALUES (?, ?, ?)',
+                (key, json.dumps(data, ensure_ascii=False), int(time.time()))
+            )
+            conn.commit()
+            return data
+
+    def _close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ==================== 异步接口 ====================
+
+    async def _async_get_many(self, table, ids):
+        keys = [str(i) for i in ids]
+        if not keys:
+            return {}
+        try:
+            result = await self.hass.async_add_executor_job(self._get_many, table, keys)
+        except Exception as e:
+            _LOGGER.warning(f"读取元数据缓存失败 ({table}): {e}")
+            result = {}
+        self.hits += len(result)
+        self.misses += len(keys) - len(result)
+        return result
+
+    async def _async_put_many(self, table, items):
+        if not items:
+            return
+        try:
+            await self.hass.async_add_executor_job(self._put_many, table, items)
+        except Exception as e:
+            _LOGGER.warning(f"写入元数据缓存失败 ({table}): {e}")
+
+    async def async_get_songs(self, ids) -> dict:
+        """批量读取歌曲详情，返回 {str(id): song}（未命中的不在结果中）"""
+        return await self._async_get_many('song', ids)
+
+    async def async_put_songs(self, songs):
+        """保存 /song/detail 返回的 songs 列表"""
+        await self._async_put_many('song', [(str(song['id']), song) for song in songs if song.get('id') is not None])
+
+    async def async_get_album(self, album_id):
+        """读取专辑（/album 接口的 album + songs）"""
+        result = await self._async_get_many('album', [album_id])
+        return result.get(str(album_id))
+
+    async def async_put_album(self, album_id, data):
+        await self._async_put_many('album', [(str(album_id), data)])
+
+    async def async_get_artist(self, artist_id):
+        result = await self._async_get_many('artist', [artist_id])
+        return result.get(str(artist_id))
+
+    async def async_update_artist(self, artist_id, fields):
+        """合并更新歌手信息（不同接口提供的字段不同）"""
+        try:
+            return await self.hass.async_add_executor_job(self._merge_one, 'artist', str(artist_id), fields)
+        except Exception as e:
+            _LOGGER.warning(f"写入歌手缓存失败: {e}")
+
+    async def async_close(self):
+        await self.hass.async_add_executor_job(self._close)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -1,4 +1,4 @@
-import enum
+import enum, sys
 
 class MusicSource(enum.Enum):
 
@@ -9,14 +9,20 @@ class MusicSource(enum.Enum):
     ARTISTS = 5
     CLOUD = 6
 
+def _intern(value):
+    # 歌手、专辑名在大歌单中大量重复，驻留后共享同一个字符串对象
+    return sys.intern(value) if isinstance(value, str) else value
+
 class MusicInfo:
 
+    __slots__ = ('_id', '_song', '_singer', '_duration', '_album', '_url', '_picUrl', '_source')
+
     def __init__(self, id, song, singer, album, duration, url, picUrl, source) -> None:
         self._id = id
         self._song = song
-        self._singer = singer
+        self._singer = _intern(singer)
         self._duration = duration
-        self._album = album
+        self._album = _intern(album)
         self._url = url
         self._picUrl = picUrl
         self._source = source
@@ -43,6 +49,9 @@ class MusicInfo:
 
     @property
     def url(self):
+        # 支持延迟生成：传入可调用对象时，首次访问才计算并缓存
+        if callable(self._url):
+            self._url = self._url()
         return self._url
 
     @property
@@ -0,0 +1,62 @@
+import random
+from array import array
+
+# 索引的存储类型：无符号 4 字节整数（'l' 在 64 位 Linux 上是 8 字节，与列表槽位一样大）
+_INDEX_TYPECODE = 'I'
+
+class PlayOrder:
+    '''
+    播放顺序
+
+    不复制歌曲对象，只在共享的歌曲列表（media_player.playlist）上保存一组整数索引，
+    原始顺序和随机顺序都是同一张表的不同排列
+    '''
+
+    __slots__ = ('_tracks', '_order')
+
+    def __init__(self, tracks=None, order=None) -> None:
+        self._tracks = [] if tracks is None else tracks
+        self._order = array(_INDEX_TYPECODE, range(len(self._tracks)) if order is None else order)
+
+    @property
+    def tracks(self):
+        return self._tracks
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._tracks[i] for i in self._order[position]]
+        return self._tracks[self._order[position]]
+
+    def __iter__(self):
+        tracks = self._tracks
+        return (tracks[i] for i in self._order)
+
+    def track_index(self, position):
+        '''播放位置对应的歌曲表索引'''
+        return self._order[position]
+
+    def index(self, music_info):
+        '''歌曲在当前顺序中的位置（按对象查找，找不到抛出 ValueError）'''
+        return self._order.index(self._tracks.index(music_info))
+
+    def sync(self):
+        '''歌曲表追加了新歌时，把新歌的索引接到顺序末尾'''
+        self._order.extend(range(len(self._order), len(self._tracks)))
+
+    def shuffle(self, start=0):
+        '''打乱 start 之后的部分（默认整体打乱）'''
+        rest = self._order[start:].tolist()
+        random.shuffle(rest)
+        self._order[start:] = array(_INDEX_TYPECODE, rest)
+
+    def swap(self, i, j):
+        self._order[i], self._order[j] = self._order[j], self._order[i]
+
+    def move_to_front(self, position):
+        self._order.insert(0, self._order.pop(position))
+
+    def copy(self):
+        return PlayOrder(self._tracks, self._order)
@@ -0,0 +1,57 @@
+"""
+持久化（Home Assistant Store）
+
+数据由 homeassistant.helpers.storage.Store 保存在 .storage/ 下，
+延迟合并写入、原子替换和关闭时写入都由 Store 负责。
+旧版本直接把 JSON 写在 .storage/cloud_music.* 文件里（没有 Store 的版本信息），
+首次加载时读取一次，保存到 Store 后删除旧文件。
+"""
+
+import logging
+import os
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util.json import load_json
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+def create_store(hass, key, private=False) -> Store:
+    """创建 Store（含凭据的数据仅所有者可读写）"""
+    return Store(hass, STORAGE_VERSION, key, private=private, atomic_writes=True)
+
+
+def _load_legacy(filepath):
+    if not os.path.exists(filepath):
+        return None
+    return load_json(filepath, None)
+
+
+def _remove_legacy(filepath):
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+
+async def async_load_store(hass, store: Store, legacy_filepath, default):
+    """
+    读取 Store，没有数据时迁移旧版本的 JSON 文件
+
+    Returns:
+        已保存的数据，不存在或读取失败时返回 default
+    """
+    try:
+        data = await store.async_load()
+        if data is not None:
+            return data
+        data = await hass.async_add_executor_job(_load_legacy, legacy_filepath)
+        if data is None:
+            return default
+        await store.async_save(data)
+        await hass.async_add_executor_job(_remove_legacy, legacy_filepath)
+        _LOGGER.info(f"已迁移 {legacy_filepath} 到 .storage/{store.key}")
+        return data
+    except Exception as e:
+        _LOGGER.warning(f"读取 .storage/{store.key} 失败: {e}")
+        return default
@@ -0,0 +1,85 @@
+"""
+音质信息
+
+Subsonic / Jellyfin 列表需要每首歌的格式、码率、采样率。/song/url/v1 支持一次
+传入多个 id，整张专辑 / 歌单的歌曲通过 CloudMusic.async_fetch_official_urls 分批请求
+（与批量获取播放链接共用，并发批数统一限制），结果按 (歌曲ID, 音质) 缓存。
+返回值沿用 /song/url/v1 的字段名（type / br / sr / size / level），
+格式化函数可直接使用。
+"""
+
+import logging
+
+from .cache import TTLCache
+
+_LOGGER = logging.getLogger(__name__)
+
+# 缓存：容量 / 有效期（秒），同一账号下歌曲的可用音质很少变化
+# 容量按几千首的大歌单整张列表计算；条目存为元组，占用较小
+QUALITY_CACHE_SIZE = 20000
+QUALITY_CACHE_TTL = 12 * 3600
+
+_QUALITY_FIELDS = ('type', 'br', 'sr', 'size', 'level')
+
+
+def _quality_info(data):
+    """/song/url/v1 数据 -> 音质元组，无播放链接时为空元组"""
+    if data.get('url') and data.get('type'):
+        return tuple(data.get(key) for key in _QUALITY_FIELDS)
+    return ()
+
+
+class QualityResolver:
+    """批量获取歌曲实际音质（按用户配置的音质级别和账号权限）"""
+
+    def __init__(self, cloud_music):
+        self.cloud_music = cloud_music
+        self._cache = TTLCache(QUALITY_CACHE_SIZE)
+
+    def clear(self):
+        """账号变化后音质权限不同（登录/退出时调用）"""
+        self._cache.clear()
+
+    def record(self, official_data, level):
+        """
+        写入官方接口返回的音质（async_fetch_official_urls 调用）
+
+        Args:
+            official_data: {str(id): /song/url/v1 原始数据}，无播放链接的歌曲也缓存，避免反复请求
+        """
+        for song_id, data in official_data.items():
+            self._cache.set((song_id, level), _quality_info(data), QUALITY_CACHE_TTL)
+
+    async def async_get_many(self, ids, level=None) -> dict:
+        """
+        批量获取音质
+
+        Returns:
+            {str(id): {'type', 'br', 'sr', 'size', 'level'}}，无法播放或获取失败的歌曲不在结果中
+        """
+        level = level or self.cloud_music.audio_quality
+        all_ids = list(dict.fromkeys(str(i) for i in ids if i is not None))
+        infos = {}
+        missing = []
+        for song_id in all_ids:
+            info = self._cache.get((song_id, level))
+            if info is None:
+                missing.append(song_id)
+            else:
+                infos[song_id] = info
+
+        if missing:
+            official_data = await self.cloud_music.async_fetch_official_urls(missing, level)
+            for song_id, data in official_data.items():
+                infos[song_id] = _quality_info(data)
+
+        return {song_id: dict(zip(_QUALITY_FIELDS, info)) for song_id, info in infos.items() if info}
+
+    async def async_get(self, song_id, level=None):
+        """单首歌曲的音质，获取不到返回 None"""
+        return (await self.async_get_many([song_id], level)).get(str(song_id))
+
+    def stats(self):
+        return {
+            'cache': self._cache.stats()
+        }
@@ -0,0 +1,209 @@
+"""
+搜索服务
+
+Subsonic search3、Jellyfin /Items 和搜索按钮共用。多个类型的 /cloudsearch
+并发请求，整体设置截止时间：超时的类型不再等待，先返回已完成的部分结果。
+
+搜索结果按 (关键词, 类型) 缓存一段连续的结果窗口，更小的 limit / 落在窗口内的
+offset 直接从缓存切片；输入联想 (/search/suggest) 单独缓存并在服务端防抖。
+"""
+
+import asyncio
+import logging
+from urllib.parse import quote
+
+from .cache import TTLCache
+from .const import (
+    SEARCH_TYPE_SONG,
+    SEARCH_TYPE_ALBUM,
+    SEARCH_TYPE_ARTIST,
+    SEARCH_TYPE_PLAYLIST,
+    SEARCH_TYPE_RADIO,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# 搜索类型 -> (/cloudsearch 的 type 参数, 结果字段)
+SEARCH_TYPES = {
+    SEARCH_TYPE_SONG: (1, 'songs'),
+    SEARCH_TYPE_ALBUM: (10, 'albums'),
+    SEARCH_TYPE_ARTIST: (100, 'artists'),
+    SEARCH_TYPE_PLAYLIST: (1000, 'playlists'),
+    SEARCH_TYPE_RADIO: (1009, 'djRadios'),
+}
+
+# 多类型搜索的整体截止时间（秒）
+SEARCH_TIMEOUT = 5.0
+
+# 搜索结果缓存：容量 / 有效期（秒）/ 每次向上游至少请求的条数（便于之后更大的 limit 命中）
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 600
+SEARCH_MIN_FETCH = 30
+
+# 输入联想：容量 / 有效期（秒）/ 防抖时间（秒）
+SUGGEST_CACHE_SIZE = 512
+SUGGEST_CACHE_TTL = 600
+SUGGEST_DEBOUNCE = 0.3
+
+
+def _consume_result(task):
+    """截止后仍在运行的请求结束时取走异常，避免 "exception was never retrieved" """
+    if not task.cancelled():
+        task.exception()
+
+
+def normalize_keyword(keyword):
+    """缓存用的关键词：去掉首尾及重复空白，忽略大小写"""
+    return ' '.join((keyword or '').split()).casefold()
+
+
+class SearchService:
+    """多类型并发搜索"""
+
+    def __init__(self, cloud_music):
+        self.cloud_music = cloud_music
+        # (关键词, 类型) -> (起始 offset, 条目列表, 是否已到结果末尾)
+        self._cache = TTLCache(SEARCH_CACHE_SIZE)
+        # 关键词 -> 联想词列表
+        self._suggest_cache = TTLCache(SUGGEST_CACHE_SIZE)
+        # 客户端 -> 最新联想请求的序号（防抖）
+        self._suggest_generation = {}
+        # 统计
+        self.searches = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.suggest_superseded = 0
+
+    @staticmethod
+    def _slice(entry, offset, limit):
+        """从缓存窗口中切出 [offset, offset + limit)，窗口不能覆盖时返回 None"""
+        start_offset, items, exhausted = entry
+        start = offset - start_offset
+        if start < 0:
+            return None
+        if start + limit <= len(items) or exhausted:
+            return items[start:start + limit]
+        return None
+
+    async def async_search(self, keyword, search_type, limit=30, offset=0) -> list:
+        """
+        搜索单个类型（优先从缓存窗口切片）
+
+        Returns:
+            /cloudsearch 返回的原始条目列表
+
+        Raises:
+            ValueError: 接口返回异常
+        """
+        key = (normalize_keyword(keyword), search_type)
+        entry = self._cache.get(key)
+        if entry is not None:
+            items = self._slice(entry, offset, limit)
+            if items is not None:
+                return items
+
+        api_type, field = SEARCH_TYPES[search_type]
+        fetch_limit = max(limit, SEARCH_MIN_FETCH)
+        res = await self.cloud_music.netease_cloud_music(
+            f'/cloudsearch?keywords={quote(keyword.strip())}&type={api_type}&limit={fetch_limit}&offset={offset}'
+        )
+        if res.get('code') != 200:
+            raise ValueError(res.get('message') or res.get('msg') or f"code={res.get('code')}")
+        items = (res.get('result') or {}).get(field) or []
+        exhausted = len(items) < fetch_limit
+
+        # 与已缓存的窗口首尾相接时合并，否则替换
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] <= offset <= entry[0] + len(entry[1]):
+            merged = entry[1][:offset - entry[0]] + items
+            self._cache.set(key, (entry[0], merged, exhausted), SEARCH_CACHE_TTL)
+        else:
+            self._cache.set(key, (offset, items, exhausted), SEARCH_CACHE_TTL)
+        return items[:limit]
+
+    async def async_search_many(self, keyword, limits, timeout=SEARCH_TIMEOUT) -> dict:
+        """
+        并发搜索多个类型
+
+        Args:
+            limits: {搜索类型: 条数}，条数 <= 0 的类型跳过
+            timeout: 整体截止时间（秒）
+
+        Returns:
+            {搜索类型: 条目列表}，超时或失败的类型不在结果中
+        """
+        tasks = {
+            search_type: asyncio.ensure_future(self.async_search(keyword, search_type, limit))
+            for search_type, limit in limits.items() if limit > 0
+        }
+        if not tasks:
+            return {}
+        self.searches += 1
+
+        done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        result = {}
+        for search_type, task in tasks.items():
+            if task in pending:
+                # 不取消：相同请求可能被其他调用方通过 single-flight 共享
+                self.timeouts += 1
+                task.add_done_callback(_consume_result)
+                _LOGGER.warning(f"搜索超时 ({search_type}): {keyword}")
+                continue
+            if task.exception() is not None:
+                self.failures += 1
+                _LOGGER.error(f"搜索失败 ({search_type}): {task.exception()}")
+                continue
+            result[search_type] = task.result()
+        return result
+
+    async def async_suggest(self, keyword, client=None):
+        """
+        输入联想（/search/suggest）
+
+        Args:
+            client: 客户端标识。同一客户端在防抖时间内有新的请求时，旧请求不再访问上游
+
+        Returns:
+            联想词列表；被同一客户端的新请求取代时返回 None
+        """
+        key = normalize_keyword(keyword)
+        if not key:
+            return []
+        suggestions = self._suggest_cache.get(key)
+        if suggestions is not None:
+            return suggestions
+
+        if client is not None:
+            generation = self._suggest_generation.get(client, 0) + 1
+            self._suggest_generation[client] = generation
+            await asyncio.sleep(SUGGEST_DEBOUNCE)
+            if self._suggest_generation.get(client) != generation:
+                self.suggest_superseded += 1
+                return None
+            del self._suggest_generation[client]
+            # 防抖期间可能已被其他请求缓存
+            suggestions = self._suggest_cache.get(key)
+            if suggestions is not None:
+                return suggestions
+
+        res = await self.cloud_music.netease_cloud_music(
+            f'/search/suggest?keywords={quote(keyword.strip())}&type=mobile'
+        )
+        if res.get('code') != 200:
+            raise ValueError(res.get('message') or res.get('msg') or f"code={res.get('code')}")
+        suggestions = [
+            item['keyword'] for item in (res.get('result') or {}).get('allMatch') or []
+            if item.get('keyword')
+        ]
+        self._suggest_cache.set(key, suggestions, SUGGEST_CACHE_TTL)
+        return suggestions
+
+    def stats(self):
+        return {
+            'searches': self.searches,
+            'timeouts': self.timeouts,
+            'failures': self.failures,
+            'cache': self._cache.stats(),
+            'suggest_cache': self._suggest_cache.stats(),
+            'suggest_superseded': self.suggest_superseded
+        }
@@ -26,6 +26,7 @@ from .const import (
     CONF_DEFAULT_PLAYER,
 )
 from .manifest import manifest
+from .models.play_order import PlayOrder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -235,6 +236,8 @@ class CloudMusicSearchResults(SelectEntity):
                 # 设置 media_player 的 playlist 和 _play_index
                 if media_player_obj:
                     media_player_obj.playlist = [music_info]
+                    media_player_obj._playlist_origin = PlayOrder(media_player_obj.playlist)
+                    media_player_obj._playlist_active = PlayOrder(media_player_obj.playlist)
                     media_player_obj._play_index = 0
                     _LOGGER.info(f"已设置 playlist: {music_info.song}, 封面: {music_info.picUrl}")
                 else:
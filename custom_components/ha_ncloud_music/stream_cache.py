@@ -0,0 +1,86 @@
+"""
+播放链接缓存
+
+网易云 CDN 链接是带签名的临时地址，路径中包含 14 位过期时间
+（北京时间 yyyyMMddHHmmss），/song/url/v1 也会返回有效秒数 expi。
+缓存以 (歌曲ID, 音质, 来源) 为 key，在链接过期前提前淘汰。
+"""
+
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from .cache import TTLCache
+
+# 容量
+STREAM_CACHE_SIZE = 256
+# 提前淘汰的安全余量（秒），避免把即将失效的链接交给播放器
+STREAM_EXPIRE_MARGIN = 60
+# 无法判断过期时间时的默认有效期（秒）
+STREAM_DEFAULT_TTL = 300
+
+# CDN 链接路径中的过期时间，如 http://m701.music.126.net/20240101123456/xxxx/...
+_EXPIRE_PATTERN = re.compile(r'^https?://[^/]+/(\d{14})/')
+_CST = timezone(timedelta(hours=8))
+
+
+def parse_url_expire(url):
+    """从网易云 CDN 链接中解析过期时间（Unix 时间戳），无法解析返回 None"""
+    match = _EXPIRE_PATTERN.match(url or '')
+    if match is None:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%Y%m%d%H%M%S').replace(tzinfo=_CST).timestamp()
+    except ValueError:
+        return None
+
+
+class StreamUrlCache:
+    """播放链接缓存（HttpView / Subsonic / Jellyfin 共用）"""
+
+    def __init__(self, maxsize=STREAM_CACHE_SIZE):
+        self._cache = TTLCache(maxsize)
+
+    @staticmethod
+    def _key(song_id, level, source):
+        return (str(song_id), level, source)
+
+    def get(self, song_id, level, source):
+        return self._cache.get(self._key(song_id, level, source))
+
+    def set(self, song_id, level, source, url, value=None, expires_in=None):
+        """
+        缓存播放链接
+
+        Args:
+            url: 播放链接（用于解析过期时间）
+            value: 实际缓存的值，默认为 url
+            expires_in: 接口返回的有效秒数（如 expi），优先于链接中的时间
+        """
+        if not url:
+            return
+        ttl = self.get_ttl(url, expires_in)
+        if ttl > 0:
+            self._cache.set(self._key(song_id, level, source), url if value is None else value, ttl)
+
+    @staticmethod
+    def get_ttl(url, expires_in=None):
+        """计算可缓存的秒数（已扣除安全余量）"""
+        ttl = None
+        expire_at = parse_url_expire(url)
+        if expire_at is not None:
+            ttl = expire_at - time.time()
+        if expires_in:
+            ttl = expires_in if ttl is None else min(ttl, expires_in)
+        if ttl is None:
+            ttl = STREAM_DEFAULT_TTL
+        return ttl - STREAM_EXPIRE_MARGIN
+
+    def pop(self, song_id, level, source):
+        return self._cache.pop(self._key(song_id, level, source))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
@@ -16,12 +16,26 @@ import logging
 from aiohttp import web
 from homeassistant.components.http import HomeAssistantView
 
+from .const import SEARCH_TYPE_SONG, SEARCH_TYPE_ALBUM, SEARCH_TYPE_ARTIST, SEARCH_TYPE_PLAYLIST
+from .subsonic_serializer import (
+    EXECUTOR_THRESHOLD,
+    async_stream_response,
+    count_entries,
+    iter_json,
+    iter_xml,
+    xml_escape,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 # Subsonic API 版本
 SUBSONIC_API_VERSION = "1.16.1"
 SERVER_NAME = "ha_ncloud_music"
 
+# 封面图片的客户端缓存时间（秒），每日推荐封面每天变化
+COVER_CACHE_TTL = 24 * 3600
+COVER_DAILY_TTL = 3600
+
 
 # 模块级别的缓存，用于存储搜索到的歌单（偷渡到 getPlaylists）
 _searched_playlists_cache = {}
@@ -47,93 +61,49 @@ class SubsonicApiView(HomeAssistantView):
     name = "ncloud:subsonic"
     requires_auth = False  # Subsonic 有自己的认证机制
     
-    def _response(self, request, post_data: dict, data: dict, status: str = "ok") -> web.Response:
+    async def _response(self, request, post_data: dict, data: dict, status: str = "ok") -> web.StreamResponse:
         """
         生成 Subsonic 响应（支持 XML 和 JSON）
         
         根据请求参数 f 决定响应格式：
         - f=xml → XML
         - 其他（包括默认） → JSON（现代客户端通常期望 JSON）
-        """
-        import json
         
+        响应分块写出，条目较多时在 executor 中序列化
+        """
         # 检查请求的响应格式（同时检查 URL 和 POST 参数）
         fmt = self._get_param(request, post_data, 'f', 'json').lower()
-        
-        # 构建响应数据结构
-        response_data = {
-            "subsonic-response": {
-                "status": status,
-                "version": SUBSONIC_API_VERSION,
-                "serverVersion": SERVER_NAME,
-                **data
-            }
-        }
+        in_executor = count_entries(data) >= EXECUTOR_THRESHOLD
         
         if fmt in ('json', 'jsonp'):
             # JSON 格式
-            callback = request.query.get('callback')
-            json_str = json.dumps(response_data, ensure_ascii=False)
-            
-            if fmt == 'jsonp' and callback:
-                return web.Response(
-                    text=f"{callback}({json_str})",
-                    content_type="application/javascript",
-                    charset="utf-8"
-                )
-            return web.Response(
-                text=json_str,
-                content_type="application/json",
-                charset="utf-8"
+            response_data = {
+                "subsonic-response": {
+                    "status": status,
+                    "version": SUBSONIC_API_VERSION,
+                    "serverVersion": SERVER_NAME,
+                    **data
+                }
+            }
+            callback = request.query.get('callback') if fmt == 'jsonp' else None
+            return await async_stream_response(
+                request,
+                iter_json(response_data, callback),
+                "application/javascript" if callback else "application/json",
+                in_executor
             )
         else:
             # XML 格式
-            xml_content = self._dict_to_xml(data)
-            xml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<subsonic-response xmlns="http://subsonic.org/restapi" status="{status}" version="{SUBSONIC_API_VERSION}" serverVersion="{SERVER_NAME}">
-{xml_content}
-</subsonic-response>'''
-            return web.Response(
-                text=xml,
-                content_type="application/xml",
-                charset="utf-8"
+            return await async_stream_response(
+                request,
+                iter_xml(data, status, SUBSONIC_API_VERSION, SERVER_NAME),
+                "application/xml",
+                in_executor
             )
     
-    def _dict_to_xml(self, data: dict, indent: int = 0) -> str:
-        """将字典转换为 XML 字符串"""
-        parts = []
-        for key, value in data.items():
-            if isinstance(value, list):
-                for item in value:
-                    if isinstance(item, dict):
-                        attrs = ' '.join([f'{k}="{self._xml_escape(str(v))}"' for k, v in item.items() if not isinstance(v, (dict, list))])
-                        nested = self._dict_to_xml({k: v for k, v in item.items() if isinstance(v, (dict, list))})
-                        if nested:
-                            parts.append(f'<{key} {attrs}>{nested}</{key}>')
-                        else:
-                            parts.append(f'<{key} {attrs}/>')
-            elif isinstance(value, dict):
-                nested = self._dict_to_xml(value)
-                parts.append(f'<{key}>{nested}</{key}>')
-            elif value is not None:
-                parts.append(f'<{key}>{self._xml_escape(str(value))}</{key}>')
-        return ''.join(parts)
-    
-    def _xml_response(self, content: str, status: str = "ok") -> web.Response:
-        """生成标准 Subsonic XML 响应（兼容旧代码）"""
-        xml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<subsonic-response xmlns="http://subsonic.org/restapi" status="{status}" version="{SUBSONIC_API_VERSION}" serverVersion="{SERVER_NAME}">
-{content}
-</subsonic-response>'''
-        return web.Response(
-            text=xml,
-            content_type="application/xml",
-            charset="utf-8"
-        )
-    
-    def _error_response(self, request, post_data: dict, code: int, message: str) -> web.Response:
+    async def _error_response(self, request, post_data: dict, code: int, message: str) -> web.StreamResponse:
         """生成错误响应"""
-        return self._response(request, post_data, {"error": {"code": code, "message": message}}, status="failed")
+        return await self._response(request, post_data, {"error": {"code": code, "message": message}}, status="failed")
     
     def _validate_auth(self, request, post_data: dict) -> bool:
         """
@@ -195,14 +165,14 @@ class SubsonicApiView(HomeAssistantView):
             
             # 验证认证（宽松模式）- 需要同时检查 URL 和 POST 参数
             if not self._validate_auth(request, post_data):
-                return self._error_response(request, post_data, 10, "Required parameter is missing")
+                return await self._error_response(request, post_data, 10, "Required parameter is missing")
             
             # 获取 cloud_music 实例
             hass = request.app["hass"]
             cloud_music = hass.data.get('cloud_music')
             
             if cloud_music is None:
-                return self._error_response(request, post_data, 0, "Cloud Music not initialized")
+                return await self._error_response(request, post_data, 0, "Cloud Music not initialized")
             
             # 路由到具体方法
             handler = getattr(self, f'_handle_{method}', None)
@@ -210,22 +180,22 @@ class SubsonicApiView(HomeAssistantView):
                 return await handler(request, post_data, cloud_music)
             else:
                 _LOGGER.warning(f"Subsonic: 未实现的方法 {method}")
-                return self._error_response(request, post_data, 0, f"Method not implemented: {method}")
+                return await self._error_response(request, post_data, 0, f"Method not implemented: {method}")
                 
         except Exception as e:
             # 异常隔离：绝不让错误传播到 HA 核心
             _LOGGER.error(f"Subsonic API error ({method}): {e}")
-            return self._error_response(request, post_data, 0, "Server error")
+            return await self._error_response(request, post_data, 0, "Server error")
     
     # ==================== 系统 API ====================
     
     async def _handle_ping(self, request, post_data, cloud_music) -> web.Response:
         """ping - 连接测试"""
-        return self._response(request, post_data, {})
+        return await self._response(request, post_data, {})
     
     async def _handle_getLicense(self, request, post_data, cloud_music) -> web.Response:
         """getLicense - 许可信息（返回有效许可）"""
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "license": {
                 "valid": True,
                 "email": "ha_ncloud_music@local",
@@ -235,7 +205,7 @@ class SubsonicApiView(HomeAssistantView):
     
     async def _handle_getMusicFolders(self, request, post_data, cloud_music) -> web.Response:
         """getMusicFolders - 音乐文件夹（返回固定的云音乐）"""
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "musicFolders": {
                 "musicFolder": [{"id": "1", "name": "云音乐"}]
             }
@@ -243,7 +213,7 @@ class SubsonicApiView(HomeAssistantView):
     
     async def _handle_getArtists(self, request, post_data, cloud_music) -> web.Response:
         """getArtists - 艺术家索引（返回空，通过搜索访问）"""
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "artists": {
                 "ignoredArticles": "The El La Los Las Le Les",
                 "index": []
@@ -266,7 +236,7 @@ class SubsonicApiView(HomeAssistantView):
                 }]
             })
         
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "indexes": {
                 "ignoredArticles": "The El La Los Las Le Les",
                 "index": index_items
@@ -292,7 +262,7 @@ class SubsonicApiView(HomeAssistantView):
                     "type": "music"
                 })
             
-            return self._response(request, post_data, {
+            return await self._response(request, post_data, {
                 "directory": {
                     "id": "folder_searched_playlists",
                     "name": "搜索歌单",
@@ -301,7 +271,7 @@ class SubsonicApiView(HomeAssistantView):
             })
         
         # 其他情况返回空
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "directory": {
                 "id": dir_id,
                 "name": "未知",
@@ -309,23 +279,89 @@ class SubsonicApiView(HomeAssistantView):
             }
         })
     
-    # ==================== 空实现 API (避免 MA 报错) ====================
+    # ==================== 音乐库 API（本地索引） ====================
+    
+    def _get_int_param(self, request, post_data: dict, key: str, default=None, maximum=None):
+        """整数参数（缺失或无效时返回默认值）"""
+        try:
+            value = int(self._get_param(request, post_data, key))
+        except (TypeError, ValueError):
+            return default
+        return min(value, maximum) if maximum is not None else value
+    
+    def _format_library_album(self, album: dict) -> dict:
+        """音乐库索引中的专辑 -> Subsonic album"""
+        result = {
+            "id": f"al_{album['id']}",
+            "name": album['name'],
+            "artist": album['artist'],
+            "artistId": f"ar_{album['artistId']}" if album.get('artistId') else "",
+            "coverArt": f"al_{album['id']}",
+            "songCount": album['songCount'],
+            "duration": album['duration'],
+            "created": "2020-01-01T00:00:00.000Z"
+        }
+        if album['year']:
+            result["year"] = album['year']
+        if album['starred']:
+            result["starred"] = "2020-01-01T00:00:00.000Z"
+        return result
     
     async def _handle_getAlbumList2(self, request, post_data, cloud_music) -> web.Response:
-        """getAlbumList2 - 专辑列表（返回空）"""
-        return self._response(request, post_data, {"albumList2": {"album": []}})
+        """getAlbumList2 - 专辑列表（由喜欢的歌曲和云盘歌曲归纳）"""
+        list_type = self._get_param(request, post_data, 'type', 'alphabeticalByName')
+        size = self._get_int_param(request, post_data, 'size', 10, maximum=500)
+        offset = self._get_int_param(request, post_data, 'offset', 0)
+        albums = await cloud_music.library.async_get_albums(
+            list_type, size, offset,
+            from_year=self._get_int_param(request, post_data, 'fromYear'),
+            to_year=self._get_int_param(request, post_data, 'toYear')
+        )
+        return await self._response(request, post_data, {
+            "albumList2": {"album": [self._format_library_album(album) for album in albums]}
+        })
     
-    async def _handle_getNewestPodcasts(self, request, post_data, cloud_music) -> web.Response:
-        """getNewestPodcasts - 播客（返回空）"""
-        return self._response(request, post_data, {"newestPodcasts": {"episode": []}})
+    async def _handle_getRandomSongs(self, request, post_data, cloud_music) -> web.Response:
+        """getRandomSongs - 随机歌曲（从音乐库中抽样）"""
+        songs = await cloud_music.library.async_get_random_songs(
+            self._get_int_param(request, post_data, 'size', 10, maximum=500),
+            from_year=self._get_int_param(request, post_data, 'fromYear'),
+            to_year=self._get_int_param(request, post_data, 'toYear')
+        )
+        # 音质由歌曲详情推断，不逐首请求 /song/url/v1
+        return await self._response(request, post_data, {
+            "randomSongs": {"song": [self._format_song_from_api_dict(song) for song in songs]}
+        })
     
     async def _handle_getStarred2(self, request, post_data, cloud_music) -> web.Response:
-        """getStarred2 - 收藏（返回空）"""
-        return self._response(request, post_data, {"starred2": {}})
+        """getStarred2 - 收藏（喜欢的歌曲及其专辑、关注的歌手）"""
+        songs, albums, artists = await cloud_music.library.async_get_starred()
+        starred_songs = []
+        for song in songs:
+            entry = self._format_song_from_api_dict(song)
+            entry["starred"] = "2020-01-01T00:00:00.000Z"
+            starred_songs.append(entry)
+        starred_artists = [{
+            "id": f"ar_{item.get('id')}",
+            "name": item.get('name', ''),
+            "coverArt": f"ar_{item.get('id')}",
+            "artistImageUrl": "",
+            "albumCount": item.get('albumSize', 0),
+            "starred": "2020-01-01T00:00:00.000Z"
+        } for item in artists]
+        return await self._response(request, post_data, {
+            "starred2": {
+                "artist": starred_artists,
+                "album": [self._format_library_album(album) for album in albums],
+                "song": starred_songs
+            }
+        })
     
-    async def _handle_getRandomSongs(self, request, post_data, cloud_music) -> web.Response:
-        """getRandomSongs - 随机歌曲（返回空）"""
-        return self._response(request, post_data, {"randomSongs": {"song": []}})
+    # ==================== 空实现 API (避免 MA 报错) ====================
+    
+    async def _handle_getNewestPodcasts(self, request, post_data, cloud_music) -> web.Response:
+        """getNewestPodcasts - 播客（返回空）"""
+        return await self._response(request, post_data, {"newestPodcasts": {"episode": []}})
     
     async def _handle_getAlbum(self, request, post_data, cloud_music) -> web.Response:
         """getAlbum - 获取专辑详情（同时支持歌单伪装的专辑）"""
@@ -339,12 +375,14 @@ class SubsonicApiView(HomeAssistantView):
                 playlist_result = await cloud_music.netease_cloud_music(f'/playlist/detail?id={real_id}')
                 if playlist_result and playlist_result.get('playlist'):
                     playlist_data = playlist_result['playlist']
+                    cloud_music.cover_registry.record_api_playlists([playlist_data])
                     
                     # 获取歌单中的歌曲
                     songs = await cloud_music.async_get_playlist(real_id)
+                    qualities = await cloud_music.quality.async_get_many([song.id for song in songs])
                     songs_list = []
                     for song in songs:
-                        songs_list.append({
+                        songs_list.append(self._apply_quality({
                             "id": f"s_{song.id}",
                             "parent": album_id,
                             "isDir": False,
@@ -362,10 +400,10 @@ class SubsonicApiView(HomeAssistantView):
                             "artistId": "",
                             "type": "music",
                             "created": "2020-01-01T00:00:00.000Z"
-                        })
+                        }, qualities.get(str(song.id))))
                     
                     creator = playlist_data.get('creator', {})
-                    return self._response(request, post_data, {
+                    return await self._response(request, post_data, {
                         "album": {
                             "id": album_id,
                             "name": f"📋 {playlist_data.get('name', '')}",
@@ -381,11 +419,11 @@ class SubsonicApiView(HomeAssistantView):
                     })
             except Exception as e:
                 _LOGGER.error(f"Subsonic getAlbum (歌单) 失败: {e}")
-            return self._error_response(request, post_data, 70, "Playlist not found")
+            return await self._error_response(request, post_data, 70, "Playlist not found")
         
         # 处理普通专辑 (al_xxx)
         if not album_id or not album_id.startswith('al_'):
-            return self._error_response(request, post_data, 10, "Invalid album id")
+            return await self._error_response(request, post_data, 10, "Invalid album id")
         
         real_id = album_id[3:]
         
@@ -394,14 +432,17 @@ class SubsonicApiView(HomeAssistantView):
             if result and result.get('album'):
                 album_data = result['album']
                 songs_data = result.get('songs', [])
+                cloud_music.cover_registry.record_api_albums([album_data])
+                cloud_music.cover_registry.record_api_songs(songs_data)
                 
-                # 构建歌曲列表
+                # 构建歌曲列表（整张专辑的音质一次批量获取）
+                qualities = await cloud_music.quality.async_get_many([song.get('id') for song in songs_data])
                 songs = []
                 for song in songs_data:
-                    songs.append(self._format_song_from_api_dict(song))
+                    songs.append(self._format_song_from_api_dict(song, qualities.get(str(song.get('id')))))
                 
                 artist_info = album_data.get('artist', {})
-                return self._response(request, post_data, {
+                return await self._response(request, post_data, {
                     "album": {
                         "id": album_id,
                         "name": album_data.get('name', ''),
@@ -418,13 +459,13 @@ class SubsonicApiView(HomeAssistantView):
         except Exception as e:
             _LOGGER.error(f"Subsonic getAlbum 失败: {e}")
         
-        return self._error_response(request, post_data, 70, "Album not found")
+        return await self._error_response(request, post_data, 70, "Album not found")
     
     async def _handle_getArtist(self, request, post_data, cloud_music) -> web.Response:
         """getArtist - 获取艺术家详情"""
         artist_id = self._get_param(request, post_data, 'id', '')
         if not artist_id or not artist_id.startswith('ar_'):
-            return self._error_response(request, post_data, 10, "Invalid artist id")
+            return await self._error_response(request, post_data, 10, "Invalid artist id")
         
         real_id = artist_id[3:]
         
@@ -441,6 +482,7 @@ class SubsonicApiView(HomeAssistantView):
                 # 获取艺术家专辑
                 albums_result = await cloud_music.netease_cloud_music(f'/artist/album?id={real_id}&limit=20')
                 if albums_result and albums_result.get('hotAlbums'):
+                    cloud_music.cover_registry.record_api_albums(albums_result['hotAlbums'][:20])
                     for album in albums_result['hotAlbums'][:20]:
                         albums.append({
                             "id": f"al_{album.get('id')}",
@@ -454,7 +496,7 @@ class SubsonicApiView(HomeAssistantView):
                             "year": album.get('publishTime', 0) // 31536000000 + 1970 if album.get('publishTime') else None
                         })
                 
-                return self._response(request, post_data, {
+                return await self._response(request, post_data, {
                     "artist": {
                         "id": artist_id,
                         "name": artist_data.get('name', ''),
@@ -467,16 +509,16 @@ class SubsonicApiView(HomeAssistantView):
         except Exception as e:
             _LOGGER.error(f"Subsonic getArtist 失败: {e}")
         
-        return self._error_response(request, post_data, 70, "Artist not found")
+        return await self._error_response(request, post_data, 70, "Artist not found")
     
     async def _handle_getAlbumInfo2(self, request, post_data, cloud_music) -> web.Response:
         """getAlbumInfo2 - 获取专辑元信息"""
         album_id = self._get_param(request, post_data, 'id', '')
         if not album_id:
-            return self._error_response(request, post_data, 10, "Missing album id")
+            return await self._error_response(request, post_data, 10, "Missing album id")
         
         # 返回基本信息结构（可以为空）
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "albumInfo": {
                 "notes": "",
                 "musicBrainzId": "",
@@ -490,10 +532,10 @@ class SubsonicApiView(HomeAssistantView):
         """getArtistInfo2 - 获取艺术家元信息"""
         artist_id = self._get_param(request, post_data, 'id', '')
         if not artist_id:
-            return self._error_response(request, post_data, 10, "Missing artist id")
+            return await self._error_response(request, post_data, 10, "Missing artist id")
         
         # 返回基本信息结构（可以为空）
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "artistInfo2": {
                 "biography": "",
                 "musicBrainzId": "",
@@ -510,7 +552,7 @@ class SubsonicApiView(HomeAssistantView):
         count = int(self._get_param(request, post_data, 'count', 50))
         
         if not artist_name:
-            return self._error_response(request, post_data, 10, "Missing artist name")
+            return await self._error_response(request, post_data, 10, "Missing artist name")
         
         try:
             from urllib.parse import quote
@@ -529,20 +571,23 @@ class SubsonicApiView(HomeAssistantView):
                 )
                 
                 if songs_result and songs_result.get('songs'):
+                    cloud_music.cover_registry.record_api_songs(songs_result['songs'][:count])
+                    top_songs = songs_result['songs'][:count]
+                    qualities = await cloud_music.quality.async_get_many([song.get('id') for song in top_songs])
                     songs = []
-                    for song in songs_result['songs'][:count]:
-                        songs.append(self._format_song_from_api_dict(song))
+                    for song in top_songs:
+                        songs.append(self._format_song_from_api_dict(song, qualities.get(str(song.get('id')))))
                     
-                    return self._response(request, post_data, {
+                    return await self._response(request, post_data, {
                         "topSongs": {"song": songs}
                     })
             
             # 如果找不到艺术家，返回空列表
-            return self._response(request, post_data, {"topSongs": {"song": []}})
+            return await self._response(request, post_data, {"topSongs": {"song": []}})
             
         except Exception as e:
             _LOGGER.error(f"Subsonic getTopSongs 失败: {e}")
-            return self._response(request, post_data, {"topSongs": {"song": []}})
+            return await self._response(request, post_data, {"topSongs": {"song": []}})
     
     async def _handle_getOpenSubsonicExtensions(self, request, post_data, cloud_music) -> web.Response:
         """
@@ -551,7 +596,7 @@ class SubsonicApiView(HomeAssistantView):
         这是 MA 识别 OpenSubsonic 服务器的必要端点！
         返回服务器支持的 OpenSubsonic 扩展列表。
         """
-        return self._response(request, post_data, {
+        return await self._response(request, post_data, {
             "openSubsonicExtensions": [
                 {"name": "formPost", "versions": [1]},
                 {"name": "songLyrics", "versions": [1]},
@@ -564,74 +609,58 @@ class SubsonicApiView(HomeAssistantView):
         """search3 - 搜索歌曲、艺术家、专辑"""
         query = self._get_param(request, post_data, 'query', '')
         if not query:
-            return self._response(request, post_data, {"searchResult3": {}})
-        
-        from urllib.parse import quote
+            return await self._response(request, post_data, {"searchResult3": {}})
         
         # 解析分页参数（MA 默认会请求各 20 条）
         song_count = int(self._get_param(request, post_data, 'songCount', 20))
         artist_count = int(self._get_param(request, post_data, 'artistCount', 20))
         album_count = int(self._get_param(request, post_data, 'albumCount', 20))
         
-        songs = []
-        artists = []
-        albums = []
+        # 歌曲/艺术家/专辑/歌单并发搜索，超时的类型返回空
+        results = await cloud_music.search.async_search_many(query, {
+            SEARCH_TYPE_SONG: song_count,
+            SEARCH_TYPE_ARTIST: artist_count,
+            SEARCH_TYPE_ALBUM: album_count,
+            SEARCH_TYPE_PLAYLIST: 30,
+        })
         
-        # 搜索歌曲 (type=1)
-        if song_count > 0:
-            try:
-                res = await cloud_music.netease_cloud_music(
-                    f'/cloudsearch?keywords={quote(query)}&type=1&limit={song_count}'
-                )
-                if res and res.get('result') and res['result'].get('songs'):
-                    for item in res['result']['songs'][:song_count]:
-                        songs.append(self._format_song_from_api_dict(item))
-                _LOGGER.debug(f"Subsonic search3: 找到 {len(songs)} 首歌曲")
-            except Exception as e:
-                _LOGGER.error(f"Subsonic search3 歌曲搜索失败: {e}")
+        # 登记搜索结果的封面，之后的 getCoverArt 无需再查询接口
+        registry = cloud_music.cover_registry
+        registry.record_api_songs(results.get(SEARCH_TYPE_SONG, [])[:song_count])
+        registry.record_api_albums(results.get(SEARCH_TYPE_ALBUM, [])[:album_count])
+        registry.record_api_playlists(results.get(SEARCH_TYPE_PLAYLIST, [])[:30])
         
-        # 搜索艺术家 (type=100)
-        if artist_count > 0:
-            try:
-                res = await cloud_music.netease_cloud_music(
-                    f'/cloudsearch?keywords={quote(query)}&type=100&limit={artist_count}'
-                )
-                if res and res.get('result') and res['result'].get('artists'):
-                    for item in res['result']['artists'][:artist_count]:
-                        artists.append({
-                            "id": f"ar_{item.get('id')}",
-                            "name": item.get('name', ''),
-                            "coverArt": f"ar_{item.get('id')}",
-                            "artistImageUrl": "",  # 不使用歌手照片，通过 coverArt 获取专辑封面
-                            "albumCount": item.get('albumSize', 0)
-                        })
-                _LOGGER.debug(f"Subsonic search3: 找到 {len(artists)} 位艺术家")
-            except Exception as e:
-                _LOGGER.error(f"Subsonic search3 艺术家搜索失败: {e}")
+        found_songs = results.get(SEARCH_TYPE_SONG, [])[:song_count]
+        qualities = await cloud_music.quality.async_get_many([item.get('id') for item in found_songs])
+        songs = [self._format_song_from_api_dict(item, qualities.get(str(item.get('id')))) for item in found_songs]
+        _LOGGER.debug(f"Subsonic search3: 找到 {len(songs)} 首歌曲")
         
-        # 搜索专辑 (type=10)
-        if album_count > 0:
-            try:
-                res = await cloud_music.netease_cloud_music(
-                    f'/cloudsearch?keywords={quote(query)}&type=10&limit={album_count}'
-                )
-                if res and res.get('result') and res['result'].get('albums'):
-                    for item in res['result']['albums'][:album_count]:
-                        artist_info = item.get('artist', {})
-                        albums.append({
-                            "id": f"al_{item.get('id')}",
-                            "name": item.get('name', ''),
-                            "artist": artist_info.get('name', ''),
-                            "artistId": f"ar_{artist_info.get('id', '')}",
-                            "coverArt": f"al_{item.get('id')}",
-                            "songCount": item.get('size', 0),
-                            "duration": 0,
-                            "created": "2020-01-01T00:00:00.000Z",  # MA 必需字段
-                            "year": item.get('publishTime', 0) // 31536000000 + 1970 if item.get('publishTime') else None
-                        })
-                _LOGGER.debug(f"Subsonic search3: 找到 {len(albums)} 张专辑")
-            except Exception as e:
-                _LOGGER.error(f"Subsonic search3 专辑搜索失败: {e}")
+        artists = []
+        for item in results.get(SEARCH_TYPE_ARTIST, [])[:artist_count]:
+            artists.append({
+                "id": f"ar_{item.get('id')}",
+                "name": item.get('name', ''),
+                "coverArt": f"ar_{item.get('id')}",
+                "artistImageUrl": "",  # 不使用歌手照片，通过 coverArt 获取专辑封面
+                "albumCount": item.get('albumSize', 0)
+            })
+        _LOGGER.debug(f"Subsonic search3: 找到 {len(artists)} 位艺术家")
+        
+        albums = []
+        for item in results.get(SEARCH_TYPE_ALBUM, [])[:album_count]:
+            artist_info = item.get('artist', {})
+            albums.append({
+                "id": f"al_{item.get('id')}",
+                "name": item.get('name', ''),
+                "artist": artist_info.get('name', ''),
+                "artistId": f"ar_{artist_info.get('id', '')}",
+                "coverArt": f"al_{item.get('id')}",
+                "songCount": item.get('size', 0),
+                "duration": 0,
+                "created": "2020-01-01T00:00:00.000Z",  # MA 必需字段
+                "year": item.get('publishTime', 0) // 31536000000 + 1970 if item.get('publishTime') else None
+            })
+        _LOGGER.debug(f"Subsonic search3: 找到 {len(albums)} 张专辑")
         
         # 搜索歌单 (type=1000) - 包装成虚拟专辑返回
         # 因为 MA 的 libopensonic 不支持 search3 返回 playlist 字段
@@ -640,47 +669,35 @@ class SubsonicApiView(HomeAssistantView):
         
         # 清空之前的缓存，只保留最近一次搜索的结果
         _searched_playlists_cache.clear()
-        _LOGGER.info(f"Subsonic search3: 清空歌单缓存，开始新搜索 keywords={query}")
         playlist_as_albums = []
-        try:
-            _LOGGER.info(f"Subsonic search3: 开始搜索歌单 keywords={query}")
-            res = await cloud_music.netease_cloud_music(
-                f'/cloudsearch?keywords={quote(query)}&type=1000&limit=30'
-            )
-            _LOGGER.info(f"Subsonic search3: 歌单搜索返回 code={res.get('code') if res else 'None'}")
-            if res and res.get('result') and res['result'].get('playlists'):
-                _LOGGER.info(f"Subsonic search3: 找到 {len(res['result']['playlists'])} 个歌单")
-                for item in res['result']['playlists'][:30]:
-                    creator = item.get('creator', {})
-                    # 使用特殊前缀 pl_ 标识这是歌单伪装的专辑
-                    playlist_as_albums.append({
-                        "id": f"pl_{item.get('id')}",  # pl_ 前缀表示歌单
-                        "name": f"[歌单] {item.get('name', '')}",  # 使用中文标识
-                        "artist": f"歌单 · {creator.get('nickname', '未知')}",
-                        "artistId": "",
-                        "coverArt": f"p_{item.get('id')}",  # 使用歌单封面
-                        "songCount": item.get('trackCount', 0),
-                        "duration": 0,
-                        "created": "2020-01-01T00:00:00.000Z",
-                        "year": None
-                    })
-                    # 同时缓存歌单到全局变量，用于偷渡到 getPlaylists
-                    _searched_playlists_cache[f"p_{item.get('id')}"] = {
-                        "id": f"p_{item.get('id')}",
-                        "name": f"[搜索] {item.get('name', '')}",
-                        "owner": creator.get('nickname', '未知'),
-                        "public": True,
-                        "songCount": item.get('trackCount', 0),
-                        "duration": 0,
-                        "created": "2020-01-01T00:00:00.000Z",
-                        "changed": "2020-01-01T00:00:00.000Z",
-                        "coverArt": f"p_{item.get('id')}"
-                    }
-                    _LOGGER.info(f"Subsonic search3: 缓存歌单 {item.get('name')} 到偷渡列表")
-            else:
-                _LOGGER.warning(f"Subsonic search3: 歌单搜索结果为空 res={res}")
-        except Exception as e:
-            _LOGGER.error(f"Subsonic search3 歌单搜索失败: {e}", exc_info=True)
+        playlists = results.get(SEARCH_TYPE_PLAYLIST, [])
+        _LOGGER.info(f"Subsonic search3: 找到 {len(playlists)} 个歌单 keywords={query}")
+        for item in playlists[:30]:
+            creator = item.get('creator', {})
+            # 使用特殊前缀 pl_ 标识这是歌单伪装的专辑
+            playlist_as_albums.append({
+                "id": f"pl_{item.get('id')}",  # pl_ 前缀表示歌单
+                "name": f"[歌单] {item.get('name', '')}",  # 使用中文标识
+                "artist": f"歌单 · {creator.get('nickname', '未知')}",
+                "artistId": "",
+                "coverArt": f"p_{item.get('id')}",  # 使用歌单封面
+                "songCount": item.get('trackCount', 0),
+                "duration": 0,
+                "created": "2020-01-01T00:00:00.000Z",
+                "year": None
+            })
+            # 同时缓存歌单到全局变量，用于偷渡到 getPlaylists
+            _searched_playlists_cache[f"p_{item.get('id')}"] = {
+                "id": f"p_{item.get('id')}",
+                "name": f"[搜索] {item.get('name', '')}",
+                "owner": creator.get('nickname', '未知'),
+                "public": True,
+                "songCount": item.get('trackCount', 0),
+                "duration": 0,
+                "created": "2020-01-01T00:00:00.000Z",
+                "changed": "2020-01-01T00:00:00.000Z",
+                "coverArt": f"p_{item.get('id')}"
+            }
         
         # 组合结果：歌单在前，专辑在后
         # MA 的 Albums 标签页只显示前 50 个，所以把歌单放前面确保能显示
@@ -701,19 +718,19 @@ class SubsonicApiView(HomeAssistantView):
         if final_albums:
             result["searchResult3"]["album"] = final_albums
         
-        return self._response(request, post_data, result)
+        return await self._response(request, post_data, result)
     
     def _format_song_from_api(self, item: dict) -> str:
         """将云音乐 API 返回的歌曲数据转换为 Subsonic song XML"""
         song_id = f"s_{item.get('id')}"
         
-        title = self._xml_escape(item.get('name', ''))
+        title = xml_escape(item.get('name', ''))
         
         artists = item.get('ar', [])
-        artist = self._xml_escape(', '.join([a.get('name', '') for a in artists]))
+        artist = xml_escape(', '.join([a.get('name', '') for a in artists]))
         
         album_info = item.get('al', {})
-        album = self._xml_escape(album_info.get('name', ''))
+        album = xml_escape(album_info.get('name', ''))
         
         duration = int(item.get('dt', 0) / 1000)
         cover_id = song_id
@@ -742,35 +759,7 @@ class SubsonicApiView(HomeAssistantView):
         
         # 首先尝试使用传入的实际音质信息
         if quality_info:
-            sr = quality_info.get('sr', 44100)
-            br = quality_info.get('br', 320000)
-            audio_type = quality_info.get('type', 'mp3')
-            size = quality_info.get('size', 0)
-            
-            # 根据实际格式判断
-            if audio_type in ('flac', 'alac'):
-                suffix = 'flac'
-                content_type = 'audio/flac'
-                if sr >= 96000:
-                    bit_depth = 24
-                elif sr >= 48000:
-                    bit_depth = 24
-                else:
-                    bit_depth = 16
-            else:
-                suffix = 'mp3'
-                content_type = 'audio/mpeg'
-                bit_depth = None
-            
-            quality_data = {
-                'suffix': suffix,
-                'contentType': content_type,
-                'bitRate': br // 1000,
-                'samplingRate': sr,
-                'size': size,
-                'channelCount': 2,
-                'bitDepth': bit_depth
-            }
+            quality_data = self._quality_data(quality_info)
         else:
             # Fallback: 从歌曲详情数据推断
             quality_data = self._get_quality_from_song_data(item)
@@ -807,64 +796,54 @@ class SubsonicApiView(HomeAssistantView):
         
         return result
     
-    def _get_quality_from_song_data(self, item: dict, cloud_music=None) -> dict:
-        """从歌曲数据推断音质信息或从API获取实际音质"""
-        song_id = item.get('id')
-        
-        # 优先尝试从API获取实际音质(包含jyeffect等黑胶VIP音质)
-        if cloud_music and song_id:
-            try:
-                import asyncio
-                # 获取实际音质信息
-                url_res = asyncio.create_task(
-                    cloud_music.netease_cloud_music(
-                        f'/song/url/v1?id={song_id}&level={cloud_music.audio_quality}'
-                    )
-                )
-                # 等待结果(这是在async函数中)
-                url_data = asyncio.get_event_loop().run_until_complete(url_res)
-                
-                if url_data and url_data.get('data'):
-                    quality_info = url_data['data'][0]
-                    sr = quality_info.get('sr', 44100)
-                    br = quality_info.get('br', 320000)
-                    audio_type = quality_info.get('type', 'mp3')
-                    size = quality_info.get('size', 0)
-                    
-                    # 根据实际格式判断
-                    if audio_type in ('flac', 'alac'):
-                        suffix = 'flac'
-                        content_type = 'audio/flac'
-                        # 推断位深度
-                        if sr >= 96000:
-                            bit_depth = 24
-                        elif sr >= 48000:
-                            bit_depth = 24
-                        else:
-                            bit_depth = 16
-                    else:
-                        suffix = 'mp3'
-                        content_type = 'audio/mpeg'
-                        bit_depth = None
-                    
-                    result = {
-                        'suffix': suffix,
-                        'contentType': content_type,
-                        'bitRate': br // 1000,  # kbps
-                        'samplingRate': sr,
-                        'size': size,
-                        'channelCount': 2
-                    }
-                    
-                    if bit_depth:
-                        result['bitDepth'] = bit_depth
-                    
-                    _LOGGER.debug(f"Subsonic: 从API获取音质 id={song_id}, sr={sr}, type={audio_type}")
-                    return result
-            except Exception as e:
-                _LOGGER.debug(f"Subsonic: 无法从API获取音质,使用推断方式: {e}")
+    def _quality_data(self, quality_info: dict) -> dict:
+        """将 /song/url/v1 的音质信息（QualityResolver 的结果）转换为 Subsonic 字段"""
+        sr = quality_info.get('sr') or 44100
+        br = quality_info.get('br') or 320000
+        audio_type = quality_info.get('type') or 'mp3'
+        size = quality_info.get('size') or 0
+        
+        # 根据实际格式判断
+        if audio_type in ('flac', 'alac'):
+            suffix = 'flac'
+            content_type = 'audio/flac'
+            # 推断位深度
+            if sr >= 48000:
+                bit_depth = 24
+            else:
+                bit_depth = 16
+        else:
+            suffix = 'mp3'
+            content_type = 'audio/mpeg'
+            bit_depth = None
         
-        # Fallback: 从歌曲详情数据推断
+        return {
+            'suffix': suffix,
+            'contentType': content_type,
+            'bitRate': br // 1000,  # kbps
+            'samplingRate': sr,
+            'size': size,
+            'channelCount': 2,
+            'bitDepth': bit_depth
+        }
+    
+    def _apply_quality(self, entry: dict, quality_info: dict) -> dict:
+        """用实际音质覆盖由 MusicInfo 生成的歌曲条目中的默认 mp3 字段"""
+        if quality_info:
+            quality_data = self._quality_data(quality_info)
+            entry.update({
+                "suffix": quality_data['suffix'],
+                "contentType": quality_data['contentType'],
+                "bitRate": quality_data['bitRate'],
+                "samplingRate": quality_data['samplingRate'],
+                "size": quality_data['size']
+            })
+            if quality_data['bitDepth']:
+                entry["bitDepth"] = quality_data['bitDepth']
+        return entry
+    
+    def _get_quality_from_song_data(self, item: dict) -> dict:
+        """从歌曲详情数据推断音质信息（无法获取实际音质时使用）"""
         # /song/detail 返回的数据中包含各音质版本信息
         hr = item.get('hr')  # Hi-Res
         sq = item.get('sq')  # 无损
@@ -923,9 +902,9 @@ class SubsonicApiView(HomeAssistantView):
         song_id = f"s_{song.id}"
         
         # XML 转义
-        title = self._xml_escape(song.song)
-        artist = self._xml_escape(song.singer)
-        album = self._xml_escape(song.album) if hasattr(song, 'album') and song.album else ""
+        title = xml_escape(song.song)
+        artist = xml_escape(song.singer)
+        album = xml_escape(song.album) if hasattr(song, 'album') and song.album else ""
         
         # 时长（毫秒转秒）
         duration = int(song.duration / 1000) if song.duration > 1000 else int(song.duration)
@@ -940,24 +919,13 @@ class SubsonicApiView(HomeAssistantView):
             f'contentType="audio/mpeg" suffix="mp3"/>'
         )
     
-    def _xml_escape(self, text: str) -> str:
-        """XML 转义特殊字符"""
-        if not text:
-            return ""
-        return (text
-            .replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-            .replace('"', "&quot;")
-            .replace("'", "&apos;"))
-    
     # ==================== 歌曲 API ====================
     
     async def _handle_getSong(self, request, post_data, cloud_music) -> web.Response:
         """getSong - 获取单曲信息"""
         song_id = self._get_param(request, post_data, 'id', '')
         if not song_id or not song_id.startswith('s_'):
-            return self._error_response(request, post_data, 10, "Invalid song id")
+            return await self._error_response(request, post_data, 10, "Invalid song id")
         
         real_id = song_id[2:]
         
@@ -965,26 +933,18 @@ class SubsonicApiView(HomeAssistantView):
             result = await cloud_music.netease_cloud_music(f'/song/detail?ids={real_id}')
             if result and result.get('songs'):
                 song_data = result['songs'][0]
+                cloud_music.cover_registry.record_api_songs([song_data])
                 
-                # 获取实际音质信息
-                quality_info = None
-                try:
-                    url_res = await cloud_music.netease_cloud_music(
-                        f'/song/url/v1?id={real_id}&level={cloud_music.audio_quality}'
-                    )
-                    if url_res and url_res.get('data'):
-                        quality_info = url_res['data'][0]
-                        _LOGGER.debug(f"Subsonic getSong: 音质 id={real_id}, sr={quality_info.get('sr')}, type={quality_info.get('type')}")
-                except Exception as e:
-                    _LOGGER.warning(f"Subsonic getSong: 获取音质失败 {e}")
+                # 获取实际音质信息（带缓存）
+                quality_info = await cloud_music.quality.async_get(real_id)
                 
-                return self._response(request, post_data, {
+                return await self._response(request, post_data, {
                     "song": self._format_song_from_api_dict(song_data, quality_info)
                 })
         except Exception as e:
             _LOGGER.error(f"Subsonic getSong 失败: {e}")
         
-        return self._error_response(request, post_data, 70, "Song not found")
+        return await self._error_response(request, post_data, 70, "Song not found")
     
     # ==================== 流媒体 API ====================
     
@@ -996,7 +956,7 @@ class SubsonicApiView(HomeAssistantView):
         """
         song_id = self._get_param(request, post_data, 'id', '')
         if not song_id or not song_id.startswith('s_'):
-            return self._error_response(request, post_data, 10, "Invalid song id")
+            return await self._error_response(request, post_data, 10, "Invalid song id")
         
         real_id = song_id[2:]
         
@@ -1008,11 +968,11 @@ class SubsonicApiView(HomeAssistantView):
                 return web.HTTPFound(url)
             else:
                 _LOGGER.warning(f"Subsonic stream: 无法获取歌曲 {real_id} 的 URL")
-                return self._error_response(request, post_data, 70, "Stream not available")
+                return await self._error_response(request, post_data, 70, "Stream not available")
                 
         except Exception as e:
             _LOGGER.error(f"Subsonic stream 失败: {e}")
-            return self._error_response(request, post_data, 0, "Stream error")
+            return await self._error_response(request, post_data, 0, "Stream error")
     
     async def _handle_download(self, request, post_data, cloud_music) -> web.Response:
         """download - 下载（复用 stream 逻辑）"""
@@ -1021,94 +981,122 @@ class SubsonicApiView(HomeAssistantView):
     # ==================== 封面 API ====================
     
     async def _handle_getCoverArt(self, request, post_data, cloud_music) -> web.Response:
-        """getCoverArt - 获取封面图片（代理模式，直接返回图片数据）"""
+        """getCoverArt - 获取封面图片（代理模式，内存 + 磁盘两级缓存）"""
         cover_id = self._get_param(request, post_data, 'id', '')
         _LOGGER.debug(f"Subsonic getCoverArt: 收到请求 id={cover_id}")
         
         if not cover_id:
-            return self._error_response(request, post_data, 10, "Missing id")
+            return await self._error_response(request, post_data, 10, "Missing id")
         
         # 获取请求的尺寸参数（可选）
         # 如果 MA 没有指定尺寸，则返回原图（最大清晰度）
         # 参考 Jellyfin 实现：直接返回云音乐原始 picUrl，不添加尺寸限制
         size = self._get_param(request, post_data, 'size', None)
-        cover_url = None
         
         try:
-            # 歌曲封面 (s_xxx)
-            if cover_id.startswith('s_'):
-                real_id = cover_id[2:]
-                result = await cloud_music.netease_cloud_music(f'/song/detail?ids={real_id}')
-                if result and result.get('songs'):
-                    cover_url = result['songs'][0].get('al', {}).get('picUrl', '')
-            
-            # 专辑封面 (al_xxx)
-            elif cover_id.startswith('al_'):
-                real_id = cover_id[3:]
-                result = await cloud_music.netease_cloud_music(f'/album?id={real_id}')
-                if result and result.get('album'):
-                    cover_url = result['album'].get('picUrl', '')
-            
-            # 艺术家封面 (ar_xxx) - 使用热门专辑封面，避免歌手照片
-            elif cover_id.startswith('ar_'):
-                real_id = cover_id[3:]
+            # 每日推荐的封面每天变化，只放内存缓存
+            is_daily = cover_id == 'p_daily'
+            image = await cloud_music.cover_cache.async_get(
+                cover_id, size,
+                lambda: self._resolve_cover_url(cover_id, cloud_music),
+                persist=not is_daily,
+                ttl=COVER_DAILY_TTL if is_daily else COVER_CACHE_TTL
+            )
+            if image is not None:
+                headers = {
+                    'Cache-Control': f'public, max-age={COVER_DAILY_TTL if is_daily else COVER_CACHE_TTL}',
+                    'ETag': image.etag
+                }
+                # 客户端已有相同图片
+                if request.headers.get('If-None-Match') == image.etag:
+                    return web.Response(status=304, headers=headers)
+                _LOGGER.debug(f"Subsonic getCoverArt: 返回图片 {image.size} bytes")
+                if image.path is not None:
+                    # 磁盘上的大图直接发送文件，不读入内存
+                    headers['Content-Type'] = image.content_type
+                    return web.FileResponse(image.path, headers=headers)
+                return web.Response(body=image.data, content_type=image.content_type, headers=headers)
+            _LOGGER.warning(f"Subsonic getCoverArt: 未找到封面, cover_id={cover_id}")
+                
+        except Exception as e:
+            _LOGGER.error(f"Subsonic getCoverArt 失败: {e}", exc_info=True)
+        
+        return await self._error_response(request, post_data, 70, "Cover art not found")
+    
+    async def _resolve_cover_url(self, cover_id, cloud_music):
+        """封面 ID 对应的原始图片 URL（图片缓存未命中时调用）"""
+        # 生成列表时已登记的封面（歌手封面使用热门专辑、每日推荐每天变化，都不查登记表）
+        if cover_id.startswith('ar_') or cover_id == 'p_daily':
+            registry_id = None
+        elif cover_id.startswith(('s_', 'al_', 'p_')):
+            registry_id = cover_id
+        else:
+            registry_id = f's_{cover_id}'
+        if registry_id is not None:
+            cover_url = await cloud_music.cover_registry.async_get(registry_id)
+            if cover_url:
+                return cover_url
+        cover_url = None
+        
+        # 歌曲封面 (s_xxx)
+        if cover_id.startswith('s_'):
+            real_id = cover_id[2:]
+            song_details = await cloud_music.async_get_song_details([real_id])
+            if real_id in song_details:
+                cloud_music.cover_registry.record_api_songs([song_details[real_id]])
+                cover_url = song_details[real_id].get('al', {}).get('picUrl', '')
+        
+        # 专辑封面 (al_xxx)
+        elif cover_id.startswith('al_'):
+            real_id = cover_id[3:]
+            result = await cloud_music.async_get_album_data(real_id)
+            if result and result.get('album'):
+                cloud_music.cover_registry.record_api_albums([result['album']])
+                cover_url = result['album'].get('picUrl', '')
+        
+        # 艺术家封面 (ar_xxx) - 使用热门专辑封面，避免歌手照片
+        elif cover_id.startswith('ar_'):
+            real_id = cover_id[3:]
+            artist = await cloud_music.metadata.async_get_artist(real_id)
+            if artist and artist.get('albumPicUrl'):
+                cover_url = artist['albumPicUrl']
+            else:
                 # 获取艺术家的热门专辑，使用第一张专辑的封面
                 result = await cloud_music.netease_cloud_music(f'/artist/album?id={real_id}&limit=1')
                 if result and result.get('hotAlbums') and len(result['hotAlbums']) > 0:
                     cover_url = result['hotAlbums'][0].get('picUrl', '')
-            
-            # 歌单封面 (p_xxx)
-            elif cover_id.startswith('p_'):
-                # ========== 特殊处理：每日推荐封面 ==========
-                # 使用第一首推荐歌曲的专辑封面作为歌单封面
-                if cover_id == 'p_daily':
-                    try:
-                        songs = await cloud_music.async_get_dailySongs()
-                        if songs and len(songs) > 0:
-                            # 使用第一首歌的封面
-                            cover_url = songs[0].picUrl
-                            _LOGGER.debug(f"Subsonic getCoverArt: 每日推荐使用第一首歌封面 {cover_url[:50] if cover_url else 'None'}...")
-                    except Exception as e:
-                        _LOGGER.error(f"获取每日推荐封面失败: {e}")
-                # ========== 每日推荐封面处理结束 ==========
-                else:
-                    # 普通歌单封面
-                    real_id = cover_id[2:]
-                    result = await cloud_music.netease_cloud_music(f'/playlist/detail?id={real_id}')
-                    if result and result.get('playlist'):
-                        cover_url = result['playlist'].get('coverImgUrl', '')
-            
-            # 其他情况：尝试作为歌曲 ID
-            else:
-                result = await cloud_music.netease_cloud_music(f'/song/detail?ids={cover_id}')
-                if result and result.get('songs'):
-                    cover_url = result['songs'][0].get('al', {}).get('picUrl', '')
-            
-            if cover_url:
-                # 只有当 MA 明确请求尺寸时才添加 ?param= 参数
-                # 否则返回原图（最大清晰度）
-                if size:
-                    cover_url = f"{cover_url}?param={size}y{size}"
-                
-                # 代理模式：获取图片数据并返回
-                import aiohttp
-                async with aiohttp.ClientSession() as session:
-                    headers = {'Referer': 'https://music.163.com/'}
-                    async with session.get(cover_url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                        if resp.status == 200:
-                            image_data = await resp.read()
-                            content_type = resp.headers.get('Content-Type', 'image/jpeg')
-                            _LOGGER.debug(f"Subsonic getCoverArt: 返回图片 {len(image_data)} bytes")
-                            return web.Response(body=image_data, content_type=content_type)
-                        else:
-                            _LOGGER.warning(f"Subsonic getCoverArt: 获取图片失败 HTTP {resp.status}")
+                    if cover_url:
+                        await cloud_music.metadata.async_update_artist(real_id, {'albumPicUrl': cover_url})
+        
+        # 歌单封面 (p_xxx)
+        elif cover_id.startswith('p_'):
+            # ========== 特殊处理：每日推荐封面 ==========
+            # 使用第一首推荐歌曲的专辑封面作为歌单封面
+            if cover_id == 'p_daily':
+                try:
+                    songs = await cloud_music.async_get_dailySongs()
+                    if songs and len(songs) > 0:
+                        # 使用第一首歌的封面
+                        cover_url = songs[0].picUrl
+                        _LOGGER.debug(f"Subsonic getCoverArt: 每日推荐使用第一首歌封面 {cover_url[:50] if cover_url else 'None'}...")
+                except Exception as e:
+                    _LOGGER.error(f"获取每日推荐封面失败: {e}")
+            # ========== 每日推荐封面处理结束 ==========
             else:
-                _LOGGER.warning(f"Subsonic getCoverArt: 未找到封面 URL, cover_id={cover_id}")
-                
-        except Exception as e:
-            _LOGGER.error(f"Subsonic getCoverArt 失败: {e}", exc_info=True)
+                # 普通歌单封面
+                real_id = cover_id[2:]
+                result = await cloud_music.netease_cloud_music(f'/playlist/detail?id={real_id}')
+                if result and result.get('playlist'):
+                    cloud_music.cover_registry.record_api_playlists([result['playlist']])
+                    cover_url = result['playlist'].get('coverImgUrl', '')
         
-        return self._error_response(request, post_data, 70, "Cover art not found")
+        # 其他情况：尝试作为歌曲 ID
+        else:
+            song_details = await cloud_music.async_get_song_details([cover_id])
+            if cover_id in song_details:
+                cover_url = song_details[cover_id].get('al', {}).get('picUrl', '')
+        
+        return cover_url
     
     # ==================== 播放列表 API ====================
     
@@ -1120,16 +1108,16 @@ class SubsonicApiView(HomeAssistantView):
             
             if not hasattr(cloud_music, 'userinfo') or not cloud_music.userinfo:
                 _LOGGER.debug("Subsonic getPlaylists: userinfo 未加载")
-                return self._response(request, post_data, {"playlists": {"playlist": []}})
+                return await self._response(request, post_data, {"playlists": {"playlist": []}})
             
             uid = cloud_music.userinfo.get('uid')  # 修复：使用 'uid' 而非 'userId'
             if not uid:
                 _LOGGER.debug("Subsonic getPlaylists: 用户未登录")
-                return self._response(request, post_data, {"playlists": {"playlist": []}})
+                return await self._response(request, post_data, {"playlists": {"playlist": []}})
             
             result = await cloud_music.netease_cloud_music(f'/user/playlist?uid={uid}')
             if not result or not result.get('playlist'):
-                return self._response(request, post_data, {"playlists": {"playlist": []}})
+                return await self._response(request, post_data, {"playlists": {"playlist": []}})
             
             playlists = []
             
@@ -1150,6 +1138,7 @@ class SubsonicApiView(HomeAssistantView):
             # ========== 每日推荐添加结束 ==========
             
             # 添加用户的普通歌单
+            cloud_music.cover_registry.record_api_playlists(result['playlist'])
             for pl in result['playlist']:
                 playlist_id = pl.get('id')
                 playlists.append({
@@ -1172,18 +1161,18 @@ class SubsonicApiView(HomeAssistantView):
                     playlists.insert(1, pl)  # 插入到每日推荐之后
             
             _LOGGER.info(f"Subsonic getPlaylists: 返回 {len(playlists)} 个歌单（含偷渡）")
-            return self._response(request, post_data, {
+            return await self._response(request, post_data, {
                 "playlists": {"playlist": playlists}
             })
         except Exception as e:
             _LOGGER.error(f"Subsonic getPlaylists 失败: {e}", exc_info=True)
-            return self._response(request, post_data, {"playlists": {"playlist": []}})
+            return await self._response(request, post_data, {"playlists": {"playlist": []}})
     
     async def _handle_getPlaylist(self, request, post_data, cloud_music) -> web.Response:
         """getPlaylist - 获取歌单详情"""
         playlist_id = self._get_param(request, post_data, 'id', '')
         if not playlist_id or not playlist_id.startswith('p_'):
-            return self._error_response(request, post_data, 10, "Invalid playlist id")
+            return await self._error_response(request, post_data, 10, "Invalid playlist id")
         
         # ========== 特殊处理：每日推荐 ==========
         # 每日推荐使用固定 ID "p_daily"
@@ -1196,12 +1185,13 @@ class SubsonicApiView(HomeAssistantView):
                 songs = await cloud_music.async_get_dailySongs()
                 if not songs:
                     _LOGGER.warning("每日推荐歌曲列表为空")
-                    return self._error_response(request, post_data, 70, "Daily recommend not available")
+                    return await self._error_response(request, post_data, 70, "Daily recommend not available")
                 
                 # 格式化歌曲列表
+                qualities = await cloud_music.quality.async_get_many([song.id for song in songs])
                 songs_list = []
                 for song in songs:
-                    songs_list.append({
+                    songs_list.append(self._apply_quality({
                         "id": f"s_{song.id}",
                         "isDir": False,
                         "title": song.song,
@@ -1212,11 +1202,11 @@ class SubsonicApiView(HomeAssistantView):
                         "contentType": "audio/mpeg",
                         "suffix": "mp3",
                         "type": "music"
-                    })
+                    }, qualities.get(str(song.id))))
                 
                 _LOGGER.info(f"Subsonic getPlaylist: 返回 {len(songs_list)} 首每日推荐歌曲")
                 
-                return self._response(request, post_data, {
+                return await self._response(request, post_data, {
                     "playlist": {
                         "id": "p_daily",
                         "name": "📅 每日推荐",
@@ -1232,7 +1222,7 @@ class SubsonicApiView(HomeAssistantView):
                 })
             except Exception as e:
                 _LOGGER.error(f"Subsonic getPlaylist (每日推荐) 失败: {e}", exc_info=True)
-                return self._error_response(request, post_data, 0, "Server error")
+                return await self._error_response(request, post_data, 0, "Server error")
         # ========== 每日推荐处理结束 ==========
         
         # 普通歌单处理：提取歌单 ID
@@ -1246,11 +1236,13 @@ class SubsonicApiView(HomeAssistantView):
             # 获取歌曲列表
             songs = await cloud_music.async_get_playlist(real_id)
             if not songs:
-                return self._error_response(request, post_data, 70, "Playlist not found")
+                return await self._error_response(request, post_data, 70, "Playlist not found")
             
+            # 整个歌单的音质分批获取
+            qualities = await cloud_music.quality.async_get_many([song.id for song in songs])
             songs_list = []
             for song in songs:
-                songs_list.append({
+                songs_list.append(self._apply_quality({
                     "id": f"s_{song.id}",
                     "isDir": False,
                     "title": song.song,
@@ -1262,9 +1254,9 @@ class SubsonicApiView(HomeAssistantView):
                     "suffix": "mp3",
                     "type": "music"
                     # 注意：不设置 parent 和 albumId，避免 MA 尝试调用 getAlbum
-                })
+                }, qualities.get(str(song.id))))
             
-            return self._response(request, post_data, {
+            return await self._response(request, post_data, {
                 "playlist": {
                     "id": playlist_id,
                     "name": playlist_data.get('name', ''),
@@ -1280,4 +1272,4 @@ class SubsonicApiView(HomeAssistantView):
             })
         except Exception as e:
             _LOGGER.error(f"Subsonic getPlaylist 失败: {e}", exc_info=True)
-            return self._error_response(request, post_data, 0, "Server error")
+            return await self._error_response(request, post_data, 0, "Server error")
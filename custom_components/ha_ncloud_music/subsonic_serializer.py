@@ -0,0 +1,182 @@
+"""
+Subsonic 响应序列化
+
+把响应数据分块生成 XML / JSON 文本，边生成边写入 web.StreamResponse，
+不再先拼出完整的响应字符串：
+- XML：用 str.translate 转义表一次完成转义
+- JSON：外层结构手工拼接，列表中的每个条目单独 json.dumps（C 实现）
+- 客户端支持时启用 gzip / deflate 压缩
+- 条目较多（如上千首歌曲的歌单）时在 executor 中生成，避免阻塞事件循环
+"""
+
+import json
+import logging
+
+from aiohttp import web
+
+_LOGGER = logging.getLogger(__name__)
+
+# 每次写入的块大小（字符数）
+CHUNK_SIZE = 32 * 1024
+# 条目数达到该值时在 executor 中序列化
+EXECUTOR_THRESHOLD = 200
+
+_XML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&apos;',
+})
+
+
+def xml_escape(text) -> str:
+    """XML 转义特殊字符"""
+    if text is None:
+        return ""
+    return str(text).translate(_XML_ESCAPE_TABLE)
+
+
+def count_entries(data, limit=EXECUTOR_THRESHOLD) -> int:
+    """统计列表中的条目数（达到 limit 即停止）"""
+    count = 0
+    stack = [data]
+    while stack and count < limit:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(v for v in value.values() if isinstance(v, (dict, list)))
+        elif isinstance(value, list):
+            count += len(value)
+            stack.extend(v for v in value if isinstance(v, (dict, list)))
+    return count
+
+
+# ==================== XML ====================
+
+def _iter_xml(data: dict):
+    for key, value in data.items():
+        if isinstance(value, list):
+            for item in value:
+                if not isinstance(item, dict):
+                    continue
+                attrs = ' '.join(
+                    f'{k}="{xml_escape(v)}"' for k, v in item.items() if not isinstance(v, (dict, list))
+                )
+                nested = {k: v for k, v in item.items() if isinstance(v, (dict, list))}
+                if nested:
+                    yield f'<{key} {attrs}>'
+                    yield from _iter_xml(nested)
+                    yield f'</{key}>'
+                else:
+                    yield f'<{key} {attrs}/>'
+        elif isinstance(value, dict):
+            yield f'<{key}>'
+            yield from _iter_xml(value)
+            yield f'</{key}>'
+        elif value is not None:
+            yield f'<{key}>{xml_escape(value)}</{key}>'
+
+
+def iter_xml(data: dict, status: str, version: str, server: str):
+    """生成完整的 XML 响应文本片段"""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<subsonic-response xmlns="http://subsonic.org/restapi" status="{status}" '
+        f'version="{version}" serverVersion="{server}">\n'
+    )
+    yield from _iter_xml(data)
+    yield '\n</subsonic-response>'
+
+
+# ==================== JSON ====================
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _iter_json(value):
+    if isinstance(value, dict):
+        yield '{'
+        first = True
+        for key, item in value.items():
+            yield f'{_dumps(str(key))}:' if first else f',{_dumps(str(key))}:'
+            first = False
+            yield from _iter_json(item)
+        yield '}'
+    elif isinstance(value, list):
+        # 列表条目（歌曲、专辑等）整体交给 json.dumps
+        yield '['
+        for index, item in enumerate(value):
+            yield _dumps(item) if index == 0 else ',' + _dumps(item)
+        yield ']'
+    else:
+        yield _dumps(value)
+
+
+def iter_json(response_data: dict, callback: str = None):
+    """生成 JSON / JSONP 响应文本片段"""
+    if callback:
+        yield f'{callback}('
+    yield from _iter_json(response_data)
+    if callback:
+        yield ')'
+
+
+# ==================== 写入 ====================
+
+def _iter_chunks(fragments):
+    """把文本片段合并成 UTF-8 编码的数据块"""
+    buffer = []
+    size = 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+async def async_stream_response(request, fragments, content_type: str, in_executor: bool = False) -> web.StreamResponse:
+    """
+    分块写出响应
+
+    Args:
+        fragments: 文本片段迭代器（iter_xml / iter_json）
+        in_executor: 是否在 executor 中生成数据块
+    """
+    chunks = _iter_chunks(fragments)
+    # 在 prepare 之前取出第一块，序列化出错时还能返回正常的错误响应
+    if in_executor:
+        hass = request.app["hass"]
+        first = await hass.async_add_executor_job(next, chunks, None)
+    else:
+        first = next(chunks, None)
+
+    response = web.StreamResponse()
+    response.content_type = content_type
+    response.charset = 'utf-8'
+    response.enable_compression()
+    await response.prepare(request)
+
+    chunk = first
+    try:
+        while chunk is not None:
+            await response.write(chunk)
+            if in_executor:
+                chunk = await hass.async_add_executor_job(next, chunks, None)
+            else:
+                chunk = next(chunks, None)
+        await response.write_eof()
+    except ConnectionResetError:
+        _LOGGER.debug(f"Subsonic: 客户端已断开 {request.path}")
+    except Exception as e:
+        # 响应头已发送，不能再返回错误响应：记录后结束响应，客户端会收到不完整的内容
+        _LOGGER.error(f"Subsonic: 序列化响应失败 {request.path}: {e}", exc_info=True)
+        try:
+            await response.write_eof()
+        except Exception:
+            pass
+    return response